@@ -0,0 +1,149 @@
+# backend/app/api/v1/audio_api.py
+# Audio streaming for players: byte ranges (206, multipart/byteranges for several ranges),
+# content-hash ETags with If-None-Match / If-Range, and immutable caching of content-addressed
+# files. Registered before the /static mount so it takes over /static/audio/*.
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+from email.utils import formatdate, parsedate_to_datetime
+from functools import partial
+from starlette.concurrency import run_in_threadpool
+from typing import List, Tuple
+import anyio
+import os
+import stat
+import uuid
+
+from app.services import audio_service
+
+router = APIRouter()
+
+MEDIA_TYPE = "audio/mpeg"
+CHUNK_SIZE = 256 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=86400"  # legacy names: cached a day, then revalidated by ETag
+
+
+class AudioResponse(Response):
+    """
+    Sends byte segments of a file. Uses the ASGI zero-copy extension (sendfile) when the server
+    offers it, else reads chunks with pread in a worker thread; stops when the client goes away.
+    """
+
+    def __init__(self, path, segments: List[Tuple[bytes, int, int, bytes]], status_code: int, headers: dict):
+        # segments: (bytes before, offset, count, bytes after); the multipart separators live in before/after
+        super().__init__(status_code=status_code, headers=headers)
+        self.path = path
+        self.segments = segments
+
+    async def stream(self, scope, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or not self.segments:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        zero_copy = "http.response.zerocopysend" in scope.get("extensions", {})
+        fd = await run_in_threadpool(os.open, self.path, os.O_RDONLY)
+        try:
+            for before, offset, count, after in self.segments:
+                if before:
+                    await send({"type": "http.response.body", "body": before, "more_body": True})
+                if zero_copy:
+                    await send({"type": "http.response.zerocopysend", "file": fd, "offset": offset, "count": count,
+                                "more_body": True})
+                else:
+                    end = offset + count
+                    while offset < end:
+                        chunk = await anyio.to_thread.run_sync(os.pread, fd, min(CHUNK_SIZE, end - offset), offset)
+                        if not chunk:
+                            break
+                        offset += len(chunk)
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                if after:
+                    await send({"type": "http.response.body", "body": after, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
+
+    async def __call__(self, scope, receive, send):
+        async with anyio.create_task_group() as task_group:
+
+            async def wrap(func):
+                await func()
+                task_group.cancel_scope.cancel()
+
+            async def listen_for_disconnect():
+                while (await receive())["type"] != "http.disconnect":
+                    pass
+
+            task_group.start_soon(wrap, partial(self.stream, scope, send))
+            await wrap(listen_for_disconnect)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """ If-None-Match (weak comparison): "*" or any listed tag. """
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+def _if_range_matches(header: str, etag: str, mtime: float) -> bool:
+    """ If-Range: a strong ETag, or the exact Last-Modified date. """
+    header = header.strip()
+    if header.startswith('"'):
+        return header == etag
+    try:
+        return int(parsedate_to_datetime(header).timestamp()) == int(mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+@router.api_route("/static/audio/{filename}", methods=["GET", "HEAD"], include_in_schema=False)
+async def stream_audio(filename: str, request: Request):
+    """ Audio file with Range / conditional request support (see module comment). """
+    path = audio_service.path_of(filename)
+    try:
+        stat_result = await run_in_threadpool(os.stat, path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not stat.S_ISREG(stat_result.st_mode) or path.name.startswith(audio_service.TMP_PREFIX):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    size = stat_result.st_size
+    etag = f'"{await run_in_threadpool(audio_service.content_hash, path, stat_result)}"'
+    headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": IMMUTABLE if audio_service.is_immutable(path) else REVALIDATE,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    ranges = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or _if_range_matches(if_range, etag, stat_result.st_mtime)):
+        try:
+            ranges = audio_service.parse_range(range_header, size)
+        except audio_service.RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+
+    if not ranges:
+        headers.update({"content-type": MEDIA_TYPE, "content-length": str(size)})
+        return AudioResponse(path, [(b"", 0, size, b"")] if size else [], 200, headers)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers.update({"content-type": MEDIA_TYPE, "content-length": str(end - start + 1),
+                        "content-range": f"bytes {start}-{end}/{size}"})
+        return AudioResponse(path, [(b"", start, end - start + 1, b"")], 206, headers)
+
+    boundary = uuid.uuid4().hex
+    segments = []
+    for i, (start, end) in enumerate(ranges):
+        before = (b"" if i == 0 else b"\r\n") + (f"--{boundary}\r\nContent-Type: {MEDIA_TYPE}\r\n"
+                                                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode()
+        after = f"\r\n--{boundary}--\r\n".encode() if i == len(ranges) - 1 else b""
+        segments.append((before, start, end - start + 1, after))
+    length = sum(len(before) + count + len(after) for before, _, count, after in segments)
+    headers.update({"content-type": f"multipart/byteranges; boundary={boundary}", "content-length": str(length)})
+    return AudioResponse(path, segments, 206, headers)
@@ -0,0 +1,38 @@
+# backend/app/api/v1/autocomplete_api.py
+from fastapi import APIRouter, Query, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.services import autocomplete_service
+
+router = APIRouter()
+
+
+@router.get("/autocomplete")
+async def autocomplete(
+    prefix: str = Query(..., min_length=1, max_length=100, description="What the user typed so far"),
+    limit: int = Query(10, ge=1, le=autocomplete_service.MAX_LIMIT),
+    types: str = Query(None, description="Comma-separated: tracks, artists, albums, genres (default: all)"),
+    ):
+    """
+    Typeahead suggestions from the in-memory prefix index (no database query).
+    Matches any word start of the label, accents and case ignored; best weighted first.
+    """
+    if not autocomplete_service.STATE["ready"]:
+        raise HTTPException(status_code=503, detail="Autocomplete index is being built, retry shortly")
+    type_list = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    unknown = set(type_list or []) - set(autocomplete_service.TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown types: {sorted(unknown)}")
+    return {"prefix": prefix, "suggestions": autocomplete_service.complete(prefix, limit, type_list)}
+
+
+@router.post("/autocomplete/rebuild")
+async def rebuild_autocomplete_index():
+    """ Rebuild the prefix index of this worker from MongoDB. """
+    return await run_in_threadpool(autocomplete_service.rebuild)
+
+
+@router.get("/autocomplete/stats")
+async def autocomplete_stats():
+    """ Entries, keys and approximate memory footprint of the prefix index (this worker). """
+    return autocomplete_service.stats()
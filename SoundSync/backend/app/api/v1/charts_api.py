@@ -0,0 +1,35 @@
+# backend/app/api/v1/charts_api.py
+from fastapi import APIRouter, Query, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.services import charts_service
+
+router = APIRouter()
+
+
+async def _chart(window: str, scope: str, limit: int):
+    if window not in charts_service.WINDOWS:
+        raise HTTPException(status_code=404, detail=f"Unknown window '{window}', expected one of {sorted(charts_service.WINDOWS)}")
+    return await charts_service.top(window, scope, limit)
+
+
+@router.get("/{window}")
+async def top_tracks(window: str, limit: int = Query(20, ge=1, le=charts_service.MAX_LIMIT)):
+    """ Most played / liked tracks over the sliding window ('day' or 'week'), recent activity weighing more. """
+    return await _chart(window, charts_service.scope_key("global"), limit)
+
+
+@router.get("/{window}/genre/{genre}")
+async def top_tracks_of_genre(window: str, genre: str, limit: int = Query(20, ge=1, le=charts_service.MAX_LIMIT)):
+    return await _chart(window, charts_service.scope_key("genre", genre), limit)
+
+
+@router.get("/{window}/artist/{artist_id}")
+async def top_tracks_of_artist(window: str, artist_id: str, limit: int = Query(20, ge=1, le=charts_service.MAX_LIMIT)):
+    return await _chart(window, charts_service.scope_key("artist", artist_id), limit)
+
+
+@router.post("/snapshot")
+async def snapshot_charts():
+    """ Store the current charts in MongoDB (chart_snapshots) now instead of waiting for the periodic snapshot. """
+    return await run_in_threadpool(charts_service.snapshot)
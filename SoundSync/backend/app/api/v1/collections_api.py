@@ -1,33 +1,140 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 
-from app.db import crud, cache
+from app.db import async_crud as crud, cache, counters, expand as expansion, indexes
+from starlette.concurrency import run_in_threadpool
+from app.db.mongo import get_async_mongo_database
+from app.core.events import emit_write
 import json
+import time
 
 router = APIRouter()
 
 
+def cached_response(stored: bytes, request: Request) -> Response:
+    """
+    Response straight from the cache's stored bytes (see cache.encode_value): no JSON parsing
+    or re-serialization; compressed entries are sent gzipped as-is when the client accepts it.
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    if cache.is_compressed(stored) and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(cache.stored_payload(stored), media_type="application/json", headers=headers)
+    return Response(cache.stored_json(stored), media_type="application/json", headers=headers)
+
+
+
+async def expand_plan(collection_name: str, expand: str):
+    """
+    expand query param -> (tree, cache key parts). The key parts carry the cache generation of
+    every referenced collection, so a write to an artist also retires cached expanded tracks.
+    """
+    if not expand:
+        return None, []
+    try:
+        tree = expansion.parse_expand(collection_name, expand)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    deps = [await cache.acollection_key(c) for c in expansion.referenced_collections(collection_name, tree)]
+    return tree, ["expand", expand, *deps]
+
+
+
+async def apply_counters(collection_name: str, removed=(), added=()):
+    """ $inc the counters fed by `collection_name` (likes -> tracks.like_count, ...) and invalidate their targets. """
+    deltas = counters.counter_deltas(collection_name, removed, added)
+    if deltas:
+        for target in await counters.apply_counter_deltas(deltas):
+            await cache.ainvalidate_collection(target)
+
 
 # ========= Create / Read =========
 @router.post("/{collection_name}")
-def create_instance(collection_name : str, document_data: dict):
+async def create_instance(collection_name : str, document_data: dict):
     """Create a new document in the collection."""
-    doc_id = crud.create_one(collection_name, document_data)
+    doc_id = await crud.create_one(collection_name, document_data)
+    if doc_id != crud.MISSING_COLLECTION:
+        await apply_counters(collection_name, added=[document_data])
+        await emit_write(collection_name, "insert", doc_id, document_data)
 
     # Cache invalidation
-    cache.delete_cache(f"{collection_name}:*")
+    await cache.ainvalidate_collection(collection_name)
 
     return {"id": doc_id, "message": f"Document created in {collection_name}"}
 
 
+@router.post("/{collection_name}/bulk")
+async def bulk_write(collection_name: str, payload: dict):
+    """
+    Mixed insert/update/delete in one unordered bulk_write:
+    {"operations": [{"op": "insert", "document": {...}},
+                    {"op": "update", "id": "...", "updates": {...}},
+                    {"op": "delete", "id": "..."}]}
+    Returns per-operation results; the collection cache is invalidated once per batch.
+    """
+    operations = payload.get("operations")
+    if not isinstance(operations, list) or not operations:
+        raise HTTPException(status_code=400, detail="'operations' must be a non-empty list")
+    if len(operations) > crud.MAX_BULK_OPS:
+        raise HTTPException(status_code=413, detail=f"At most {crud.MAX_BULK_OPS} operations per batch")
+    if collection_name not in await crud.list_collection_names():
+        raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found")
+
+    # Counted collections (likes, comments...): current state of the documents about to change
+    before = {}
+    if collection_name in counters.COUNTERS:
+        ids = [str(op["id"]) for op in operations if isinstance(op, dict) and op.get("op") in ("update", "delete") and op.get("id")]
+        before = await crud.get_many_by_ids(collection_name, ids)
+
+    result = await crud.bulk_write(collection_name, operations)
+    applied = [entry for entry in result["results"] if entry["status"] == "ok"]
+    # Documents inserted by the batch are there for its updates and deletes (inserts run first)
+    inserted = {entry["id"]: operations[entry["index"]]["document"] for entry in applied if entry["op"] == "insert"}
+
+    if collection_name in counters.COUNTERS:
+        removed, added = [], list(inserted.values())
+        current = {**before, **inserted}
+        fields = counters.counter_fields(collection_name)
+        for entry in sorted(applied, key=lambda entry: entry["op"] == "delete"):  # updates, then deletes
+            op = operations[entry["index"]]
+            if entry["op"] == "insert" or entry["id"] not in current:
+                continue
+            if entry["op"] == "delete":
+                removed.append(current.pop(entry["id"]))
+            elif fields & set(op["updates"]):
+                removed.append(current[entry["id"]])
+                current[entry["id"]] = {**current[entry["id"]], **op["updates"]}
+                added.append(current[entry["id"]])
+        await apply_counters(collection_name, removed, added)
+
+    for entry in applied:
+        op = operations[entry["index"]]
+        if entry["op"] == "delete":
+            document = before.get(entry["id"]) or inserted.get(entry["id"])
+        else:
+            document = op.get("document") or op.get("updates")
+        await emit_write(collection_name, entry["op"], entry["id"], document)
+
+    # Cache invalidation (once for the whole batch)
+    if result["inserted"] or result["modified"] or result["deleted"]:
+        await cache.ainvalidate_collection(collection_name)
+
+    return result
+
+
 # ========= Read ============
 @router.get("/{collection_name}")
-def get_all(
+async def get_all(
+    request: Request,
     collection_name: str,
     filter: str = Query(None, description="JSON dict filter, e.g. {\"role\": \"artist\"}"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     sort: str = Query(None, description="JSON list of tuples, e.g. [[\"field\", 1]]"),
-    projection: str = Query(None, description="JSON dict, e.g. {\"field\": 1}")
+    projection: str = Query(None, description="JSON dict, e.g. {\"field\": 1}"),
+    after: str = Query(None, description="Keyset cursor from a previous 'next_after' (empty value = first page); skip is ignored"),
+    count: str = Query("exact", pattern="^(exact|estimated|cached|none|facet)$", description="How 'total' is computed"),
+    expand: str = Query(None, description="Comma-separated reference paths to resolve, e.g. tracks,tracks.artist_id"),
     ):
 
     """List all documents from any collection with pagination, sorting, projection, and filtering."""
@@ -36,102 +143,195 @@ def get_all(
     projection_val = json.loads(projection) if projection else None
     filter_val = json.loads(filter) if filter else None
 
+    tree, expand_parts = await expand_plan(collection_name, expand)
+
     #cache key
-    cache_key = f"{collection_name}:{json.dumps(filter_val, sort_keys=True)}:{skip}:{limit}:{sort_val}:{projection_val}"
+    cache_key = await cache.acollection_key(collection_name, json.dumps(filter_val, sort_keys=True), skip, limit, sort_val, projection_val, after, count, *expand_parts)
 
-    cached = cache.get_cache(cache_key)
-    #print(f"Cache retrieved for key {cache_key}: {cached}")
-    if cached:
-        return cached
-    result = crud.get_all(collection_name, filter=filter_val, skip=skip, limit=limit, sort=sort_val, projection=projection_val)
+    async def compute():
+        start = time.perf_counter()
+        result = await crud.get_all(collection_name, filter=filter_val, skip=skip, limit=limit, sort=sort_val, projection=projection_val, after=after, count=count)
+        indexes.record_query(collection_name, filter_val, sort_val, time.perf_counter() - start)
+        if tree:
+            await expansion.expand_documents(collection_name, result["items"], tree, crud.documents_by_ids)
+        return result
 
-    # Set cache
-    cache.set_cache(cache_key, result, ttl=1800)
+    # Cached bytes, or one query for all concurrent misses of this key (single-flight)
+    try:
+        stored = await cache.aget_or_compute(cache_key, compute, ttl=1800)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return cached_response(stored, request)
+
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+@router.get("/{collection_name}/export")
+async def export_ndjson(
+    collection_name: str,
+    filter: str = Query(None, description="JSON dict filter, e.g. {\"genre\": \"Jazz\"}"),
+    projection: str = Query(None, description="JSON dict, e.g. {\"title\": 1}"),
+    sort: str = Query(None, description="JSON list of tuples, e.g. [[\"_id\", 1]]"),
+    batch_size: int = Query(1000, ge=1, le=10000, description="Documents per cursor batch"),
+    ):
+    """
+    Stream the whole (filtered) collection as NDJSON, one document per line, from a single
+    cursor. Not cached and not capped by MAX_LIMIT.
+    """
+    try:
+        filter_val = json.loads(filter) if filter else None
+        projection_val = json.loads(projection) if projection else None
+        sort_val = json.loads(sort) if sort else None
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON parameter: {e}")
+    if collection_name not in await crud.list_collection_names():
+        raise HTTPException(status_code=404, detail=f"Collection '{collection_name}' not found")
+
+    async def lines():
+        buffer, size = [], 0
+        async for doc in crud.iter_documents(collection_name, filter_val, projection_val, sort_val, batch_size):
+            line = json.dumps(doc, default=str, ensure_ascii=False) + "\n"
+            buffer.append(line)
+            size += len(line)
+            if size >= EXPORT_FLUSH_BYTES:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+
+    headers = {"Content-Disposition": f'attachment; filename="{collection_name}.ndjson"'}
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
 
-    return result
 
 @router.get("/{collection_name}/by/{field}/{value}")
-def get_instance(collection_name : str, field:str, value: str):
+async def get_instance(
+    request: Request,
+    collection_name : str,
+    field:str,
+    value: str,
+    expand: str = Query(None, description="Comma-separated reference paths to resolve, e.g. tracks,tracks.artist_id"),
+    ):
     """Get a single document by ID."""
 
-    cache_key = f"{collection_name}:{field}:{value}"
+    tree, expand_parts = await expand_plan(collection_name, expand)
+    cache_key = await cache.acollection_key(collection_name, field, value, *expand_parts)
 
-    cached = cache.get_cache(cache_key)
-    if cached:
-        return cached
+    async def compute():
+        document = await crud.get_one_by_field(collection_name, field, value)
+        if document and tree:
+            await expansion.expand_documents(collection_name, [document], tree, crud.documents_by_ids)
+        return {"document": document} if document else None
 
-    document = crud.get_one_by_field(collection_name, field, value)
-    if not document:
+    stored = await cache.aget_or_compute(cache_key, compute, ttl=1800)
+    if not stored:
         raise HTTPException(status_code=404, detail=f"Document from {collection_name} not found")
-    
-    # Set cache
-    cache.set_cache(cache_key, {"document": document}, ttl=1800)
-    
-    return {"document": document}
+
+    return cached_response(stored, request)
+
+MAX_BY_IDS = 1000
+
+@router.get("/{collection_name}/by_ids")
+async def get_by_ids(
+    request: Request,
+    collection_name: str,
+    ids: str = Query(..., description="Comma-separated ids, e.g. track1,track2"),
+    expand: str = Query(None, description="Comma-separated reference paths to resolve, e.g. artist_id"),
+    ):
+    """
+    Many documents by _id, in the requested order, through documents_by_ids (one MGET,
+    one $in query for the misses). Unknown ids are listed in 'missing'.
+    """
+    requested = [part.strip() for part in ids.split(",") if part.strip()]
+    if len(requested) > MAX_BY_IDS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BY_IDS} ids per request")
+    tree, _ = await expand_plan(collection_name, expand)
+
+    documents = await crud.documents_by_ids(collection_name, requested)
+    result = {
+        "documents": [dict(documents[id_]) for id_ in requested if id_ in documents],
+        "missing": [id_ for id_ in dict.fromkeys(requested) if id_ not in documents],
+    }
+    if tree:
+        await expansion.expand_documents(collection_name, result["documents"], tree, crud.documents_by_ids)
+    return cached_response(cache.encode_value(result), request)
 
 @router.get("/{collection_name}/count")
-def count_instances(collection_name : str, filter: str = Query(None, description="JSON dict filter, e.g. {\"role\": \"artist\"}")):
+async def count_instances(request: Request, collection_name : str, filter: str = Query(None, description="JSON dict filter, e.g. {\"role\": \"artist\"}")):
     """Get total document count in a collection with optional filter."""
-    cache_key = f"{collection_name}:count:{filter or 'all'}"
-    cached = cache.get_cache(cache_key)
-    if cached:
-        return cached
+    cache_key = await cache.acollection_key(collection_name, "count", filter or "all")
+    filter_val = json.loads(filter) if filter else None
+
+    async def compute():
+        return {"count": await crud.count_documents(collection_name, filter_val)}
 
-    count = crud.count_documents(collection_name, filter)
-    data = {"count": count}
-    cache.set_cache(cache_key, data, ttl=1800)
-    return {"count": count}
+    stored = await cache.aget_or_compute(cache_key, compute, ttl=1800)
+    return cached_response(stored, request)
 
 @router.get("/meta/get_field_from_all/{collection}/{field}")
-def get_field_from_all(collection: str, field: str):
+async def get_field_from_all(request: Request, collection: str, field: str):
     """
     Return all distinct values for a given field in the specified collection.
     """
-    cache_key = f"{collection}:field_values:{field}"
+    cache_key = await cache.acollection_key(collection, "field_values", field)
 
-    # get cache
-    cached = cache.get_cache(cache_key)
-    if cached:
-        return cached
+    async def compute():
+        values = await crud.get_field_from_all(collection, field)
+        if values is None:
+            return None
+        return {"collection": collection, "field": field, "count": len(values), "values": values}
 
-    values = crud.get_field_from_all(collection, field)
-    if values is None:
+    stored = await cache.aget_or_compute(cache_key, compute, ttl=1800)
+    if not stored:
         raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
 
-    # set cache
-    cache.set_cache(cache_key, {"collection": collection, "field": field, "count": len(values), "values": values}, ttl=1800)
-
-    return {"collection": collection, "field": field, "count": len(values), "values": values}
+    return cached_response(stored, request)
 
 
 
 
 # ========= Update / Delete =========
 @router.put("/{collection_name}/by/{id}")
-def update_instance(collection_name : str, id: str, updates: dict):
+async def update_instance(collection_name : str, id: str, updates: dict):
     """Update a document by ID."""
-    result = crud.update_one(collection_name, id, updates)
+    before = None
+    if counters.counter_fields(collection_name) & set(updates):
+        before = await crud.get_one_by_field(collection_name, "_id", id)
+
+    result = await crud.update_one(collection_name, id, updates)
     
     # Check if document was found (not necessarily modified)
     if result == -1:  # Special return value for "not found"
         raise HTTPException(status_code=404, detail=f"Document from {collection_name} not found")
     
+    if before and result:
+        await apply_counters(collection_name, removed=[before], added=[{**before, **updates}])
+    if result:
+        await emit_write(collection_name, "update", id, updates)
+
 
     # Cache invalidation
-    cache.delete_cache(f"{collection_name}:*")
+    await cache.ainvalidate_collection(collection_name)
 
     return {"modified": result, "message": f"Document {id} from {collection_name} updated"}
 
 
 @router.delete("/{collection_name}/by/{id}")
-def delete_instance(collection_name : str, id: str):
+async def delete_instance(collection_name : str, id: str):
     """Delete a document by ID."""
-    deleted = crud.delete_one(collection_name, id)
+    before = None
+    if collection_name in counters.COUNTERS:
+        before = await crud.get_one_by_field(collection_name, "_id", id)
+
+    deleted = await crud.delete_one(collection_name, id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Document {id} from {collection_name} not found ")
     
+    if before:
+        await apply_counters(collection_name, removed=[before])
+    await emit_write(collection_name, "delete", id, before)
+
     # Cache invalidation
-    cache.delete_cache(f"{collection_name}:*")
+    await cache.ainvalidate_collection(collection_name)
 
     
     return {"deleted": deleted, "message": "Document {id} from {collection_name} deleted"}
@@ -139,12 +339,44 @@ def delete_instance(collection_name : str, id: str):
 
 # ========= Meta =========
 @router.get("/meta/list_collection_names")
-def list_collection_names():
+async def list_collection_names():
     """
     Return all collection names in the current MongoDB database.
     """
-    names = crud.list_collection_names()
+    names = await crud.list_collection_names()
     return {"collections": names}
 
 
+@router.get("/meta/cache_stats")
+async def cache_stats():
+    """
+    Hit / miss / eviction counters of the local and Redis cache tiers (this worker).
+    """
+    return cache.cache_stats()
+
 
+@router.get("/meta/index_advice")
+async def index_advice(include_supported: bool = Query(False, description="Also list shapes an index already supports")):
+    """
+    Filter/sort shapes seen by the list route (this worker) that no index supports,
+    with their frequency, observed latency and a suggested index.
+    """
+    db = get_async_mongo_database()
+    index_keys = {}
+    for collection in indexes.recorded_collections():
+        info = await db[collection].index_information()
+        index_keys[collection] = [[tuple(k) for k in idx["key"]] for idx in info.values()]
+    return {"shapes": indexes.advice(index_keys, include_supported=include_supported)}
+
+
+@router.post("/meta/reconcile_counters")
+async def reconcile_counters(source: str = Query(None, description="Only this source collection, e.g. likes")):
+    """
+    Recompute like / comment / play counters from their source collections and fix drifted ones.
+    """
+    if source is not None and source not in counters.COUNTERS:
+        raise HTTPException(status_code=404, detail=f"No counter is fed by '{source}'")
+    report = await run_in_threadpool(counters.reconcile_counters, [source] if source else None)
+    for target in sorted({t for r in report.values() if r["fixed"] for t in r["targets"]}):
+        await cache.ainvalidate_collection(target)
+    return {"counters": report}
@@ -0,0 +1,40 @@
+# backend/app/api/v1/events_api.py
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+
+from app.services import play_events_service as plays
+
+router = APIRouter()
+
+
+@router.post("/play", status_code=202)
+async def record_plays(payload: dict):
+    """
+    Record listens: one event {"track_id", "user_id"?, "played_at"? (ISO 8601, UTC if no offset;
+    stored in UTC, refused in the future), "ms_played"?}
+    or a batch {"events": [...]} (at most MAX_BATCH). Events are buffered and written to `plays`
+    in the background (202: accepted, not yet stored; see play_events_service for the durability
+    guarantee). A full buffer answers 503 with Retry-After: nothing of the request was kept.
+    """
+    events = payload["events"] if "events" in payload else [payload]
+    if not isinstance(events, list) or not events:
+        raise HTTPException(status_code=400, detail="'events' must be a non-empty list")
+    if len(events) > plays.MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {plays.MAX_BATCH} events per request")
+    documents, received_at = [], plays.now_iso()
+    for index, event in enumerate(events):
+        try:
+            documents.append(plays.parse_event(event, received_at))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"events[{index}]: {e}")
+
+    if not plays.offer(documents):
+        return JSONResponse(status_code=503, headers={"Retry-After": str(max(1, round(plays.FLUSH_INTERVAL)))},
+                            content={"detail": "Play event buffer is full, retry later", "queued": plays.depth()})
+    return {"accepted": len(documents), "queued": plays.depth()}
+
+
+@router.get("/stats")
+async def play_event_stats():
+    """ Buffer depth and flush counters of this worker. """
+    return plays.stats()
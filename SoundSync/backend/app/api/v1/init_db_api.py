@@ -1,38 +1,27 @@
 
 import app.db.crud as crud
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+
+from app.api.v1.jobs_api import accepted
+from app.services import jobs_service
 
 router = APIRouter()
 
 
-@router.post("/init_db")
-def init_db():
-    # print("TEST OK")
-    crud.init_database("ALL")
-    return {"message": "Database initialized with sample data."}
+@router.post("/init_db", status_code=202)
+def init_db(
+    batch_size: int = Query(crud.DEFAULT_BATCH_SIZE, ge=1, le=100000),
+    workers: int = Query(crud.DEFAULT_WORKERS, ge=1, le=16),
+    ):
+    """
+    Queue the seeding job: poll GET /jobs/{id} (status_url) for progress; its result carries the
+    per-collection stats. Caches are invalidated and the search indexes rebuilt once loaded.
+    """
+    job = jobs_service.submit("init_db", {"batch_size": batch_size, "workers": workers})
+    return accepted(job, "Database initialization queued.")
 
 
-@router.post("/clean_db")
+@router.post("/clean_db", status_code=202)
 def clean_db():
-    """Drop all collections dynamically."""
-    from app.db.mongo import get_mongo_database
-    db = get_mongo_database()
-    
-    # Get all collection names in the database
-    collection_names = db.list_collection_names()
-    
-    dropped_count = 0
-    for coll_name in collection_names:
-        try:
-            db[coll_name].drop()
-            dropped_count += 1
-            print(f"✓ Dropped collection: {coll_name}")
-        except Exception as e:
-            print(f"✗ Error dropping {coll_name}: {e}")
-    
-    return {
-        "message": f"Database cleaned. {dropped_count} collections dropped.",
-        "collections_dropped": collection_names
-    }
-
-
+    """ Queue the job dropping all collections (and their cached entries); poll GET /jobs/{id}. """
+    return accepted(jobs_service.submit("clean_db"), "Database cleaning queued.")
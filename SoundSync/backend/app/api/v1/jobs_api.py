@@ -0,0 +1,46 @@
+# backend/app/api/v1/jobs_api.py
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, Optional
+
+from app.services import jobs_service as jobs
+
+router = APIRouter()
+
+
+def accepted(job: Dict[str, Any], message: Optional[str] = None) -> JSONResponse:
+    """ 202 pointing at the job status (Location: /jobs/{id}). """
+    content = {"job": job, "status_url": f"/jobs/{job['id']}"}
+    if message:
+        content["message"] = message
+    return JSONResponse(status_code=202, content=content, headers={"Location": content["status_url"]})
+
+
+@router.get("")
+def list_jobs(limit: int = Query(50, ge=1, le=jobs.RECENT_SIZE)):
+    """ Most recent jobs (any status), queue depth and the job kinds that can be submitted. """
+    return {**jobs.stats(), "jobs": jobs.list_jobs(limit)}
+
+
+@router.post("/{kind}", status_code=202)
+def submit_job(kind: str, params: Optional[Dict[str, Any]] = Body(None)):
+    """
+    Queue a job (init_db, clean_db, reindex, warm_cache, recount, reconcile_indexes) with its
+    parameters as the JSON body, e.g. POST /jobs/reindex {"targets": ["search"]}.
+    The same job already queued or running is returned instead ("deduplicated": true).
+    """
+    try:
+        return accepted(jobs.submit(kind, params))
+    except jobs.UnknownJob as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except jobs.JobError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """ Status, progress (0-1), message and, once finished, result or error. """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found (or expired)")
+    return job
@@ -0,0 +1,57 @@
+# backend/app/api/v1/recommendations_api.py
+from fastapi import APIRouter, Query, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.db.async_crud import documents_by_ids
+from app.services import recommendation_service
+
+router = APIRouter()
+
+
+def _require_ready():
+    if not recommendation_service.STATE["ready"]:
+        raise HTTPException(status_code=503, detail="Recommendations are being computed, retry shortly")
+
+async def _tracks(scored):
+    documents = await documents_by_ids("tracks", [track_id for track_id, _ in scored])
+    return [{**documents[track_id], "_score": score} for track_id, score in scored if track_id in documents]
+
+
+@router.get("/track/{track_id}")
+async def similar_tracks(track_id: str, limit: int = Query(10, ge=1, le=recommendation_service.TOP_K)):
+    """ Tracks most often found with this one in playlists and likes (cosine co-occurrence, precomputed). """
+    _require_ready()
+    scored = recommendation_service.similar_tracks(track_id, limit)
+    if scored is None:
+        raise HTTPException(status_code=404, detail=f"No interactions recorded for track '{track_id}'")
+    return {"track_id": track_id, "items": await _tracks(scored)}
+
+
+@router.get("/user/{user_id}")
+async def more_for_you(user_id: str, limit: int = Query(10, ge=1, le=recommendation_service.TOP_K)):
+    """
+    Tracks the user has not liked or playlisted yet, ranked by similarity to the ones they have.
+    Users without history get the tracks found in the most playlists and likes ('fallback': true).
+    """
+    _require_ready()
+    scored, fallback = recommendation_service.user_tracks(user_id, limit)
+    return {"user_id": user_id, "fallback": fallback, "items": await _tracks(scored)}
+
+
+@router.post("/rebuild")
+async def rebuild_recommendations():
+    """ Recompute the whole model of this worker from MongoDB. """
+    return await run_in_threadpool(recommendation_service.rebuild)
+
+
+@router.post("/refresh")
+async def refresh_recommendations():
+    """ Apply the pending playlist / like changes now instead of waiting for the background refresh. """
+    _require_ready()
+    return await run_in_threadpool(recommendation_service.refresh)
+
+
+@router.get("/stats")
+async def recommendation_stats():
+    """ Size of the model of this worker (tracks, users, baskets, interactions, approximate bytes). """
+    return recommendation_service.stats()
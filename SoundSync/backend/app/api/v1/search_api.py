@@ -0,0 +1,48 @@
+# backend/app/api/v1/search_api.py
+from fastapi import APIRouter, Query, HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.db.async_crud import documents_by_ids
+from app.services import search_service
+
+router = APIRouter()
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, description="Free text, accents and case are ignored"),
+    types: str = Query(None, description="Comma-separated collections, e.g. tracks,artists (default: all)"),
+    skip: int = Query(0, ge=0, description="Per type"),
+    limit: int = Query(10, ge=1, le=50, description="Per type"),
+    ):
+    """
+    Ranked full-text search over tracks, artists, albums and concerts (BM25, in-process index).
+    Each type is paginated on its own; items are the documents plus their '_score'.
+    """
+    if not search_service.STATE["ready"]:
+        raise HTTPException(status_code=503, detail="Search index is being built, retry shortly")
+    type_list = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    unknown = set(type_list or []) - set(search_service.SEARCH_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {sorted(unknown)}")
+
+    found = await run_in_threadpool(search_service.search, q, type_list, skip, limit)
+
+    results = {}
+    for collection, res in found.items():
+        documents = await documents_by_ids(collection, [doc_id for doc_id, _ in res["hits"]])
+        items = [{**documents[doc_id], "_score": score} for doc_id, score in res["hits"] if doc_id in documents]
+        results[collection] = {"total": res["total"], "skip": skip, "limit": limit, "items": items}
+    return {"q": q, "results": results}
+
+
+@router.post("/search/rebuild")
+async def rebuild_search_index():
+    """ Rebuild the search indexes of this worker from MongoDB. """
+    return await run_in_threadpool(search_service.rebuild)
+
+
+@router.get("/search/stats")
+async def search_stats():
+    """ Size of the search indexes of this worker (documents, terms, postings, approximate bytes). """
+    return search_service.stats()
@@ -1,77 +1,163 @@
 # backend/app/api/v1/uploads_api.py
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
 from pathlib import Path
-import uuid
-import shutil
+
+from app.db.crud import _ids_query
+from app.db.mongo import get_async_mongo_database
+from app.services import audio_analysis_service, audio_service
 
 router = APIRouter()
 
 # Directory inside your project where static files are served from
-STATIC_AUDIO_DIR = Path(__file__).resolve().parents[2] / "static" / "audio"
-STATIC_AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+STATIC_AUDIO_DIR = audio_service.STATIC_AUDIO_DIR
 
 ALLOWED_MIME = {"audio/mpeg", "audio/mp3"}
 ALLOWED_EXT = {".mp3"}
-
-@router.post("/upload/audio")
-async def upload_audio(file: UploadFile = File(...)):
+MULTIPART_OVERHEAD = 64 * 1024  # boundaries and part headers around the file
+UPLOAD_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}}}}}}}
+
+class _AudioPart:
+    """ python-multipart callbacks: the bytes of the `file` field go to a HashedWriter, the rest is skipped. """
+
+    def __init__(self, field: str = "file"):
+        self.field = field
+        self.writer = None
+        self.error = None
+        self.pending = []       # file chunks parsed, not yet written
+        self._headers = {}
+        self._name = self._value = b""
+        self._in_file = False
+
+    def on_part_begin(self):
+        self._headers, self._in_file = {}, False
+
+    def on_header_field(self, data, start, end):
+        self._name += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._name.lower()] = self._value
+        self._name = self._value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name", b"").decode("latin-1") != self.field or b"filename" not in options:
+            return
+        # Basic validation
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip()
+        ext = Path(options[b"filename"].decode("utf-8", "replace")).suffix.lower()
+        if content_type not in ALLOWED_MIME:
+            self.error = "Invalid file type. Only mp3 allowed."
+        elif ext not in ALLOWED_EXT:
+            self.error = "Invalid extension. Only .mp3 allowed."
+        elif self.writer is None:
+            self.writer = audio_service.HashedWriter(ext)
+            self._in_file = True
+
+    def on_part_data(self, data, start, end):
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        self._in_file = False
+
+
+@router.post("/upload/audio", openapi_extra=UPLOAD_BODY)
+async def upload_audio(request: Request):
     """
-    Accept an mp3 file and save it under static/audio with a unique filename.
-    Returns JSON: { "url": "/static/audio/<filename>" }
+    Accept an mp3 file (multipart field "file") and store it under static/audio, named after its SHA-256.
+    The body is parsed as it arrives: file chunks are hashed and written in a worker thread, never on
+    the event loop and without an intermediate spooled copy.
+    Uploading the same content again returns the stored file ("duplicate": true).
+    Returns JSON: { "url": "/static/audio/<sha256>.mp3", "filename", "sha256", "size", "duplicate" }
+    Files above UPLOAD_MAX_BYTES are refused with 413.
+    The mp3 metadata (duration, bitrate, tags) is extracted afterwards, in the background, and
+    written to the tracks using the file (see audio_analysis_service).
     """
-    # Basic validation
-    content_type = file.content_type
-    if content_type not in ALLOWED_MIME:
-        raise HTTPException(status_code=400, detail="Invalid file type. Only mp3 allowed.")
-
-    original_name = Path(file.filename).name
-    ext = Path(original_name).suffix.lower()
-    if ext not in ALLOWED_EXT:
-        raise HTTPException(status_code=400, detail="Invalid extension. Only .mp3 allowed.")
-
-    # create unique filename
-    filename = f"{uuid.uuid4().hex}{ext}"
-    dest = STATIC_AUDIO_DIR / filename
-
+    # Refuse early when the declared size is already too large
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > audio_service.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD:
+        raise HTTPException(status_code=413, detail=f"File larger than {audio_service.MAX_UPLOAD_BYTES} bytes")
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body with a 'file' field")
+
+    part = _AudioPart()
+    parser = MultipartParser(params[b"boundary"], {
+        name: getattr(part, name) for name in ("on_part_begin", "on_part_data", "on_part_end", "on_header_field",
+                                               "on_header_value", "on_header_end", "on_headers_finished")
+    })
     try:
-        # streaming save
-        with dest.open("wb") as out_file:
-            shutil.copyfileobj(file.file, out_file)
+        # streaming save + hash, off the event loop
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if part.error:
+                raise HTTPException(status_code=400, detail=part.error)
+            if part.pending:
+                chunks, part.pending = part.pending, []
+                await run_in_threadpool(part.writer.write, chunks)
+        parser.finalize()
+        if part.writer is None:
+            raise HTTPException(status_code=400, detail="Missing 'file' field")
+        if part.pending:
+            await run_in_threadpool(part.writer.write, part.pending)
+        stored = await run_in_threadpool(part.writer.commit)
+    except audio_service.UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save file: {e}")
     finally:
-        await file.close()
+        if part.writer is not None:
+            part.writer.abort()  # no-op once committed
+
+    # Not awaited: the response never waits for the analysis
+    audio_analysis_service.submit(stored["filename"], stored["sha256"])
 
     # Return the public URL (static mounted at /static)
-    url = f"/static/audio/{filename}"
-    return {"url": url, "filename": filename}
+    return {"url": audio_service.url_of(stored["filename"]), **stored}
+
+
+@router.get("/upload/audio/analysis")
+def audio_analysis_stats():
+    """ Counters of the background metadata extraction. """
+    return audio_analysis_service.stats()
 
 
 @router.delete("/upload/audio/delete/{filename}")
-def delete_audio(filename: str):
+async def delete_audio(
+    filename: str,
+    track_id: str = Query(None, description="Track giving the file up: its own reference doesn't count"),
+    ):
+    """
+    Delete an uploaded file unless a track still uses it. Identical uploads share one file, so
+    the file stays while any track other than `track_id` points to it (an unsaved track, no
+    track_id: while any track does).
+    """
     # prevent path traversal and enforce extension
     safe_name = Path(filename).name
     if Path(safe_name).suffix.lower() not in ALLOWED_EXT:
         raise HTTPException(status_code=400, detail="Invalid filename or extension")
-    target = STATIC_AUDIO_DIR / safe_name
+    target = audio_service.path_of(safe_name)
     if not target.exists():
         raise HTTPException(status_code=404, detail="File not found")
+    query = {"audio_url": audio_service.url_of(safe_name)}
+    if track_id:
+        query["_id"] = {"$nin": _ids_query([track_id])["_id"]["$in"]}
+    users = await get_async_mongo_database().tracks.count_documents(query)
+    if users:
+        return {"deleted": False, "filename": safe_name, "detail": f"Still used by {users} tracks"}
     try:
         target.unlink()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete: {e}")
     return {"deleted": True, "filename": safe_name}
-
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -1,15 +1,52 @@
 from app.db.mongo import close_mongo, connect_to_mongo
 from app.db.redis import connect_to_redis, close_redis
+from app.db.indexes import reconcile_indexes
+from app.db import cache
 
 
 def connect_to_services():
     connect_to_mongo()
     connect_to_redis()
     print("✅ Connected to MongoDB and Redis")
+    reconcile_indexes()
+    cache.start_invalidation_listener()
+
+    from app.services import search_service, autocomplete_service, recommendation_service, charts_service, play_events_service
+    from app.services import audio_analysis_service, jobs_service
+    search_service.start_background_build()
+    autocomplete_service.start_background_build()
+    recommendation_service.start_background_build()
+    charts_service.start_snapshotter()
+    play_events_service.start_flusher()
+    audio_analysis_service.start_analysis()
+    jobs_service.start_workers()
 
 def close_services():
+    from app.services import audio_analysis_service, charts_service, jobs_service, play_events_service
+    jobs_service.stop_workers()
+    play_events_service.stop_flusher()  # drains the buffered plays while Mongo is still open
+    audio_analysis_service.stop_analysis()
+    charts_service.stop_snapshotter()
+    cache.stop_invalidation_listener()
     close_mongo()
     close_redis()
     print ("❌ Closed connections")
 
 
+# ---------- Write hooks ----------
+# In-process mirrors of the collections (search index, ...) register an async
+# hook(collection, op, doc_id, document); the CRUD routes call emit_write after each
+# successful write. op is "insert" (full document), "update" (the $set fields) or "delete"
+# (the removed document when the route read it, i.e. for counted collections, else None).
+_write_hooks = []
+
+def register_write_hook(hook):
+    if hook not in _write_hooks:
+        _write_hooks.append(hook)
+
+async def emit_write(collection: str, op: str, doc_id: str, document=None):
+    for hook in _write_hooks:
+        try:
+            await hook(collection, op, doc_id, document)
+        except Exception as e:
+            print(f"[events] write hook {hook.__name__} failed on {collection}/{doc_id}: {e}")
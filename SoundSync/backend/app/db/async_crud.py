@@ -0,0 +1,316 @@
+# db/async_crud.py
+# Async mirror of db/crud.py on Motor, used by the API routes so they don't hold
+# a threadpool slot while waiting on MongoDB.
+
+from app.db.mongo import get_async_mongo_database
+from app.db import cache
+from app.db.crud import (
+    MAX_LIMIT, MISSING_COLLECTION, COUNT_MODES, COUNT_CACHE_TTL, _to_str_id, _id_query, _ids_query, _normalize_sort,
+    _keyset_plan, _encode_after, _strip_fields, _filter_shape, _facet_pipeline,
+)
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_BULK_OPS = 5000
+
+
+def _db():
+    return get_async_mongo_database()
+
+
+# ===================== CRUD Methods ================
+# ------ Create / Read -------
+async def create_one(collection_name: str, data: Dict[str, Any]) -> str:
+    """
+    Insert one document; returns inserted id as string.
+    """
+    if collection_name in await list_collection_names():
+        coll = _db()[collection_name]
+        res = await coll.insert_one(data)
+        return str(res.inserted_id)
+    else:
+        return MISSING_COLLECTION
+
+
+# --------- Read --------------
+async def get_all(
+    collection_name: str,
+    filter: Optional[Dict[str, Any]] = None,
+    skip: int = 0,
+    limit: int = 50,
+    sort: Optional[List[Tuple[str, int]] | Tuple[str, int]] = None,
+    projection: Optional[Dict[str, int]] = None,
+    after: Optional[str] = None,
+    count: str = "exact",
+    ) -> Dict[str, Any]:
+    """
+    List documents from any collection with pagination and optional sort/projection.
+    Returns: {"items": [...], "total": N, "skip": X, "limit": Y}
+
+    With `after` (keyset mode, "" for the first page) `skip` is ignored, the page starts
+    right after the cursor and the result also holds "next_after" (None on the last page).
+    `count` picks how "total" is computed, see crud.COUNT_MODES.
+    """
+    if count not in COUNT_MODES:
+        raise ValueError(f"Unknown count mode '{count}', expected one of {', '.join(COUNT_MODES)}")
+    coll = _db()[collection_name]
+    q = filter or {}
+    s = max(0, int(skip))
+    l = max(1, min(int(limit), MAX_LIMIT))
+
+    if after is not None:
+        keys, page_q, projection, added = _keyset_plan(q, sort, after, projection)
+        docs = await coll.find(page_q, projection).sort(keys).limit(l).to_list(length=l)
+        next_after = _encode_after(keys, docs[-1]) if len(docs) == l else None
+        items = [_to_str_id(_strip_fields(doc, added)) for doc in docs]
+        total = await _count(collection_name, q, count)
+        return {"items": items, "total": total, "skip": 0, "limit": l, "next_after": next_after}
+
+    if count == "facet":
+        res = await coll.aggregate(_facet_pipeline(q, sort, s, l, projection)).to_list(length=1)
+        res = res[0] if res else {}
+        items = [_to_str_id(doc) for doc in res.get("items", [])]
+        total = res["total"][0]["n"] if res.get("total") else 0
+        return {"items": items, "total": total, "skip": s, "limit": l}
+
+    cursor = coll.find(q, projection)
+    if sort:
+        cursor = cursor.sort(_normalize_sort(sort))
+    cursor = cursor.skip(s).limit(l)
+
+    items = [_to_str_id(doc) async for doc in cursor]
+    total = await _count(collection_name, q, count)
+    return {"items": items, "total": total, "skip": s, "limit": l}
+
+async def _count(collection_name: str, q: Dict[str, Any], mode: str) -> Optional[int]:
+    coll = _db()[collection_name]
+    if mode == "none":
+        return None
+    if mode == "estimated" and not q:
+        return await coll.estimated_document_count()
+    if mode == "cached":
+        key = await cache.acollection_key(collection_name, "total", _filter_shape(q))
+        cached = await cache.aget_cache(key)
+        if cached is not None:
+            return cached["total"]
+        total = await coll.count_documents(q)
+        await cache.aset_cache(key, {"total": total}, ttl=COUNT_CACHE_TTL)
+        return total
+    # "exact", "facet" in keyset mode, "estimated" with a filter
+    return await coll.count_documents(q)
+
+async def iter_documents(
+    collection_name: str,
+    filter: Optional[Dict[str, Any]] = None,
+    projection: Optional[Dict[str, int]] = None,
+    sort: Optional[List[Tuple[str, int]] | Tuple[str, int]] = None,
+    batch_size: int = 1000,
+    ):
+    """
+    Async generator over every matching document from a single server-side cursor
+    (no MAX_LIMIT, memory bounded by batch_size).
+    """
+    cursor = _db()[collection_name].find(filter or {}, projection, batch_size=batch_size)
+    if sort:
+        cursor = cursor.sort(_normalize_sort(sort))
+    async for doc in cursor:
+        yield _to_str_id(doc)
+
+async def get_one_by_field(collection_name: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a single document by any field and value.
+    """
+    coll = _db()[collection_name]
+    # '_id' may be an ObjectId or a string key (like 'user1')
+    query = _id_query(value) if field == "_id" else {field: value}
+    doc = await coll.find_one(query)
+    return _to_str_id(doc) if doc else None
+
+async def get_many_by_ids(collection_name: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch many documents by _id with a single $in query. Returns {str(_id): document},
+    missing ids are simply absent.
+    """
+    if not ids:
+        return {}
+    docs = [_to_str_id(doc) async for doc in _db()[collection_name].find(_ids_query(ids))]
+    return {doc["_id"]: doc for doc in docs}
+
+async def documents_by_ids(collection_name: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    {id: document} for the given ids: one MGET over the per-document cache entries
+    (shared with /by/_id/{value}), one $in query for the misses, one pipelined backfill.
+    """
+    unique = list(dict.fromkeys(ids))
+    keys = await cache.acollection_keys(collection_name, [("_id", id_) for id_ in unique])
+    documents = {}
+    for id_, stored in zip(unique, await cache.amget_cache_raw(keys)):
+        if stored:
+            documents[id_] = cache.decode_value(stored)["document"]
+
+    misses = [id_ for id_ in unique if id_ not in documents]
+    if misses:
+        fetched = await get_many_by_ids(collection_name, misses)
+        backfill = {}
+        for key, id_ in zip(keys, unique):
+            if id_ in fetched:
+                documents[id_] = fetched[id_]
+                backfill[key] = cache.encode_value({"document": fetched[id_]})
+        await cache.aset_many_cache_raw(backfill, ttl=1800)
+    return documents
+
+async def count_documents(
+    collection_name: str,
+    filter: Optional[Dict[str, Any]] = None
+    ) -> int:
+    coll = _db()[collection_name]
+    return await coll.count_documents(filter or {})
+
+async def get_field_from_all(collection: str, field: str):
+    """
+    Return all distinct values for a given field in the specified collection.
+    """
+    if collection not in await _db().list_collection_names():
+        return None
+    values = await _db()[collection].distinct(field)
+    # Remove None/empty values and sort
+    values = [v for v in values if v not in (None, "", [])]
+    try:
+        values = sorted(values, key=lambda x: x.lower() if isinstance(x, str) else x)
+    except Exception:
+        pass
+    return values
+
+
+
+
+# ------- Update / Delete --------
+async def update_one(collection_name: str, id_or_key: str, updates: Dict[str, Any]) -> int:
+    coll = _db()[collection_name]
+
+    # Try ObjectId first
+    query = _id_query(id_or_key)
+    res = await coll.update_one(query, {"$set": updates})
+
+    # If document was found, return modified_count (even if 0)
+    if res.matched_count > 0:
+        return res.modified_count
+
+    # If not found and looks like ObjectId, try as string
+    if ObjectId.is_valid(id_or_key):
+        query = {"_id": id_or_key}
+        res = await coll.update_one(query, {"$set": updates})
+        if res.matched_count > 0:
+            return res.modified_count
+
+    # Not found at all
+    return -1  # Signal "not found"
+
+
+async def delete_one(collection_name: str, id_or_key: str) -> int:
+    """
+    Delete one document; returns deleted_count.
+    """
+    coll = _db()[collection_name]
+    res = await coll.delete_one(_id_query(id_or_key))
+    return res.deleted_count
+
+
+# ------- Bulk --------
+def _any_id_query(id_or_key: str) -> Dict[str, Any]:
+    """Matches the ObjectId and the plain string form in one query (update_one tries both)."""
+    if ObjectId.is_valid(id_or_key):
+        return {"_id": {"$in": [ObjectId(id_or_key), id_or_key]}}
+    return {"_id": id_or_key}
+
+def _bulk_request(op: Dict[str, Any]):
+    """One API operation -> pymongo request; raises ValueError on a malformed operation."""
+    kind = op.get("op") if isinstance(op, dict) else None
+    if kind == "insert":
+        if not isinstance(op.get("document"), dict):
+            raise ValueError("insert needs a 'document' object")
+        return InsertOne(op["document"])
+    if kind in ("update", "delete"):
+        if op.get("id") in (None, ""):
+            raise ValueError(f"{kind} needs an 'id'")
+        if kind == "delete":
+            return DeleteOne(_any_id_query(str(op["id"])))
+        if not isinstance(op.get("updates"), dict) or not op["updates"]:
+            raise ValueError("update needs a non-empty 'updates' object")
+        return UpdateOne(_any_id_query(str(op["id"])), {"$set": op["updates"]})
+    raise ValueError("'op' must be one of insert, update, delete")
+
+async def bulk_write(collection_name: str, operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Run mixed insert/update/delete operations as one unordered bulk_write.
+    Returns per-operation results (status ok / not_found / error) plus the aggregated counts.
+    """
+    coll = _db()[collection_name]
+    results: List[Dict[str, Any]] = []
+    requests, positions = [], []  # positions[i] = index in `operations` of requests[i]
+
+    for index, op in enumerate(operations):
+        entry = {"index": index, "op": op.get("op") if isinstance(op, dict) else None}
+        try:
+            request = _bulk_request(op)
+        except ValueError as e:
+            entry.update(status="error", error=str(e))
+        else:
+            if entry["op"] == "insert":
+                entry["id"] = str(op["document"]["_id"]) if "_id" in op["document"] else None
+            else:
+                entry["id"] = str(op["id"])
+            entry["status"] = "ok"
+            requests.append(request)
+            positions.append(index)
+        results.append(entry)
+
+    # bulk_write only reports aggregated match counts: look the targeted ids up first (one query)
+    target_ids = [results[i]["id"] for i in positions if results[i]["op"] != "insert"]
+    existing = set()
+    if target_ids:
+        lookup = []
+        for i in target_ids:
+            lookup += [ObjectId(i), i] if ObjectId.is_valid(i) else [i]
+        existing = {str(doc["_id"]) async for doc in coll.find({"_id": {"$in": lookup}}, {"_id": 1})}
+
+    counts = {"inserted": 0, "matched": 0, "modified": 0, "deleted": 0}
+    if requests:
+        try:
+            res = await coll.bulk_write(requests, ordered=False)
+            raw = res.bulk_api_result
+        except BulkWriteError as e:
+            raw = e.details
+            for err in raw.get("writeErrors", []):
+                entry = results[positions[err["index"]]]
+                entry.update(status="error", error=err.get("errmsg"))
+        counts = {
+            "inserted": raw.get("nInserted", 0),
+            "matched": raw.get("nMatched", 0),
+            "modified": raw.get("nModified", 0),
+            "deleted": raw.get("nRemoved", 0),
+        }
+        # InsertOne sets the generated _id on the document
+        for request, i in zip(requests, positions):
+            if isinstance(request, InsertOne) and results[i]["id"] is None:
+                results[i]["id"] = str(operations[i]["document"]["_id"])
+
+    # An unordered bulk_write runs its inserts before its updates and deletes: a document
+    # inserted by the batch is found by them, wherever it sits in the list
+    existing |= {results[i]["id"] for i in positions if results[i]["op"] == "insert" and results[i]["status"] == "ok"}
+    for i in positions:
+        if results[i]["op"] != "insert" and results[i]["status"] == "ok" and results[i]["id"] not in existing:
+            results[i]["status"] = "not_found"
+
+    counts["errors"] = sum(1 for r in results if r["status"] == "error")
+    return {"results": results, **counts}
+
+
+# ---------- Meta -------------
+async def list_collection_names():
+    """
+    Return all collection names in the current MongoDB database.
+    """
+    return sorted(await _db().list_collection_names())
@@ -1,25 +1,430 @@
-from app.db.redis import get_redis_client
+from app.db.redis import get_redis_client, get_async_redis_client
+from collections import OrderedDict
+from weakref import WeakKeyDictionary
+import asyncio
+import fnmatch
+import gzip
 import json
+import os
+import threading
+import time
+import uuid
 
 REDIS = get_redis_client()
 
-def get_cache(key: str):
-    """ Retrieve cached data by key. """
+
+# ---------- Local tier (per process) ----------
+# Optional in-process LRU with TTL in front of Redis, for the hottest keys.
+# Writes publish an invalidation on INVALIDATION_CHANNEL so every worker drops its local
+# entries; the local TTL bounds staleness if a message is ever missed.
+LOCAL_TIER_ENABLED = os.getenv("CACHE_LOCAL_TIER", "0") == "1"
+LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "1024"))
+LOCAL_TTL = float(os.getenv("CACHE_LOCAL_TTL", "5"))
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+STATS = {
+    "local": {"hits": 0, "misses": 0, "evictions": 0, "expired": 0},
+    "redis": {"hits": 0, "misses": 0},
+    "single_flight": {"computed": 0, "coalesced": 0, "lock_waits": 0, "lock_timeouts": 0},
+}
+
+class LocalCache:
+    """ Thread-safe LRU with per-entry TTL (the pub/sub listener runs in its own thread). """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                STATS["local"]["expired"] += 1
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl: float | None = None):
+        expires_at = time.monotonic() + min(ttl or self.ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                STATS["local"]["evictions"] += 1
+
+    def drop(self, predicate):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+LOCAL = LocalCache(LOCAL_MAX_ENTRIES, LOCAL_TTL)
+_local_gens = {}  # collection -> (expires_at, gen), only used with the local tier
+_local_epochs = {}  # collection -> number of local drops, to spot a drop during a generation lookup
+
+def _local_get(key: str):
+    if not LOCAL_TIER_ENABLED:
+        return None
+    data = LOCAL.get(key)
+    STATS["local"]["hits" if data is not None else "misses"] += 1
+    return data
+
+def _local_set(key: str, data, ttl: int):
+    if LOCAL_TIER_ENABLED:
+        LOCAL.set(key, data, ttl)
+
+def _drop_local(message: str):
+    """ 'gen:<collection>' drops a collection, 'pattern:<glob>' drops matching keys. """
+    kind, _, value = message.partition(":")
+    if kind == "gen":
+        _local_epochs[value] = _local_epochs.get(value, 0) + 1
+        _local_gens.pop(value, None)
+        LOCAL.drop(lambda k: k.startswith(value + ":"))
+    elif kind == "pattern":
+        LOCAL.drop(lambda k: fnmatch.fnmatchcase(k, value))
+
+def _local_gen(collection: str):
+    if not LOCAL_TIER_ENABLED:
+        return None
+    entry = _local_gens.get(collection)
+    if entry and entry[0] >= time.monotonic():
+        return entry[1]
+    return None
+
+def _remember_gen(collection: str, gen, epoch: int):
+    """
+    Memoize a generation read from Redis, unless the collection was dropped since the read
+    started (epoch = _local_epochs before the GET): the value may predate that invalidation.
+    """
+    if LOCAL_TIER_ENABLED and _local_epochs.get(collection, 0) == epoch:
+        _local_gens[collection] = (time.monotonic() + LOCAL_TTL, gen or b"0")
+
+
+# ---- Invalidation listener ----
+_listener = None
+
+def _on_invalidation(message):
+    data = message.get("data")
+    if isinstance(data, bytes):
+        _drop_local(data.decode())
+
+def start_invalidation_listener():
+    """ Subscribe this process to INVALIDATION_CHANNEL (no-op without the local tier, idempotent). """
+    global _listener
+    if not LOCAL_TIER_ENABLED or _listener is not None:
+        return
+    pubsub = REDIS.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_invalidation})
+    _listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+    print(f"[Redis] SUB -> {INVALIDATION_CHANNEL}")
+
+def stop_invalidation_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def cache_stats():
+    """ Hit / miss / eviction counters per tier (this process). """
+    return {
+        "local_tier": LOCAL_TIER_ENABLED,
+        "local_entries": len(LOCAL),
+        "local": dict(STATS["local"]),
+        "redis": dict(STATS["redis"]),
+        "single_flight": dict(STATS["single_flight"]),
+    }
+
+
+# ---------- Stored format ----------
+# Values are stored as ready-to-send response bodies: b"J" + compact JSON, or b"Z" + gzip(JSON)
+# above COMPRESS_MIN_BYTES. A hit can be returned as-is (even still gzipped when the client
+# accepts it) without json.loads + re-serialization. Header-less values are legacy plain JSON.
+COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = 5
+
+def encode_value(value) -> bytes:
+    """ Python value -> stored bytes. """
+    body = json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":")).encode()
+    if len(body) >= COMPRESS_MIN_BYTES:
+        return b"Z" + gzip.compress(body, compresslevel=COMPRESS_LEVEL, mtime=0)
+    return b"J" + body
+
+def is_compressed(stored: bytes) -> bool:
+    return stored[:1] == b"Z"
+
+def stored_payload(stored: bytes) -> bytes:
+    """ Stored bytes without the header (gzip data when compressed). """
+    return stored[1:] if stored[:1] in (b"J", b"Z") else stored
+
+def stored_json(stored: bytes) -> bytes:
+    """ Stored bytes -> uncompressed JSON body. """
+    if is_compressed(stored):
+        return gzip.decompress(stored[1:])
+    return stored_payload(stored)
+
+def decode_value(stored: bytes):
+    return json.loads(stored_json(stored))
+
+
+# ---------- Redis tier ----------
+def get_cache_raw(key: str):
+    """ Stored bytes for `key` (local tier first), or None. """
+    data = _local_get(key)
+    if data is not None:
+        print(f"[Local] HIT -> {key}")
+        return data
     data = REDIS.get(key)
     if data:
+        STATS["redis"]["hits"] += 1
         print(f"[Redis] HIT -> {key}")
-        return json.loads(data)
+        _local_set(key, data, LOCAL_TTL)
+        return data
+    STATS["redis"]["misses"] += 1
     print(f"[Redis] MISS -> {key}")
     return None
 
+def set_cache_raw(key: str, stored: bytes, ttl: int = 300):
+    """ Store already encoded bytes (see encode_value). """
+    REDIS.setex(key, ttl, stored)
+    _local_set(key, stored, ttl)
+    print(f"[Redis] SET -> {key} (TTL={ttl}s, {len(stored)}B)")
+
+def get_cache(key: str):
+    """ Retrieve cached data by key. """
+    data = get_cache_raw(key)
+    return decode_value(data) if data else None
+
 def set_cache(key: str, value: dict, ttl: int = 300):
     """ Set cached data with key and TTL (in seconds). """
-    REDIS.setex(key, ttl, json.dumps(value))
-    print(f"[Redis] SET -> {key} (TTL={ttl}s)")
+    set_cache_raw(key, encode_value(value), ttl)
 
 def delete_cache(pattern: str):
-    """ Delete cached entries matching the pattern. """
+    """ Delete cached entries matching the pattern (full keyspace SCAN, prefer invalidate_collection). """
     for key in REDIS.scan_iter(pattern):
         REDIS.delete(key)
         print(f"[Redis] DEL -> {key}")
+    message = f"pattern:{pattern}"
+    _drop_local(message)
+    REDIS.publish(INVALIDATION_CHANNEL, message)
+
+
+# ---------- Versioned namespaces ----------
+# Every cache key of a collection embeds the collection's generation counter:
+#   "<collection>:v<gen>:<parts...>"
+# A write only INCRs the counter (pipelined with the PUBLISH for the local tiers: one round trip),
+# entries of older generations are never read again and expire through their TTL.
+# The counters themselves have no TTL, so Redis must not run with an allkeys-* eviction policy.
+def _gen_key(collection: str) -> str:
+    return f"gen:{collection}"
+
+def _versioned_key(collection: str, gen, parts) -> str:
+    gen = int(gen) if gen else 0
+    return ":".join([collection, f"v{gen}", *(str(p) for p in parts)])
+
+def collection_key(collection: str, *parts) -> str:
+    """ Cache key for `parts` under the current generation of `collection`. """
+    gen = _local_gen(collection)
+    if gen is None:
+        epoch = _local_epochs.get(collection, 0)
+        gen = REDIS.get(_gen_key(collection))
+        _remember_gen(collection, gen, epoch)
+    return _versioned_key(collection, gen, parts)
+
+def invalidate_collection(collection: str) -> int:
+    """ Drop every cached entry of `collection` by moving it to a new generation. """
+    message = f"gen:{collection}"
+    _drop_local(message)
+    pipe = REDIS.pipeline(transaction=False)
+    pipe.incr(_gen_key(collection))
+    pipe.publish(INVALIDATION_CHANNEL, message)
+    gen, _ = pipe.execute()
+    print(f"[Redis] GEN -> {collection} v{gen}")
+    return gen
+
+
+# ---------- Async (redis.asyncio) ----------
+async def aget_cache_raw(key: str):
+    """ Async get_cache_raw. """
+    data = _local_get(key)
+    if data is not None:
+        print(f"[Local] HIT -> {key}")
+        return data
+    data = await get_async_redis_client().get(key)
+    if data:
+        STATS["redis"]["hits"] += 1
+        print(f"[Redis] HIT -> {key}")
+        _local_set(key, data, LOCAL_TTL)
+        return data
+    STATS["redis"]["misses"] += 1
+    print(f"[Redis] MISS -> {key}")
+    return None
+
+async def aset_cache_raw(key: str, stored: bytes, ttl: int = 300):
+    """ Async set_cache_raw. """
+    await get_async_redis_client().setex(key, ttl, stored)
+    _local_set(key, stored, ttl)
+    print(f"[Redis] SET -> {key} (TTL={ttl}s, {len(stored)}B)")
+
+async def amget_cache_raw(keys):
+    """ Stored bytes (or None) for each key: local tier first, then one MGET for the rest. """
+    found = [_local_get(key) for key in keys]
+    missing = [i for i, data in enumerate(found) if data is None]
+    if missing:
+        values = await get_async_redis_client().mget([keys[i] for i in missing])
+        for i, data in zip(missing, values):
+            if data:
+                found[i] = data
+                _local_set(keys[i], data, LOCAL_TTL)
+        hits = sum(1 for data in values if data)
+        STATS["redis"]["hits"] += hits
+        STATS["redis"]["misses"] += len(missing) - hits
+    print(f"[Redis] MGET -> {len(keys)} keys, {sum(1 for d in found if d)} hits")
+    return found
+
+async def aset_many_cache_raw(items, ttl: int = 300):
+    """ Store {key: stored bytes} with one pipelined round trip. """
+    if not items:
+        return
+    pipe = get_async_redis_client().pipeline(transaction=False)
+    for key, stored in items.items():
+        pipe.setex(key, ttl, stored)
+        _local_set(key, stored, ttl)
+    await pipe.execute()
+    print(f"[Redis] SET -> {len(items)} keys (TTL={ttl}s)")
+
+async def aget_cache(key: str):
+    """ Async get_cache. """
+    data = await aget_cache_raw(key)
+    return decode_value(data) if data else None
+
+async def aset_cache(key: str, value: dict, ttl: int = 300):
+    """ Async set_cache. """
+    await aset_cache_raw(key, encode_value(value), ttl)
+
+async def adelete_cache(pattern: str):
+    """ Async delete_cache. """
+    client = get_async_redis_client()
+    async for key in client.scan_iter(pattern):
+        await client.delete(key)
+        print(f"[Redis] DEL -> {key}")
+    message = f"pattern:{pattern}"
+    _drop_local(message)
+    await client.publish(INVALIDATION_CHANNEL, message)
+
+async def _agen(collection: str):
+    gen = _local_gen(collection)
+    if gen is None:
+        epoch = _local_epochs.get(collection, 0)
+        gen = await get_async_redis_client().get(_gen_key(collection))
+        _remember_gen(collection, gen, epoch)
+    return gen
+
+async def acollection_key(collection: str, *parts) -> str:
+    """ Async collection_key. """
+    return _versioned_key(collection, await _agen(collection), parts)
+
+async def acollection_keys(collection: str, parts_list) -> list:
+    """ acollection_key for each tuple of `parts_list`, with a single generation lookup. """
+    gen = await _agen(collection)
+    return [_versioned_key(collection, gen, parts) for parts in parts_list]
+
+async def ainvalidate_collection(collection: str) -> int:
+    """ Async invalidate_collection. """
+    message = f"gen:{collection}"
+    _drop_local(message)
+    pipe = get_async_redis_client().pipeline(transaction=False)
+    pipe.incr(_gen_key(collection))
+    pipe.publish(INVALIDATION_CHANNEL, message)
+    gen, _ = await pipe.execute()
+    print(f"[Redis] GEN -> {collection} v{gen}")
+    return gen
+
+
+# ---------- Single-flight (async) ----------
+# On a miss, only one request computes a key: inside a process the first caller starts a task and
+# every caller awaits it; across workers the task also holds a short Redis lease
+# ("lock:<key>", SET NX PX) and the other workers poll the key instead of querying MongoDB.
+# When the lease runs out (slow or dead holder) the next poller takes it over.
+SINGLE_FLIGHT_ENABLED = os.getenv("CACHE_SINGLE_FLIGHT", "1") == "1"
+LOCK_LEASE_MS = int(os.getenv("CACHE_LOCK_LEASE_MS", "5000"))
+LOCK_POLL_INTERVAL = 0.02
+_RELEASE_LOCK = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+
+_inflight = WeakKeyDictionary()  # event loop -> {key: Task}, tasks are loop-bound
+
+def _lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+async def _compute_and_store(key: str, compute, ttl: int):
+    value = await compute()
+    STATS["single_flight"]["computed"] += 1
+    if value is None:
+        return None  # nothing to cache (e.g. not found)
+    stored = encode_value(value)
+    await aset_cache_raw(key, stored, ttl)
+    return stored
+
+async def _lead(key: str, compute, ttl: int):
+    client = get_async_redis_client()
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + 2 * LOCK_LEASE_MS / 1000
+    waited = False
+    while True:
+        if await client.set(_lock_key(key), token, nx=True, px=LOCK_LEASE_MS):
+            try:
+                return await _compute_and_store(key, compute, ttl)
+            finally:
+                await client.eval(_RELEASE_LOCK, 1, _lock_key(key), token)
+        if not waited:
+            STATS["single_flight"]["lock_waits"] += 1
+            waited = True
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        data = await client.get(key)
+        if data:
+            _local_set(key, data, LOCAL_TTL)
+            return data
+        if time.monotonic() > deadline:
+            # Lease keeps being renewed by others without a value showing up: compute unlocked
+            STATS["single_flight"]["lock_timeouts"] += 1
+            return await _compute_and_store(key, compute, ttl)
+
+async def aget_or_compute(key: str, compute, ttl: int = 300):
+    """
+    Stored bytes for `key`; on a miss `await compute()` runs once for all concurrent callers
+    (see above) and its value is encoded and cached. A None value is returned, not cached.
+    Exceptions from `compute` reach every waiting caller. The computation runs in its own task:
+    a cancelled caller (client gone), leader included, leaves it running for the others.
+    """
+    stored = await aget_cache_raw(key)
+    if stored:
+        return stored
+    if not SINGLE_FLIGHT_ENABLED:
+        return await _compute_and_store(key, compute, ttl)
+
+    loop = asyncio.get_running_loop()
+    flights = _inflight.setdefault(loop, {})
+    task = flights.get(key)
+    if task is not None:
+        STATS["single_flight"]["coalesced"] += 1
+    else:
+        task = flights[key] = loop.create_task(_lead(key, compute, ttl))
+        task.add_done_callback(lambda done: _land(flights, key, done))
+    return await asyncio.shield(task)
 
+def _land(flights, key: str, task: asyncio.Task):
+    if flights.get(key) is task:
+        flights.pop(key)
+    if not task.cancelled():
+        task.exception()  # mark retrieved: no warning when every caller went away
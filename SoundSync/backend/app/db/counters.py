@@ -0,0 +1,128 @@
+# db/counters.py
+# Denormalized counters stored on the target documents (tracks.like_count, tracks.comment_count,
+# albums.like_count, tracks.play_count), so listing tracks with their counts is a single query.
+# The write routes $inc them right after writing the like / comment (two writes, not one
+# transaction); reconcile_counters() recomputes them from the source collections to repair drift.
+
+from app.db.mongo import get_mongo_database, get_async_mongo_database
+from collections import Counter, defaultdict
+from pymongo import UpdateOne
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MC = get_mongo_database()
+
+# source collection -> where its documents point: a fixed target collection, or one picked
+# by a type field ("likes" target either a track or an album)
+COUNTERS: Dict[str, Dict[str, Any]] = {
+    "likes": {
+        "counter": "like_count",
+        "id_field": "target_id",
+        "type_field": "target_type",
+        "targets": {"track": "tracks", "album": "albums"},
+    },
+    "comments": {"counter": "comment_count", "id_field": "track_id", "target": "tracks"},
+    "plays": {"counter": "play_count", "id_field": "track_id", "target": "tracks"},
+}
+
+RECONCILE_BATCH = 1000
+
+Target = Tuple[str, str, str]  # (target collection, target id, counter field)
+
+
+def _targets(spec: Dict[str, Any]) -> Dict[Optional[str], str]:
+    return spec["targets"] if "type_field" in spec else {None: spec["target"]}
+
+def counter_fields(collection: str) -> set:
+    """Fields of a source document that decide which counter it feeds."""
+    spec = COUNTERS.get(collection)
+    if not spec:
+        return set()
+    return {spec["id_field"], spec.get("type_field")} - {None}
+
+def counter_target(collection: str, doc: Optional[Dict[str, Any]]) -> Optional[Target]:
+    spec = COUNTERS.get(collection)
+    if not spec or not isinstance(doc, dict) or doc.get(spec["id_field"]) is None:
+        return None
+    target = _targets(spec).get(doc.get(spec["type_field"]) if "type_field" in spec else None)
+    if target is None:
+        return None
+    return target, str(doc[spec["id_field"]]), spec["counter"]
+
+def counter_deltas(collection: str, removed: Iterable[Dict] = (), added: Iterable[Dict] = ()) -> Dict[Target, int]:
+    """Net counter changes for source documents that disappeared (removed) or appeared (added)."""
+    deltas = Counter()
+    for doc in removed:
+        target = counter_target(collection, doc)
+        if target:
+            deltas[target] -= 1
+    for doc in added:
+        target = counter_target(collection, doc)
+        if target:
+            deltas[target] += 1
+    return {target: delta for target, delta in deltas.items() if delta}
+
+
+# ------- Incremental ($inc) --------
+async def apply_counter_deltas(deltas: Dict[Target, int]) -> List[str]:
+    """
+    One unordered bulk_write of $inc per target collection.
+    Returns the target collections that were written (their cache must be invalidated).
+    """
+    from app.db.crud import _ids_query
+    by_target = defaultdict(list)
+    for (target, target_id, counter), delta in deltas.items():
+        by_target[target].append(UpdateOne(_ids_query([target_id]), {"$inc": {counter: delta}}))
+    db = get_async_mongo_database()
+    for target, requests in by_target.items():
+        await db[target].bulk_write(requests, ordered=False)
+    return sorted(by_target)
+
+
+# ------- Reconciliation --------
+def _expected_counts(source: str, spec: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """target collection -> {target id: count}, from one $group over the source collection."""
+    group_id = f"${spec['id_field']}"
+    if "type_field" in spec:
+        group_id = {"type": f"${spec['type_field']}", "id": group_id}
+    expected = defaultdict(dict)
+    targets = _targets(spec)
+    for row in MC[source].aggregate([{"$group": {"_id": group_id, "n": {"$sum": 1}}}], allowDiskUse=True):
+        key = row["_id"]
+        kind, target_id = (key.get("type"), key.get("id")) if isinstance(key, dict) else (None, key)
+        if target_id is not None and kind in targets:
+            expected[targets[kind]][str(target_id)] = row["n"]
+    return expected
+
+def reconcile_counters(sources: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Recompute the counters of `sources` (default: all of COUNTERS) and $set the ones that drifted.
+    Target documents are scanned with a counter-only projection; fixes are written in batches.
+    A $inc landing between the $group and the $set is lost until the next run.
+    """
+    report = {}
+    for source, spec in COUNTERS.items():
+        if sources is not None and source not in sources:
+            continue
+        expected = _expected_counts(source, spec)
+        counter, fixed, touched = spec["counter"], 0, []
+        for target in set(_targets(spec).values()):
+            counts = expected.get(target, {})
+            requests = []
+            for doc in MC[target].find({}, {counter: 1}):
+                n = counts.get(str(doc["_id"]), 0)
+                if doc.get(counter) != n:
+                    requests.append(UpdateOne({"_id": doc["_id"]}, {"$set": {counter: n}}))
+                if len(requests) >= RECONCILE_BATCH:
+                    fixed += MC[target].bulk_write(requests, ordered=False).modified_count
+                    requests = []
+            if requests:
+                fixed += MC[target].bulk_write(requests, ordered=False).modified_count
+            touched.append(target)
+        report[source] = {
+            "counter": counter,
+            "sources": sum(sum(c.values()) for c in expected.values()),
+            "fixed": fixed,
+            "targets": sorted(touched),
+        }
+        print(f"[counters] {source}: {report[source]}")
+    return report
@@ -2,7 +2,13 @@
 
 # from flask import jsonify
 from app.db.mongo import get_mongo_database
+from app.db import cache
+from app.db.indexes import reconcile_indexes
+from app.db.counters import reconcile_counters
+from app.db.seed import load_collections, DEFAULT_BATCH_SIZE, DEFAULT_WORKERS
 import json
+import base64
+import os
 from bson import ObjectId
 
 MC = get_mongo_database()
@@ -30,57 +36,79 @@ def clean_collection(collection, print_debug=True):
 
 
 # ------- Init DB with sample data --------
+DATA_DIR = "app/data"
 PATHS = {
     # --- Artists  ---
-    "ARTISTS": "app/data/Artists/artists.json",
-    "ALBUMS" : "app/data/Artists/albums.json",
-    "TRACKS" : "app/data/Artists/tracks.json",
-    "CONCERTS" : "app/data/Artists/concerts.json",
-    "GENRES" : "app/data/Artists/genres.json",
+    "ARTISTS": f"{DATA_DIR}/Artists/artists.json",
+    "ALBUMS" : f"{DATA_DIR}/Artists/albums.json",
+    "TRACKS" : f"{DATA_DIR}/Artists/tracks.json",
+    "CONCERTS" : f"{DATA_DIR}/Artists/concerts.json",
+    "GENRES" : f"{DATA_DIR}/Artists/genres.json",
     # --- Users ----
-    "USERS" : "app/data/Users/users.json",
-    "LIKES" : "app/data/Users/likes.json",
-    "COMMENTS" : "app/data/Users/comments.json",
-    "PLAYLISTS" : "app/data/Users/playlists.json",
-    "SUBSCRIPTIONS" : "app/data/Users/subscriptions.json",
+    "USERS" : f"{DATA_DIR}/Users/users.json",
+    "LIKES" : f"{DATA_DIR}/Users/likes.json",
+    "COMMENTS" : f"{DATA_DIR}/Users/comments.json",
+    "PLAYLISTS" : f"{DATA_DIR}/Users/playlists.json",
+    "SUBSCRIPTIONS" : f"{DATA_DIR}/Users/subscriptions.json",
     }
 
-def init_database(action):
+def seed_paths(data_dir=None):
+    """ PATHS, or the same layout (Artists/..., Users/...) under another directory (e.g. generated data). """
+    if data_dir is None:
+        return dict(PATHS)
+    return {key: os.path.join(data_dir, os.path.relpath(path, DATA_DIR)) for key, path in PATHS.items()}
+
+def init_database(action, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = DEFAULT_WORKERS, on_loaded=None,
+                  data_dir=None):
+    """
+    Load the seed files of PATHS: "ALL" or a single key (e.g. "TRACKS"); with data_dir, the files
+    of the same layout under that directory (see app/db/synthetic.py).
+    Files are streamed and inserted in unordered batches of `batch_size`, `workers` collections
+    at a time. Returns per-collection stats (documents, seconds, docs_per_sec);
+    on_loaded(stats) is called as each collection finishes.
+    """
+    stats = {}
+    paths = seed_paths(data_dir)
     try :
         if action == "ALL":
             if DEBUG_CRUD : print(f"[init_database] Loading all collections...")
-            for key, path in PATHS.items():
-                collection = MC[key.lower()]
-                data = load_json(path)
-                if DEBUG_CRUD : print(f"Loading data : '{key}' from '{path}'")
-                if data:
-                    clean_collection(collection, print_debug = False)
-                    collection.insert_many(data)
+            targets = {key.lower(): path for key, path in paths.items()}
+        elif action in paths:
+            if DEBUG_CRUD : print(f"[init_database] Loading data : '{action}' from '{paths[action]}'")
+            targets = {action.lower(): paths[action]}
         else:
-            collection = MC[action.lower()]
-            data = load_json(PATHS[action])
-            if DEBUG_CRUD : print(f"[init_database] Loading data : '{action}' from '{PATHS[action]}'")
-            if data:
-                clean_collection(collection, print_debug = False)
-                collection.insert_many(data)
-            else:
-                print(f"Unknown collection: {action}")
+            print(f"Unknown collection: {action}")
+            return stats
+        stats = load_collections(targets, batch_size=batch_size, workers=workers, on_loaded=on_loaded)
+        # Dropped collections lose their indexes; seed files carry no counters
+        reconcile_indexes(force=True)
+        reconcile_counters()
     except Exception as e:
         print(f"[init_database] Error : {e}")
+    return stats
 
 
 
 # ---------- CRUD Operations ----------
-from bson import ObjectId
+from bson import ObjectId, json_util
 from typing import Any, Dict, List, Optional, Tuple
 
 MAX_LIMIT = 200 # Avoid accidental huge scans
+MISSING_COLLECTION = "Collection doesn't exist. Try again."  # create_one result for unknown collections
 
 def _to_str_id(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
     if doc and "_id" in doc:
         doc["_id"] = str(doc["_id"])
     return doc
 
+def _normalize_sort(sort) -> List[Tuple[str, int]]:
+    """Accepts {"field": -1}, ("field", -1) or [["field", -1], ...] and returns a list of tuples."""
+    if isinstance(sort, dict):
+        sort = list(sort.items())
+    elif not isinstance(sort, list) or (len(sort) == 2 and isinstance(sort[0], str)):
+        sort = [sort]  # Single tuple to list
+    return [(field, int(direction)) for field, direction in sort]
+
 def _id_query(id_or_key: str) -> Dict[str, Any]:
     """Accepts either a 24-char ObjectId or a string key (like 'user1')."""
     if ObjectId.is_valid(id_or_key):
@@ -91,6 +119,138 @@ def _id_query(id_or_key: str) -> Dict[str, Any]:
     return {"_id": id_or_key}
 
 
+# ------ Keyset (cursor) pagination -------
+# The `after` token encodes the sort keys of the last returned document plus its _id.
+# The next page is a range query on those keys instead of skip(), so deep pages cost
+# the same as the first one when the sort is backed by an index.
+# Sort fields are expected to hold a single BSON type (Mongo compares within a type bracket).
+def _keyset_sort(sort) -> List[Tuple[str, int]]:
+    """Normalized sort with '_id' appended as the tie-breaker."""
+    keys = _normalize_sort(sort) if sort else []
+    if not any(field == "_id" for field, _ in keys):
+        keys.append(("_id", keys[-1][1] if keys else 1))
+    return keys
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+def _encode_after(keys: List[Tuple[str, int]], doc: Dict[str, Any]) -> str:
+    payload = {"k": [list(k) for k in keys], "v": [_get_path(doc, field) for field, _ in keys]}
+    return base64.urlsafe_b64encode(json_util.dumps(payload).encode()).decode()
+
+def _decode_after(after: str, keys: List[Tuple[str, int]]) -> List[Any]:
+    """Returns the last sort values; the token must come from the same sort."""
+    try:
+        payload = json_util.loads(base64.urlsafe_b64decode(after.encode()))
+        values = payload["v"]
+        token_keys = [tuple(k) for k in payload["k"]]
+    except Exception:
+        raise ValueError("Invalid 'after' cursor")
+    if token_keys != keys or len(values) != len(keys):
+        raise ValueError("'after' cursor does not match the requested sort")
+    return values
+
+def _keyset_query(keys: List[Tuple[str, int]], values: List[Any]) -> Dict[str, Any]:
+    """
+    (k1 > v1) OR (k1 == v1 AND k2 > v2) OR ... with > / < following each key's direction.
+    Null and missing values sort first ascending and last descending: "after null" ascending
+    is "not null", descending is nothing; "after v" descending also takes the nulls.
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(keys):
+        clause = {f: v for (f, _), v in zip(keys[:i], values[:i])}
+        value = values[i]
+        if value is None:
+            if direction < 0:
+                continue
+            clause[field] = {"$ne": None}
+        elif direction > 0:
+            clause[field] = {"$gt": value}
+        else:
+            clause["$or"] = [{field: {"$lt": value}}, {field: None}]
+        clauses.append(clause)
+    return {"$or": clauses} if clauses else {"_id": {"$exists": False}}
+
+def _keyset_plan(q, sort, after, projection):
+    """
+    Build (sort keys, range query, projection, fields to strip) for a keyset page.
+    after == "" starts a cursor walk from the first page.
+    """
+    keys = _keyset_sort(sort)
+    if after:
+        range_q = _keyset_query(keys, _decode_after(after, keys))
+        q = {"$and": [q, range_q]} if q else range_q
+
+    # The token needs the sort fields: force them into the projection and strip them afterwards
+    added = []
+    if projection:
+        projection = dict(projection)
+        inclusive = any(v and k != "_id" for k, v in projection.items())
+        for field, _ in keys:
+            top = field.split(".")[0]
+            if field == "_id":
+                if projection.get("_id", 1) == 0:
+                    projection.pop("_id")
+                    added.append("_id")
+            elif inclusive and not projection.get(field) and not projection.get(top):
+                projection[field] = 1
+                added.append(field)  # the exact path: a projected sibling subfield stays
+            elif not inclusive and (field in projection or top in projection):
+                added.append(top if top in projection else field)
+                projection.pop(field, None)
+                projection.pop(top, None)
+        if not projection:
+            projection = None
+    return keys, q, projection, added
+
+# ------ Total count strategies -------
+# exact     : count_documents(filter), a second query per page (default)
+# estimated : collection metadata count when there is no filter (exact otherwise)
+# cached    : exact count memoized in Redis per filter, dropped on writes with the collection generation
+# none      : no count, "total" is None
+# facet     : page + total in a single $facet aggregation round trip (exact; falls back to
+#             "exact" in keyset mode, where the page and the total don't share a $match)
+COUNT_MODES = ("exact", "estimated", "cached", "none", "facet")
+COUNT_CACHE_TTL = 60
+
+def _filter_shape(q: Dict[str, Any]) -> str:
+    return json_util.dumps(q, sort_keys=True)
+
+def _facet_pipeline(q, sort, skip: int, limit: int, projection) -> List[Dict[str, Any]]:
+    # $match and $sort stay ahead of $facet so they can use indexes (sub-pipelines can't)
+    pipeline: List[Dict[str, Any]] = [{"$match": q}]
+    if sort:
+        pipeline.append({"$sort": dict(_normalize_sort(sort))})
+    page = [{"$skip": skip}, {"$limit": limit}]
+    if projection:
+        page.append({"$project": projection})
+    pipeline.append({"$facet": {"items": page, "total": [{"$count": "n"}]}})
+    return pipeline
+
+def _strip_fields(doc: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+    """ Remove (dotted) paths, and the subdocuments they leave empty. """
+    for field in fields:
+        *parents, leaf = field.split(".")
+        chain, node = [], doc
+        for name in parents:
+            child = node.get(name)
+            if not isinstance(child, dict):
+                break
+            chain.append((node, name))
+            node = child
+        else:
+            node.pop(leaf, None)
+            for parent, name in reversed(chain):
+                if parent[name]:
+                    break
+                parent.pop(name)
+    return doc
+
+
 # ===================== CRUD Methods ================
 # ------ Create / Read -------
 def create_one(collection_name: str, data: Dict[str, Any]) -> str:
@@ -102,7 +262,7 @@ def create_one(collection_name: str, data: Dict[str, Any]) -> str:
         res = coll.insert_one(data)
         return str(res.inserted_id)
     else:
-        return "Collection doesn't exist. Try again."
+        return MISSING_COLLECTION
 
 
 # --------- Read --------------
@@ -113,43 +273,92 @@ def get_all(
     limit: int = 50,
     sort: Optional[List[Tuple[str, int]] | Tuple[str, int]] = None,
     projection: Optional[Dict[str, int]] = None,
+    after: Optional[str] = None,
+    count: str = "exact",
     ) -> Dict[str, Any]:
     """
     List documents from any collection with pagination and optional sort/projection.
     Returns: {"items": [...], "total": N, "skip": X, "limit": Y}
+
+    With `after` (keyset mode, "" for the first page) `skip` is ignored, the page starts
+    right after the cursor and the result also holds "next_after" (None on the last page).
+    `count` picks how "total" is computed, see COUNT_MODES.
     """
+    if count not in COUNT_MODES:
+        raise ValueError(f"Unknown count mode '{count}', expected one of {', '.join(COUNT_MODES)}")
     coll = MC[collection_name]
     q = filter or {}
     s = max(0, int(skip))
     l = max(1, min(int(limit), MAX_LIMIT))
 
+    if after is not None:
+        keys, page_q, projection, added = _keyset_plan(q, sort, after, projection)
+        docs = list(coll.find(page_q, projection).sort(keys).limit(l))
+        next_after = _encode_after(keys, docs[-1]) if len(docs) == l else None
+        items = [_to_str_id(_strip_fields(doc, added)) for doc in docs]
+        total = _count(collection_name, q, count)
+        return {"items": items, "total": total, "skip": 0, "limit": l, "next_after": next_after}
+
+    if count == "facet":
+        res = next(coll.aggregate(_facet_pipeline(q, sort, s, l, projection)), None) or {}
+        items = [_to_str_id(doc) for doc in res.get("items", [])]
+        total = res["total"][0]["n"] if res.get("total") else 0
+        return {"items": items, "total": total, "skip": s, "limit": l}
+
     cursor = coll.find(q, projection)
     if sort:
-        # Convert dict to list of tuples if needed: {"field": -1} -> [("field", -1)]
-        if isinstance(sort, dict):
-            sort = list(sort.items())
-        elif not isinstance(sort, list):
-            sort = [sort]  # Single tuple to list
-        cursor = cursor.sort(sort)
+        cursor = cursor.sort(_normalize_sort(sort))
     cursor = cursor.skip(s).limit(l)
 
     items = [_to_str_id(doc) for doc in cursor]
-    total = coll.count_documents(q)
+    total = _count(collection_name, q, count)
     return {"items": items, "total": total, "skip": s, "limit": l}
 
+def _count(collection_name: str, q: Dict[str, Any], mode: str) -> Optional[int]:
+    coll = MC[collection_name]
+    if mode == "none":
+        return None
+    if mode == "estimated" and not q:
+        return coll.estimated_document_count()
+    if mode == "cached":
+        key = cache.collection_key(collection_name, "total", _filter_shape(q))
+        cached = cache.get_cache(key)
+        if cached is not None:
+            return cached["total"]
+        total = coll.count_documents(q)
+        cache.set_cache(key, {"total": total}, ttl=COUNT_CACHE_TTL)
+        return total
+    # "exact", "facet" in keyset mode, "estimated" with a filter
+    return coll.count_documents(q)
+
 def get_one_by_field(collection_name: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
     """
     Fetch a single document by any field and value.
     """
     coll = MC[collection_name]
-    if field == "_id":
-        try:
-            value = ObjectId(value)
-        except Exception:
-            return None
-    doc = coll.find_one({field: value})
+    # '_id' may be an ObjectId or a string key (like 'user1')
+    query = _id_query(value) if field == "_id" else {field: value}
+    doc = coll.find_one(query)
     return _to_str_id(doc) if doc else None
 
+def _ids_query(ids: List[str]) -> Dict[str, Any]:
+    """One $in over a list of ids, each in its ObjectId and plain string form."""
+    values = []
+    for id_or_key in ids:
+        if ObjectId.is_valid(id_or_key):
+            values.append(ObjectId(id_or_key))
+        values.append(id_or_key)
+    return {"_id": {"$in": values}}
+
+def get_many_by_ids(collection_name: str, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch many documents by _id with a single $in query. Returns {str(_id): document},
+    missing ids are simply absent.
+    """
+    if not ids:
+        return {}
+    return {doc["_id"]: doc for doc in map(_to_str_id, MC[collection_name].find(_ids_query(ids)))}
+
 def count_documents(
     collection_name: str, 
     filter: Optional[Dict[str, Any]] = None
@@ -0,0 +1,103 @@
+# db/expand.py
+# Server-side reference expansion ("populate") for the read routes: `expand=tracks,tracks.artist_id`
+# replaces the ids stored in reference fields by the referenced documents.
+# Expansion runs level by level; each level costs one batched lookup per referenced collection,
+# whatever the number of documents (a 500-track playlist with its artists = 2 lookups).
+
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+import asyncio
+import os
+
+# collection -> {reference field: referenced collection}; fields hold one id or a list of ids.
+REFERENCES: Dict[str, Dict[str, str]] = {
+    "tracks": {"artist_id": "artists", "album_id": "albums"},
+    "albums": {"artist_id": "artists", "tracks": "tracks"},
+    "playlists": {"user_id": "users", "tracks": "tracks"},
+    "users": {"playlists": "playlists", "followed_artists": "artists", "liked_tracks": "tracks"},
+    "concerts": {"artist_id": "artists"},
+    "comments": {"user_id": "users", "track_id": "tracks"},
+    "likes": {"user_id": "users"},
+    "subscriptions": {"user_id": "users"},
+}
+
+MAX_DEPTH = int(os.getenv("EXPAND_MAX_DEPTH", "3"))
+
+# (collection, ids) -> {str(_id): document}
+Fetcher = Callable[[str, List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+
+
+def parse_expand(collection: str, expand: str) -> Dict[str, Any]:
+    """
+    "tracks,tracks.artist_id,user_id" -> {"tracks": {"artist_id": {}}, "user_id": {}}.
+    Raises ValueError on unknown reference fields or paths deeper than MAX_DEPTH.
+    """
+    tree: Dict[str, Any] = {}
+    for path in filter(None, (p.strip() for p in expand.split(","))):
+        parts = path.split(".")
+        if len(parts) > MAX_DEPTH:
+            raise ValueError(f"expand path '{path}' is deeper than {MAX_DEPTH}")
+        node, current = tree, collection
+        for field in parts:
+            target = REFERENCES.get(current, {}).get(field)
+            if target is None:
+                raise ValueError(f"'{field}' is not an expandable reference of '{current}'")
+            node = node.setdefault(field, {})
+            current = target
+    return tree
+
+def referenced_collections(collection: str, tree: Dict[str, Any]) -> List[str]:
+    """Every collection an expansion reads from (their writes must invalidate cached results)."""
+    found = set()
+
+    def walk(current, node):
+        for field, sub in node.items():
+            target = REFERENCES[current][field]
+            found.add(target)
+            walk(target, sub)
+
+    walk(collection, tree)
+    return sorted(found)
+
+
+def _ids(value) -> Iterable[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value if isinstance(v, (str, int))]
+    if isinstance(value, (str, int)):
+        return [str(value)]
+    return []
+
+async def expand_documents(collection: str, docs: List[Dict[str, Any]], tree: Dict[str, Any], fetch: Fetcher):
+    """
+    Expand `docs` in place following `tree` (see parse_expand). Each occurrence gets its own copy
+    of the referenced document; unresolved ids are left as they are.
+    """
+    level = [(collection, docs, tree)] if tree else []
+    while level:
+        wanted = defaultdict(set)
+        for current, level_docs, node in level:
+            for field in node:
+                for doc in level_docs:
+                    wanted[REFERENCES[current][field]].update(_ids(doc.get(field)))
+
+        targets = [t for t in wanted if wanted[t]]
+        results = await asyncio.gather(*(fetch(t, sorted(wanted[t])) for t in targets))
+        fetched = dict(zip(targets, results))
+
+        next_level = []
+        for current, level_docs, node in level:
+            for field, sub in node.items():
+                found = fetched.get(REFERENCES[current][field], {})
+                expanded = []
+                for doc in level_docs:
+                    value = doc.get(field)
+                    if isinstance(value, list):
+                        doc[field] = [dict(found[str(v)]) if str(v) in found else v for v in value]
+                        expanded += [v for v in doc[field] if isinstance(v, dict)]
+                    elif value is not None and str(value) in found:
+                        doc[field] = dict(found[str(value)])
+                        expanded.append(doc[field])
+                if sub and expanded:
+                    next_level.append((REFERENCES[current][field], expanded, sub))
+        level = next_level
+    return docs
@@ -0,0 +1,203 @@
+# db/indexes.py
+# Declarative index registry (reconciled at startup) and an in-process index advisor
+# fed by the list route.
+
+from app.db.mongo import get_mongo_database
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+from typing import Any, Dict, List, Optional, Tuple
+
+MC = get_mongo_database()
+
+
+# ------- Registry --------
+# Managed indexes are named "ss_<field>_<dir>..." ; reconciliation only ever drops indexes
+# carrying that prefix, so indexes created by hand are left alone.
+MANAGED_PREFIX = "ss_"
+INDEX_NOT_FOUND = 27  # MongoDB error code
+
+INDEX_SPECS: Dict[str, List[List[Tuple[str, int]]]] = {
+    "tracks": [
+        [("artist_id", 1)],
+        [("album_id", 1)],
+        [("genre", 1), ("popularity", -1)],
+        [("popularity", -1), ("_id", -1)],
+        [("audio_url", 1)],
+    ],
+    "albums": [
+        [("artist_id", 1), ("release_year", -1)],
+    ],
+    "playlists": [
+        [("user_id", 1)],
+        [("tracks", 1)],
+    ],
+    "likes": [
+        [("user_id", 1), ("target_type", 1), ("target_id", 1)],
+        [("target_type", 1), ("target_id", 1)],
+    ],
+    "comments": [
+        [("track_id", 1), ("created_at", -1)],
+        [("user_id", 1)],
+    ],
+    "concerts": [
+        [("artist_id", 1), ("date", 1)],
+        [("date", 1)],
+    ],
+    "subscriptions": [
+        [("user_id", 1)],
+    ],
+    "plays": [
+        [("user_id", 1), ("played_at", -1)],
+    ],
+    "chart_snapshots": [
+        [("scope", 1), ("window", 1), ("taken_at", -1)],
+    ],
+}
+
+_reconciled = False
+
+def index_name(keys: List[Tuple[str, int]]) -> str:
+    return MANAGED_PREFIX + "_".join(f"{field}_{direction}" for field, direction in keys)
+
+def reconcile_indexes(force: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create the missing indexes of INDEX_SPECS and drop managed ones that left the spec.
+    Runs once per process unless forced (e.g. after init_database dropped the collections).
+    """
+    global _reconciled
+    if _reconciled and not force:
+        return {}
+    report = {}
+    for collection, specs in INDEX_SPECS.items():
+        existing = MC[collection].index_information()
+        wanted = {index_name(keys): keys for keys in specs}
+        created, dropped = [], []
+
+        for name, info in existing.items():
+            if not name.startswith(MANAGED_PREFIX):
+                continue
+            if name not in wanted or [tuple(k) for k in info["key"]] != wanted[name]:
+                try:
+                    MC[collection].drop_index(name)
+                except OperationFailure as e:
+                    # another worker reconciling at startup dropped it first
+                    if e.code != INDEX_NOT_FOUND:
+                        print(f"[indexes] Error dropping index '{name}' on '{collection}': {e}")
+                        continue
+                dropped.append(name)
+
+        missing = [IndexModel(keys, name=name) for name, keys in wanted.items()
+                   if name not in existing or name in dropped]
+        if missing:
+            try:
+                created = MC[collection].create_indexes(missing)
+            except Exception as e:
+                print(f"[indexes] Error creating indexes on '{collection}': {e}")
+        if created or dropped:
+            print(f"[indexes] {collection}: created {created}, dropped {dropped}")
+        report[collection] = {"created": created, "dropped": dropped}
+    _reconciled = True
+    return report
+
+
+# ------- Advisor --------
+# Records the filter/sort shapes that reach MongoDB through the list route (cache misses)
+# and reports the ones no index supports. Stats are per worker process.
+MAX_SHAPES = 500
+RANGE_OPS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists", "$not"}
+
+_shapes: Dict[Tuple, Dict[str, Any]] = {}
+
+def _filter_fields(q: Optional[Dict[str, Any]], equality: set, ranges: set):
+    for field, value in (q or {}).items():
+        if field in ("$and", "$or", "$nor"):
+            for sub in value:
+                _filter_fields(sub, equality, ranges)
+        elif field.startswith("$"):
+            continue
+        elif isinstance(value, dict) and any(op in RANGE_OPS for op in value):
+            ranges.add(field)
+        else:
+            equality.add(field)
+
+def query_shape(collection: str, filter: Optional[Dict[str, Any]], sort) -> Tuple:
+    """(collection, equality fields, range fields, sort) with the filter values stripped."""
+    from app.db.crud import _normalize_sort
+    equality, ranges = set(), set()
+    _filter_fields(filter, equality, ranges)
+    sort_keys = tuple(_normalize_sort(sort)) if sort else ()
+    return (collection, tuple(sorted(equality)), tuple(sorted(ranges - equality)), sort_keys)
+
+def record_query(collection: str, filter: Optional[Dict[str, Any]], sort, seconds: float):
+    shape = query_shape(collection, filter, sort)
+    if not shape[1] and not shape[2] and not shape[3]:
+        return  # plain scan of the collection, nothing to index
+    stats = _shapes.get(shape)
+    if stats is None:
+        if len(_shapes) >= MAX_SHAPES:
+            return
+        stats = _shapes[shape] = {"count": 0, "total_s": 0.0, "max_s": 0.0}
+    stats["count"] += 1
+    stats["total_s"] += seconds
+    stats["max_s"] = max(stats["max_s"], seconds)
+
+def suggested_index(shape: Tuple) -> List[Tuple[str, int]]:
+    """Equality, then sort, then range fields (ESR rule)."""
+    _, equality, ranges, sort_keys = shape
+    keys = [(field, 1) for field in equality]
+    keys += [k for k in sort_keys if k[0] not in equality]
+    keys += [(field, 1) for field in ranges if field not in dict(keys)]
+    return keys
+
+def is_supported(shape: Tuple, index_keys: List[Tuple[str, int]]) -> bool:
+    """
+    An index supports the shape if it starts with all equality fields (any order), followed by the
+    sort keys in order (all directions equal or all reversed); range fields may come after.
+    The first field must be used by the query, otherwise the index is useless for it.
+    """
+    _, equality, ranges, sort_keys = shape
+    if any(not isinstance(direction, (int, float)) for _, direction in index_keys):
+        return False  # text / hashed / geo indexes
+    keys = [(field, int(direction)) for field, direction in index_keys]
+    n_eq = len(equality)
+    if {field for field, _ in keys[:n_eq]} != set(equality):
+        return False
+    rest = keys[n_eq:]
+    sort_rest = [k for k in sort_keys if k[0] not in equality]
+    if sort_rest:
+        head = rest[:len(sort_rest)]
+        reversed_sort = [(field, -direction) for field, direction in sort_rest]
+        if head != sort_rest and head != reversed_sort:
+            return False
+        return True
+    if n_eq:
+        return True
+    return bool(rest) and rest[0][0] in ranges
+
+def advice(index_keys_by_collection: Dict[str, List[List[Tuple[str, int]]]], include_supported: bool = False):
+    """Recorded shapes, most expensive first (count x mean latency)."""
+    report = []
+    for shape, stats in _shapes.items():
+        collection, equality, ranges, sort_keys = shape
+        supported = any(is_supported(shape, keys) for keys in index_keys_by_collection.get(collection, []))
+        if supported and not include_supported:
+            continue
+        report.append({
+            "collection": collection,
+            "equality": list(equality),
+            "range": list(ranges),
+            "sort": [list(k) for k in sort_keys],
+            "count": stats["count"],
+            "mean_ms": round(stats["total_s"] / stats["count"] * 1000, 3),
+            "max_ms": round(stats["max_s"] * 1000, 3),
+            "supported": supported,
+            "suggested_index": [list(k) for k in suggested_index(shape)],
+        })
+    report.sort(key=lambda r: r["count"] * r["mean_ms"], reverse=True)
+    return report
+
+def recorded_collections() -> List[str]:
+    return sorted({shape[0] for shape in _shapes})
+
+def reset_advisor():
+    _shapes.clear()
@@ -1,10 +1,18 @@
 from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import weakref
 import os
 
 
 mongo_uri = os.getenv("MONGO_URI", "mongodb://mongo:27017")
+mongo_db_name = "soundsync_db"
 mongo_client = MongoClient(mongo_uri)
-db = mongo_client["soundsync_db"]
+db = mongo_client[mongo_db_name]
+
+# Motor clients are bound to the event loop they first run on, so keep one per loop
+# (uvicorn runs a single loop per worker, the TestClient may open several).
+async_mongo_clients = weakref.WeakKeyDictionary()
 
 def connect_to_mongo():
     mongo_client.admin.command("ping")
@@ -14,6 +22,9 @@ def close_mongo():
     if mongo_client:
         mongo_client.close()
         print("🛑 MongoDB connection closed")
+    for client in list(async_mongo_clients.values()):
+        client.close()
+    async_mongo_clients.clear()
 
 
 def get_mongo_client():
@@ -21,3 +32,16 @@ def get_mongo_client():
 
 def get_mongo_database():
     return db
+
+
+def get_async_mongo_client():
+    """ Motor client for the running event loop (created lazily). """
+    loop = asyncio.get_running_loop()
+    client = async_mongo_clients.get(loop)
+    if client is None:
+        client = AsyncIOMotorClient(mongo_uri, io_loop=loop)
+        async_mongo_clients[loop] = client
+    return client
+
+def get_async_mongo_database():
+    return get_async_mongo_client()[mongo_db_name]
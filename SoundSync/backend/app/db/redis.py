@@ -1,9 +1,15 @@
 import redis
+import redis.asyncio as aioredis
+import asyncio
+import weakref
 import os
 
 redis_url = os.getenv("REDIS_URL", "redis://redis:6379/0")
 redis_client = redis.Redis.from_url(redis_url)
 
+# asyncio connection pools are bound to the loop that opened them: one client per loop.
+async_redis_clients = weakref.WeakKeyDictionary()
+
 def connect_to_redis():
     redis_client.ping()
     print ("✅ Connected to Redis")
@@ -13,6 +19,16 @@ def close_redis():
     if redis_client:
         redis_client.close()
         print("🛑 Redis connection closed")
+    async_redis_clients.clear()
 
 def get_redis_client():
-    return redis_client
\ No newline at end of file
+    return redis_client
+
+def get_async_redis_client():
+    """ redis.asyncio client for the running event loop (created lazily). """
+    loop = asyncio.get_running_loop()
+    client = async_redis_clients.get(loop)
+    if client is None:
+        client = aioredis.Redis.from_url(redis_url)
+        async_redis_clients[loop] = client
+    return client
@@ -0,0 +1,141 @@
+# db/seed.py
+# Streaming seed loader used by crud.init_database: JSON arrays are parsed incrementally
+# and inserted in fixed-size unordered batches, independent collections load in parallel.
+
+from app.db.mongo import get_mongo_database
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import json
+import time
+
+MC = get_mongo_database()
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 4
+READ_CHUNK = 64 * 1024
+_WHITESPACE = " \t\r\n"
+
+
+#* ------------Incremental JSON------------
+def iter_json_array(filepath: str, chunk_size: int = READ_CHUNK) -> Iterator[Any]:
+    """
+    Yield the items of a top-level JSON array one by one, reading the file in chunks.
+    Memory is bounded by the largest item, not by the file size.
+    """
+    decoder = json.JSONDecoder()
+    with open(filepath, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+        expect = "["  # "[" -> "item" -> "," (or "]") -> "item" ...
+
+        def more() -> bool:
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                if not more():
+                    if expect == "[":
+                        return  # empty file
+                    raise ValueError(f"{filepath}: unexpected end of file")
+                continue
+
+            char = buf[pos]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError(f"{filepath}: top-level value is not an array")
+                pos += 1
+                expect = "item_or_end"
+            elif expect in ("item_or_end", "comma_or_end") and char == "]":
+                return
+            elif expect == "comma_or_end":
+                if char != ",":
+                    raise ValueError(f"{filepath}: expected ',' at offset {pos}")
+                pos += 1
+                expect = "item"
+            else:
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof or not more():
+                        raise
+                    continue
+                # A scalar touching the buffer end may be cut ("12" of "123"): read on first
+                if end == len(buf) and not eof and more():
+                    continue
+                pos = end
+                expect = "comma_or_end"
+                yield item
+
+
+def iter_batches(items: Iterator[Any], batch_size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ------- Loader --------
+def load_collection(
+    collection_name: str,
+    filepath: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Dict[str, Any]:
+    """
+    Replace a collection with the content of a JSON array file.
+    The collection is only dropped once the file yields a first batch (empty file = untouched).
+    """
+    coll = MC[collection_name]
+    start = time.perf_counter()
+    documents, batches = 0, 0
+    for batch in iter_batches(iter_json_array(filepath), batch_size):
+        if batches == 0:
+            MC.drop_collection(collection_name)
+        coll.insert_many(batch, ordered=False)
+        documents += len(batch)
+        batches += 1
+    seconds = time.perf_counter() - start
+    return {
+        "collection": collection_name,
+        "documents": documents,
+        "batches": batches,
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(documents / seconds, 1) if seconds else None,
+    }
+
+
+def load_collections(
+    paths: Dict[str, str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    on_loaded: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+    """
+    Load {collection_name: filepath} concurrently (the seed collections don't depend on each other).
+    Returns per-collection stats; a failing collection reports its error instead.
+    on_loaded(stats) is called as each collection finishes (from the loader threads).
+    """
+    def run(item):
+        name, path = item
+        try:
+            stats = load_collection(name, path, batch_size)
+        except Exception as e:
+            stats = {"collection": name, "error": str(e)}
+        print(f"[seed] {name}: {stats}")
+        if on_loaded is not None:
+            on_loaded(stats)
+        return stats
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return {stats["collection"]: stats for stats in pool.map(run, paths.items())}
@@ -0,0 +1,371 @@
+# db/synthetic.py
+# Synthetic catalog and user activity at any size, with the schema and the references of the
+# seed files (app/data): artists, albums, tracks, concerts, genres, users, playlists, likes,
+# comments, subscriptions. Popularity and activity are Zipf-like: a few tracks / artists get most
+# of the likes, plays and follows, a few users do most of the liking, commenting and playlisting.
+#
+# Documents are streamed to writers as they are generated (JSON array files in the seed layout,
+# loadable by crud.init_database(data_dir=...), or unordered insert_many batches into MongoDB);
+# nothing proportional to the number of likes / comments is kept in memory.
+
+from app.db.mongo import get_mongo_database
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import json
+import math
+import os
+import random
+
+MC = get_mongo_database()
+
+COLLECTIONS = ("genres", "artists", "albums", "tracks", "concerts",
+               "users", "subscriptions", "playlists", "likes", "comments")
+
+TRACKS_PER_ALBUM = 10
+MAX_LIKES_PER_USER = 5000
+MAX_COMMENTS_PER_USER = 2000
+MAX_PLAYLISTS_PER_USER = 200
+ALBUM_LIKE_RATIO = 0.05      # share of likes on albums rather than tracks
+PREMIUM_RATIO = 0.3
+SKEW = 1.0                   # Zipf exponent of track / artist popularity
+ACTIVITY_SKEW = 0.8          # Zipf exponent of user activity
+
+GENRES = {
+    "Electronic": "Synthesizers, drum machines and everything in between.",
+    "Rock": "Guitars, drums and loud amplifiers.",
+    "Experimental": "Music that ignores the rules on purpose.",
+    "Chanson Française": "French songs, where the lyrics come first.",
+    "Video Game": "Soundtracks and chiptunes from games.",
+    "Jazz": "Smooth and classic jazz music.",
+    "Synthwave": "Retro electronic music inspired by the 80s.",
+    "Hip-Hop": "Beats and rhymes.",
+    "Classical": "Orchestras, quartets and soloists.",
+    "Ambient": "Slow textures to listen to, or not.",
+}
+WORDS = ["Neon", "Vent", "Horde", "Golden", "Delusion", "Nuit", "Lights", "Echo", "Storm", "Velvet",
+         "Mirror", "Signal", "Ocean", "Ashes", "Garden", "Pulse", "Crystal", "Shadow", "Rêve", "Orbit"]
+COMMENTS = ["Love this groove!", "Synthwave forever!", "On repeat all day.", "That drop though.",
+            "Magnifique.", "Underrated.", "Brings back memories.", "Best track of the album."]
+VENUES = ["Blue Note Jazz Club, NY", "Electric Dreams Arena, LA", "Olympia, Paris", "Brixton Academy, London",
+          "Zénith, Lyon", "Budokan, Tokyo", "Paradiso, Amsterdam", "Tempodrom, Berlin"]
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+YEAR = 365 * 24 * 3600
+
+
+# ------- Sizes --------
+def scaled_sizes(likes: int) -> Dict[str, int]:
+    """
+    A consistent catalog around a number of likes (10M likes -> 200k users, 100k tracks...);
+    at least 200 tracks, so that 50 likes per user fit without repeating a track.
+    """
+    tracks = max(200, likes // 100)
+    users = max(10, likes // 50)
+    artists = max(2, tracks // 20)
+    return {
+        "artists": artists,
+        "tracks": tracks,
+        "concerts": artists * 2,
+        "users": users,
+        "playlists": users * 3 // 2,
+        "likes": likes,
+        "comments": likes // 5,
+    }
+
+
+# ------- Zipf helpers --------
+def zipf_rank(rnd: random.Random, n: int, skew: float) -> int:
+    """
+    A rank in [0, n), 0 the most frequent, with P(rank) ~ 1 / (rank + 1) ** skew
+    (inverse CDF of the continuous power law: O(1) time and memory whatever n).
+    """
+    u = rnd.random()
+    if abs(skew - 1) < 1e-9:
+        x = (n + 1) ** u
+    else:
+        a = 1 - skew
+        x = (1 + u * ((n + 1) ** a - 1)) ** (1 / a)
+    return min(int(x) - 1, n - 1)
+
+
+class Ranking:
+    """
+    Bijection between popularity ranks and item indexes (i = rank * m + offset mod n), so the
+    popular items are spread over the id space instead of being artist1, track1, ...
+    """
+
+    def __init__(self, n: int, rnd: random.Random):
+        self.n = n
+        m = max(1, int(n * 0.618) + rnd.randrange(max(1, n // 10)))
+        while math.gcd(m, n) != 1:
+            m += 1
+        self.m, self.offset = m, rnd.randrange(n)
+        self.m_inverse = pow(m, -1, n) if n > 1 else 0
+
+    def index(self, rank: int) -> int:
+        return (rank * self.m + self.offset) % self.n
+
+    def rank(self, index: int) -> int:
+        return (index - self.offset) * self.m_inverse % self.n
+
+    def draw(self, rnd: random.Random, skew: float) -> int:
+        return self.index(zipf_rank(rnd, self.n, skew))
+
+    def draw_distinct(self, rnd: random.Random, k: int, skew: float) -> List[int]:
+        """ k different indexes, popular ones first in probability; the rarest fill in if draws keep colliding. """
+        k = min(k, self.n)
+        picked, seen = [], set()
+        attempts = 20 * k + 100
+        while len(picked) < k and attempts:
+            i = self.draw(rnd, skew)
+            attempts -= 1
+            if i not in seen:
+                seen.add(i)
+                picked.append(i)
+        rank = 0
+        while len(picked) < k:
+            i = self.index(rank)
+            if i not in seen:
+                seen.add(i)
+                picked.append(i)
+            rank += 1
+        return picked
+
+
+def allocate(total: int, n: int, skew: float, cap: int) -> Iterator[int]:
+    """
+    Split `total` over n ranks in proportion to 1 / (rank + 1) ** skew, at most `cap` each:
+    yields the count of rank 0, 1, ... (what a capped rank can't take moves on to the next ones).
+    The counts sum to `total`, in O(1) memory. Raises ValueError right away if it can't fit.
+    """
+    if total > n * cap:
+        raise ValueError(f"Cannot spread {total} over {n} with at most {cap} each")
+    harmonic = sum(1 / (r + 1) ** skew for r in range(n))
+
+    def counts():
+        cumulative, given, carry = 0.0, 0, 0
+        for r in range(n):
+            cumulative += 1 / (r + 1) ** skew
+            share = min(total, int(total * cumulative / harmonic)) - given
+            given += share
+            count = min(cap, share + carry)
+            carry += share - count
+            yield count
+
+    return counts()
+
+
+def _timestamp(rnd: random.Random, start: datetime = EPOCH, span: int = YEAR) -> str:
+    return (start + timedelta(seconds=rnd.randrange(span))).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _title(rnd: random.Random, i: int) -> str:
+    return f"{rnd.choice(WORDS)} {rnd.choice(WORDS)} {i}"
+
+def _popularity(rank: int, n: int) -> int:
+    return round(100 * (1 - math.log(rank + 1) / math.log(n + 1)))
+
+def _artist_genre(artist: int) -> str:
+    names = list(GENRES)
+    return names[(artist * 2654435761 >> 8) % len(names)]
+
+
+# ------- Writers --------
+class JsonArrayWriter:
+    """ Streams documents into a JSON array file (the format of app/data, read by seed.iter_json_array). """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write("[")
+        self.count = 0
+
+    def write(self, doc: Dict[str, Any]):
+        self.file.write(",\n" if self.count else "\n")
+        self.file.write(json.dumps(doc, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self.file.write("\n]\n" if self.count else "]\n")
+        self.file.close()
+
+
+class MongoWriter:
+    """ Replaces a collection, inserting in unordered batches (like seed.load_collection). """
+
+    def __init__(self, name: str, batch_size: int):
+        MC.drop_collection(name)
+        self.collection = MC[name]
+        self.batch_size = batch_size
+        self.batch: List[Dict[str, Any]] = []
+        self.count = 0
+
+    def write(self, doc: Dict[str, Any]):
+        self.batch.append(doc)
+        self.count += 1
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.collection.insert_many(self.batch, ordered=False)
+            self.batch = []
+
+    def close(self):
+        self.flush()
+
+
+def file_writers(data_dir: str) -> Callable[[str], JsonArrayWriter]:
+    """ collection -> writer of its file in the seed layout under data_dir (crud.seed_paths). """
+    from app.db.crud import seed_paths
+    paths = {key.lower(): path for key, path in seed_paths(data_dir).items()}
+    return lambda name: JsonArrayWriter(paths[name])
+
+def mongo_writers(batch_size: int = 1000) -> Callable[[str], MongoWriter]:
+    return lambda name: MongoWriter(name, batch_size)
+
+
+# ------- Generator --------
+def generate(
+    writer: Callable[[str], Any],
+    sizes: Optional[Dict[str, int]] = None,
+    seed: int = 7,
+    skew: float = SKEW,
+    activity_skew: float = ACTIVITY_SKEW,
+    ) -> Dict[str, int]:
+    """
+    Generate every collection of COLLECTIONS into writer(name) (.write(doc) / .close()).
+    sizes: counts of artists, tracks, concerts, users, playlists, likes, comments
+    (default scaled_sizes(100000)); albums follow from tracks (TRACKS_PER_ALBUM),
+    subscriptions from users. Returns the number of documents written per collection.
+    """
+    sizes = {**scaled_sizes(100000), **(sizes or {})}
+    n_artists, n_tracks, n_users = sizes["artists"], sizes["tracks"], sizes["users"]
+    n_albums = -(-n_tracks // TRACKS_PER_ALBUM)
+    rnd = random.Random(seed)
+    artists, tracks, albums, users = (Ranking(n, rnd) for n in (n_artists, n_tracks, n_albums, n_users))
+    track_cap, album_cap = (n_tracks + 1) // 2, (n_albums + 1) // 2
+    like_cap = min(MAX_LIKES_PER_USER, track_cap + album_cap)
+    # fail before anything is written
+    likes_per_user = allocate(sizes["likes"], n_users, activity_skew, like_cap)
+    comments_per_user = allocate(sizes["comments"], n_users, activity_skew, MAX_COMMENTS_PER_USER)
+    playlists_per_user = allocate(sizes["playlists"], n_users, activity_skew, MAX_PLAYLISTS_PER_USER)
+
+    opened = {name: writer(name) for name in COLLECTIONS}
+    out = {name: w.write for name, w in opened.items()}
+    try:
+        for i, (name, description) in enumerate(GENRES.items()):
+            out["genres"]({"_id": f"genre{i + 1}", "name": name, "description": description})
+
+        for a in range(n_artists):
+            username = f"{rnd.choice(WORDS)} {rnd.choice(WORDS)} {a + 1}"
+            out["artists"]({
+                "_id": f"artist{a + 1}",
+                "username": username,
+                "email": f"artist{a + 1}@artists.com",
+                "password": "123456",
+                "genre": _artist_genre(a),
+                "biography": f"{username} fait de la musique {_artist_genre(a).lower()} depuis {rnd.randint(1990, 2024)}.",
+            })
+
+        # popular artists sign more albums; an album's tracks are consecutive track ids
+        for b in range(n_albums):
+            artist = artists.draw(rnd, skew)
+            first, last = b * TRACKS_PER_ALBUM, min(n_tracks, (b + 1) * TRACKS_PER_ALBUM)
+            out["albums"]({
+                "_id": f"album{b + 1}",
+                "title": _title(rnd, b + 1),
+                "artist_id": f"artist{artist + 1}",
+                "release_year": rnd.randint(1990, 2025),
+                "description": "...",
+                "tracks": [f"track{t + 1}" for t in range(first, last)],
+            })
+            for t in range(first, last):
+                out["tracks"]({
+                    "_id": f"track{t + 1}",
+                    "title": _title(rnd, t + 1),
+                    "artist_id": f"artist{artist + 1}",
+                    "album_id": f"album{b + 1}",
+                    "duration_sec": rnd.randint(90, 420),
+                    "genre": _artist_genre(artist),
+                    "popularity": _popularity(tracks.rank(t), n_tracks),
+                    "audio_url": f"/static/audio/track{t + 1}.mp3",
+                })
+
+        for c in range(sizes["concerts"]):
+            artist = artists.draw(rnd, skew)
+            out["concerts"]({
+                "_id": f"concert{c + 1}",
+                "artist_id": f"artist{artist + 1}",
+                "title": f"{rnd.choice(WORDS)} Tour",
+                "date": _timestamp(rnd, EPOCH + timedelta(days=365)),
+                "location": rnd.choice(VENUES),
+            })
+
+        # users in activity order: the most active first, their ids spread by the ranking
+        like_id = comment_id = playlist_id = 0
+        counts = zip(likes_per_user, comments_per_user, playlists_per_user)
+        for r, (n_likes, n_comments, n_playlists) in enumerate(counts):
+            u = users.index(r)
+            user_id = f"user{u + 1}"
+
+            n_album_likes = min(album_cap, int(n_likes * ALBUM_LIKE_RATIO + rnd.random()))
+            n_track_likes = n_likes - n_album_likes
+            if n_track_likes > track_cap:
+                n_track_likes, n_album_likes = track_cap, n_likes - track_cap
+            liked_tracks = [f"track{t + 1}" for t in tracks.draw_distinct(rnd, n_track_likes, skew)]
+            liked_albums = [f"album{b + 1}" for b in albums.draw_distinct(rnd, n_album_likes, skew)]
+            for target_type, targets in (("track", liked_tracks), ("album", liked_albums)):
+                for target_id in targets:
+                    like_id += 1
+                    out["likes"]({"_id": f"like{like_id}", "user_id": user_id, "target_type": target_type,
+                                  "target_id": target_id, "created_at": _timestamp(rnd)})
+
+            for _ in range(n_comments):
+                comment_id += 1
+                out["comments"]({"_id": f"comment{comment_id}", "user_id": user_id,
+                                  "track_id": f"track{tracks.draw(rnd, skew) + 1}",
+                                  "text": rnd.choice(COMMENTS), "created_at": _timestamp(rnd)})
+
+            playlists = []
+            for _ in range(n_playlists):
+                playlist_id += 1
+                playlists.append(f"playlist{playlist_id}")
+                out["playlists"]({
+                    "_id": f"playlist{playlist_id}",
+                    "name": f"{rnd.choice(WORDS)} Mix",
+                    "user_id": user_id,
+                    "tracks": [f"track{t + 1}" for t in tracks.draw_distinct(rnd, rnd.randint(5, 30), skew)],
+                    "created_at": _timestamp(rnd),
+                })
+
+            plan = "premium" if rnd.random() < PREMIUM_RATIO else "free"
+            start = EPOCH + timedelta(days=rnd.randrange(365))
+            out["subscriptions"]({
+                "_id": f"sub{u + 1}",
+                "user_id": user_id,
+                "plan": plan,
+                "start_date": start.strftime("%Y-%m-%d"),
+                "end_date": (start + timedelta(days=30)).strftime("%Y-%m-%d") if plan == "premium" else None,
+            })
+            followed = artists.draw_distinct(rnd, min(n_artists, n_likes // 20 + rnd.randint(0, 3)), skew)
+            out["users"]({
+                "_id": user_id,
+                "username": f"listener{u + 1}",
+                "email": f"listener{u + 1}@example.com",
+                "password": "123456",
+                "playlists": playlists,
+                "followed_artists": [f"artist{a + 1}" for a in followed],
+                "subscription": plan,
+                "liked_tracks": liked_tracks,
+                "profile": {
+                    "display_name": f"Listener {u + 1}",
+                    "avatar_url": f"https://example.com/avatar/listener{u + 1}.png",
+                },
+            })
+    finally:
+        for w in opened.values():
+            w.close()
+    stats = {name: w.count for name, w in opened.items()}
+    print(f"[synthetic] {stats}")
+    return stats
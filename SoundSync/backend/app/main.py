@@ -8,15 +8,25 @@ import os
 from app.api.v1 import health_api as health
 from app.api.v1 import init_db_api as init_db
 from app.api.v1 import collections_api as coll
-
-# File uploads
+from app.api.v1 import search_api as search
+from app.api.v1 import autocomplete_api as autocomplete
+from app.api.v1 import recommendations_api as recommendations
+from app.api.v1 import charts_api as charts
+from app.api.v1 import events_api as play_events
+from app.api.v1 import jobs_api as jobs
+
+# File uploads and audio streaming
 from app.api.v1 import uploads_api as uploads
+from app.api.v1 import audio_api as audio
 
 
 
 app = FastAPI(title="Soundsync API", version="0.1.0")
 
 
+# Audio streaming (Range, ETag, immutable caching) before the mount: it takes over /static/audio/*
+app.include_router(audio.router, tags=["audio"])
+
 static_path = os.path.join(os.path.dirname(__file__), "static") 
 print("Static files path:", static_path) 
 app.mount("/static", StaticFiles(directory=static_path), name="static")
@@ -53,12 +63,19 @@ def read_root():
 # Path Logic :
     # Check tests/test_collections_api.py for implementations and examples
     # -----------Api-----------------------------------
-    # Init db         (POST)   :   /api/init_db
+    # Init db         (POST)   :   /api/init_db    (queued: 202 + job, see Jobs)
     # Clean db        (POST)   :   /api/clean_db
+    # Jobs            (POST)   :   /jobs/{kind}  (init_db, clean_db, reindex, warm_cache, recount, reconcile_indexes)
+    #                 (GET)    :   /jobs, /jobs/{job_id}   (status, progress, result)
     # ----------CRUDs---------------------------------
     # List all	      (GET)    :   /crud/tracks	
     # Get by id	      (GET)    :   /crud/tracks/by/{id_or_key}
     # Count           (GET)    :   /crud/count
+    # Search          (GET)    :   /crud/search?q=francais&types=artists,tracks
+    # Autocomplete    (GET)    :   /crud/autocomplete?prefix=paz
+    # Recommendations (GET)    :   /recommendations/track/{track_id}, /recommendations/user/{user_id}
+    # Charts          (GET)    :   /charts/day, /charts/week/genre/{genre}, /charts/week/artist/{artist_id}
+    # Play events     (POST)   :   /events/play   {"track_id": ...} or {"events": [...]}
     # Filter/search	  (POST)   :   /crud/tracks?genre=Jazz&q=love     (same function as List all...)
     # Create	      (POST)   :   /crud/tracks
     # Update	      (POST)   :   /crud/tracks/{track_id}
@@ -67,12 +84,28 @@ def read_root():
 
 
 
+# Search and autocomplete (before the CRUD router: /crud/search would match /crud/{collection_name})
+app.include_router(search.router, prefix="/crud", tags=["search"])
+app.include_router(autocomplete.router, prefix="/crud", tags=["autocomplete"])
+
 # CRUD - centralized
 app.include_router(coll.router,prefix="/crud" )
 
 # File Uploads
 app.include_router(uploads.router, prefix="", tags=["uploads"])
 
+# Recommendations
+app.include_router(recommendations.router, prefix="/recommendations", tags=["recommendations"])
+
+# Charts
+app.include_router(charts.router, prefix="/charts", tags=["charts"])
+
+# Play events
+app.include_router(play_events.router, prefix="/events", tags=["events"])
+
+# Background jobs
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+
 # MISC
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(init_db.router, prefix="/api", tags=["init_db", "clean_db"])
@@ -0,0 +1,182 @@
+# services/audio_analysis_service.py
+# MP3 metadata extraction (duration, bitrate, sample rate, ID3 title / artist / album) off the
+# request path. submit() only hands the job to a background thread running its own event loop;
+# the parsing itself (mp3_metadata.analyze) runs in a process pool, so large files never hold the
+# GIL of the API worker.
+#
+# Results are cached by content hash in the audio_metadata collection (_id = sha256): the same
+# file uploaded again, or referenced by another track, is never parsed twice (files that are not
+# MPEG audio are cached too, with an "error"). Every track whose audio_url is the file's URL gets
+#   duration_sec  (whole seconds, replacing the hand-entered value)
+#   audio_meta    {sha256, bitrate_kbps, sample_rate, channels, vbr, duration_ms, tags: {title, artist, album}}
+# through the usual write hooks and a tracks cache invalidation.
+#
+# Tracks are usually created after their upload (the frontend uploads first): the upload starts
+# the analysis, and the tracks write hook (insert / update carrying audio_url) applies the cached
+# result, or waits for the running analysis of the same file.
+
+from app.core import events
+from app.db import async_crud, cache
+from app.db.mongo import get_async_mongo_database
+from app.services import audio_service, mp3_metadata
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import asyncio
+import multiprocessing
+import os
+import threading
+
+COLLECTION = "audio_metadata"
+WORKERS = int(os.getenv("AUDIO_ANALYSIS_WORKERS", "2"))  # 0 = no analysis
+AUDIO_PATH = audio_service.URL_PREFIX
+
+STATS = {"submitted": 0, "cache_hits": 0, "analyzed": 0, "failed": 0, "tracks_updated": 0}
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_inflight: Dict[str, asyncio.Future] = {}  # sha256 -> running analysis (service loop only)
+_lock = threading.Lock()
+
+
+# ---------- Service loop ----------
+def start_analysis():
+    """ Background loop + process pool (idempotent; submit() starts them on first use). """
+    global _loop, _thread, _pool
+    with _lock:
+        if WORKERS <= 0 or (_thread is not None and _thread.is_alive()):
+            return
+        # spawn: forking a process that runs Motor / Redis threads is unsafe
+        _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        _loop = asyncio.new_event_loop()
+        _thread = threading.Thread(target=_loop.run_forever, name="audio-analysis", daemon=True)
+        _thread.start()
+
+def stop_analysis(timeout: float = 10.0):
+    """ Let running jobs finish (up to timeout), then stop the loop and the pool. """
+    global _loop, _thread, _pool
+    with _lock:
+        if _thread is None:
+            return
+        loop, thread, pool = _loop, _thread, _pool
+        _loop = _thread = _pool = None
+    try:
+        asyncio.run_coroutine_threadsafe(_drain(), loop).result(timeout)
+    except Exception as e:
+        print(f"[audio] analysis drain incomplete: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+    loop.close()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+async def _drain():
+    pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    if pending:
+        await asyncio.wait(pending)
+
+def submit(filename: str, sha256: Optional[str] = None, track_id: Optional[str] = None) -> Optional[Future]:
+    """
+    Queue the analysis of static/audio/<filename> and its write-back to the tracks using it
+    (only track_id when given). Never blocks; returns a Future of the metadata (None when disabled).
+    """
+    start_analysis()
+    loop = _loop
+    if loop is None:
+        return None
+    STATS["submitted"] += 1
+    return asyncio.run_coroutine_threadsafe(_process(filename, sha256, track_id), loop)
+
+
+# ---------- Jobs (service loop) ----------
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+async def _process(filename: str, sha256: Optional[str], track_id: Optional[str]) -> Optional[Dict[str, Any]]:
+    try:
+        path = audio_service.path_of(filename)
+        loop = asyncio.get_running_loop()
+        if sha256 is None:
+            stat_result = await loop.run_in_executor(None, os.stat, path)
+            sha256 = await loop.run_in_executor(None, audio_service.content_hash, path, stat_result)
+        if sha256 not in _inflight:
+            _inflight[sha256] = asyncio.ensure_future(_metadata(sha256, path))
+            _inflight[sha256].add_done_callback(lambda _: _inflight.pop(sha256, None))
+        metadata = await asyncio.shield(_inflight[sha256])
+        if "error" not in metadata:
+            await _write_back(filename, metadata, track_id)
+        return metadata
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        STATS["failed"] += 1
+        print(f"[audio] analysis of {filename} failed: {e}")
+        return None
+
+async def _metadata(sha256: str, path) -> Dict[str, Any]:
+    """ Cached audio_metadata document of the content, parsing the file on a miss. """
+    collection = get_async_mongo_database()[COLLECTION]
+    cached = await collection.find_one({"_id": sha256})
+    if cached is not None:
+        STATS["cache_hits"] += 1
+        return cached
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_pool, mp3_metadata.analyze, str(path))
+        STATS["analyzed"] += 1
+    except ValueError as e:  # not MPEG audio: remembered as such
+        result = {"error": str(e)}
+        STATS["failed"] += 1
+    document = {"_id": sha256, **result, "analyzed_at": _now_iso()}
+    await collection.replace_one({"_id": sha256}, document, upsert=True)
+    return document
+
+def track_fields(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """ The $set applied to the tracks of an analyzed file. """
+    return {
+        "duration_sec": round(metadata["duration_sec"]),
+        "audio_meta": {
+            "sha256": metadata["_id"],
+            "bitrate_kbps": metadata["bitrate_kbps"],
+            "sample_rate": metadata["sample_rate"],
+            "channels": metadata["channels"],
+            "vbr": metadata["vbr"],
+            "duration_ms": round(metadata["duration_sec"] * 1000),
+            "tags": {k: metadata.get(k) for k in ("title", "artist", "album")},
+        },
+    }
+
+async def _write_back(filename: str, metadata: Dict[str, Any], track_id: Optional[str]):
+    query: Dict[str, Any] = {"audio_url": audio_service.url_of(filename),
+                             "audio_meta.sha256": {"$ne": metadata["_id"]}}  # not already applied
+    if track_id is not None:
+        query.update(async_crud._ids_query([track_id]))  # str(ObjectId) for tracks created without an _id
+    tracks = get_async_mongo_database().tracks
+    ids = [doc["_id"] async for doc in tracks.find(query, {"_id": 1})]
+    if not ids:
+        return
+    fields = track_fields(metadata)
+    result = await tracks.update_many({"_id": {"$in": ids}}, {"$set": fields})
+    STATS["tracks_updated"] += result.modified_count
+    for doc_id in ids:
+        await events.emit_write("tracks", "update", str(doc_id), fields)
+    await cache.ainvalidate_collection("tracks")
+    print(f"[audio] {filename}: {metadata['duration_sec']}s, {metadata['bitrate_kbps']} kbps -> {len(ids)} track(s)")
+
+
+# ---------- Write hook ----------
+async def on_write(collection: str, op: str, doc_id: str, document: Optional[Dict[str, Any]]):
+    """ A track created with (or moved to) an audio file gets its metadata. """
+    if collection != "tracks" or op not in ("insert", "update") or not isinstance(document, dict):
+        return
+    audio_url = document.get("audio_url")
+    if not isinstance(audio_url, str) or not audio_url.startswith(AUDIO_PATH):
+        return
+    filename = audio_url[len(AUDIO_PATH):]
+    if filename and "/" not in filename:
+        submit(filename, track_id=doc_id)
+
+events.register_write_hook(on_write)
+
+
+def stats() -> Dict[str, Any]:
+    return {**STATS, "workers": WORKERS, "running": len(_inflight)}
@@ -0,0 +1,171 @@
+# services/audio_service.py
+# Content-addressed audio storage under static/audio: an upload is named after the SHA-256 of its
+# bytes, so the same file uploaded twice is stored once. Chunks are hashed, size-checked and
+# written in worker threads (never on the event loop) into a temporary file that is then
+# hard-linked to its final name: os.link never overwrites, so concurrent uploads of the same
+# content keep a single complete file (the loser just drops its temporary copy).
+
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+import hashlib
+import os
+import re
+import uuid
+
+STATIC_AUDIO_DIR = Path(__file__).resolve().parents[1] / "static" / "audio"
+STATIC_AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+URL_PREFIX = "/static/audio/"  # static is mounted at /static
+TMP_PREFIX = ".upload-"
+
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 * 1024)))
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class HashedWriter:
+    """
+    Incremental upload into STATIC_AUDIO_DIR: write() chunks as they arrive, then commit() names the
+    file after its SHA-256 (or abort()). Blocking calls: run them in a worker thread.
+    """
+
+    def __init__(self, ext: str, max_bytes: Optional[int] = None):
+        self.ext = ext
+        self.max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._tmp = STATIC_AUDIO_DIR / f"{TMP_PREFIX}{uuid.uuid4().hex}"
+        self._out = None
+
+    def write(self, chunks: List[bytes]):
+        if self._out is None:
+            self._out = self._tmp.open("wb")
+        for chunk in chunks:
+            self.size += len(chunk)
+            if self.size > self.max_bytes:
+                self.abort()
+                raise UploadTooLarge(f"File larger than {self.max_bytes} bytes")
+            self._digest.update(chunk)
+            self._out.write(chunk)
+
+    def commit(self) -> Dict[str, Any]:
+        """ {"filename", "sha256", "size", "duplicate"} """
+        try:
+            if self._out is None:
+                self._out = self._tmp.open("wb")
+            self._out.close()
+            sha256 = self._digest.hexdigest()
+            filename = f"{sha256}{self.ext}"
+            dest = STATIC_AUDIO_DIR / filename
+            try:
+                os.link(self._tmp, dest)
+                duplicate = False
+            except FileExistsError:
+                duplicate = True
+            except OSError:  # no hard links on this filesystem: same content, replacing is harmless
+                duplicate = dest.exists()
+                if not duplicate:
+                    os.replace(self._tmp, dest)
+        finally:
+            self._tmp.unlink(missing_ok=True)
+        return {"filename": filename, "sha256": sha256, "size": self.size, "duplicate": duplicate}
+
+    def abort(self):
+        if self._out is not None:
+            self._out.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def store(source: BinaryIO, ext: str, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """ Copy a file object with a HashedWriter (blocking: run it in a thread). """
+    writer = HashedWriter(ext, max_bytes)
+    try:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            writer.write([chunk])
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+def path_of(filename: str) -> Path:
+    """ Stored file of a public name (no directories: path traversal is not possible). """
+    return STATIC_AUDIO_DIR / Path(filename).name
+
+def url_of(filename: str) -> str:
+    """ Public URL of a stored file, exactly as tracks.audio_url holds it (indexed, matched as is). """
+    return URL_PREFIX + Path(filename).name
+
+
+# ---------- Streaming ----------
+CONTENT_ADDRESSED = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+MAX_RANGES = 16
+_digests: Dict[Tuple[str, int, int], str] = {}  # (name, size, mtime_ns) -> sha256, for legacy names
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def content_hash(path: Path, stat_result: os.stat_result) -> str:
+    """
+    SHA-256 of a stored file: read from a content-addressed name, hashed once otherwise
+    (blocking on first use of a legacy file: run it in a thread).
+    """
+    match = CONTENT_ADDRESSED.match(path.name)
+    if match:
+        return match.group(1)
+    key = (path.name, stat_result.st_size, stat_result.st_mtime_ns)
+    digest = _digests.get(key)
+    if digest is None:
+        sha256 = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        digest = _digests[key] = sha256.hexdigest()
+    return digest
+
+def is_immutable(path: Path) -> bool:
+    """ Content-addressed files never change under their name. """
+    return CONTENT_ADDRESSED.match(path.name) is not None
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    "bytes=0-99,200-,-50" -> sorted, merged [(start, end inclusive)] within a file of `size` bytes.
+    None when the header is malformed or asks for more than MAX_RANGES pieces (the full file is
+    sent instead); raises RangeNotSatisfiable when no range overlaps the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(","):
+        first, dash, last = part.strip().partition("-")
+        first, last = first.strip(), last.strip()
+        if not dash or not (first.isdigit() or first == "") or not (last.isdigit() or last == "") or first == last == "":
+            return None
+        if first == "":  # suffix: the last N bytes
+            if int(last) == 0:
+                continue
+            ranges.append((max(0, size - int(last)), size - 1))
+        else:
+            start = int(first)
+            end = size - 1 if last == "" else min(int(last), size - 1)
+            if last != "" and int(last) < start:
+                return None
+            if start < size:
+                ranges.append((start, end))
+    if not ranges:
+        raise RangeNotSatisfiable()
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged if len(merged) <= MAX_RANGES else None
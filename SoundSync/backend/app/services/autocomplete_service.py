@@ -0,0 +1,357 @@
+# services/autocomplete_service.py
+# Typeahead over track titles, artist usernames, album titles and genre names, answered from
+# memory (no MongoDB query per keystroke).
+# Every label is folded (see search_service.fold) and stored once per word start, in one sorted
+# array: "Chanson Française" is found by "chan" and by "fran". A prefix is the contiguous range
+# [bisect(prefix), bisect(prefix + max char)) of that array.
+# Prefixes whose range is wider than SCAN_LIMIT keys (the short, most typed ones) keep their
+# top-k per type, updated in place on writes (the per-node top-k of a trie); narrower ranges are
+# scanned, with an LRU memo cleared on writes.
+# Built at startup in a background thread and kept current by the CRUD write hooks.
+
+from app.core import events
+from app.db.mongo import get_mongo_database
+from app.services.search_service import fold
+from array import array
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+
+MC = get_mongo_database()
+
+# collection -> (label field, weight fields summed, type boost)
+SOURCES: Dict[str, Tuple[str, Tuple[str, ...], float]] = {
+    "tracks": ("title", ("popularity", "like_count", "play_count"), 0.0),
+    "artists": ("username", (), 100.0),
+    "albums": ("title", ("like_count",), 20.0),
+    "genres": ("name", (), 100.0),
+}
+TYPES = list(SOURCES)
+
+BUILD_ON_STARTUP = os.getenv("AUTOCOMPLETE_ON_STARTUP", "1") == "1"
+MAX_WORD_STARTS = 4      # keys per label: the label itself + up to 3 later word starts
+MAX_LIMIT = 20
+SCAN_LIMIT = 2000        # wider prefix ranges answer from a maintained top-k
+TOP_K = 32               # kept per (wide prefix, type); rescanned when it falls below MAX_LIMIT
+MEMO_SIZE = 10000
+_WORD = re.compile(r"\w+")
+_END = "\U0010ffff"
+
+
+def label_keys(label: str) -> List[str]:
+    folded = fold(label).strip()
+    starts = [m.start() for m in _WORD.finditer(folded)][:MAX_WORD_STARTS]
+    if not starts or starts[0] != 0:
+        starts = [0] + starts[:MAX_WORD_STARTS - 1]
+    return list(dict.fromkeys(folded[i:] for i in starts if folded[i:]))
+
+def _prefixes(keys: Iterable[str]) -> set:
+    return {key[:n] for key in keys for n in range(1, len(key) + 1)}
+
+def weight_of(collection: str, doc: Dict[str, Any]) -> float:
+    _, fields, boost = SOURCES[collection]
+    total = boost
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, (int, float)):
+            total += value
+    return total
+
+
+class PrefixIndex:
+    """ Sorted (key, entry) arrays plus per-entry columns; removed entries' slots are reused. """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: List[str] = []
+        self._refs = array("I")                     # parallel to _keys: entry number
+        self._labels: List[Optional[str]] = []      # entry number -> label (None = free slot)
+        self._ids: List[Optional[str]] = []
+        self._types = array("B")
+        self._weights = array("f")
+        self._free: List[int] = []
+        self._entries: Dict[Tuple[int, str], int] = {}   # (type, _id) -> entry number
+        self._top: Dict[str, Dict[int, list]] = {}       # wide prefix -> {type: [complete, entry numbers by rank]}
+        self._memo: "OrderedDict[Tuple, List[int]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _rank(self, number: int) -> Tuple:
+        """ Heaviest first, then shortest label, then alphabetical. """
+        return (-self._weights[number], len(self._labels[number]), self._labels[number], number)
+
+    def add(self, collection: str, doc_id: str, label: Any, weight: float):
+        """ Insert or replace the entry of a document. """
+        if not isinstance(label, str) or not label.strip():
+            self.remove(collection, doc_id)
+            return
+        type_ = TYPES.index(collection)
+        keys = label_keys(label)
+        with self._lock:
+            self._remove(type_, doc_id)
+            if self._free:
+                number = self._free.pop()
+                self._labels[number], self._ids[number] = label, doc_id
+                self._types[number], self._weights[number] = type_, weight
+            else:
+                number = len(self._labels)
+                self._labels.append(label)
+                self._ids.append(doc_id)
+                self._types.append(type_)
+                self._weights.append(weight)
+            self._entries[(type_, doc_id)] = number
+            for key in keys:
+                pos = bisect_left(self._keys, key)
+                self._keys.insert(pos, key)
+                self._refs.insert(pos, number)
+            rank = self._rank(number)
+            for prefix in _prefixes(keys):
+                top = self._top.get(prefix, {}).get(type_)
+                if top is None or not top[0] and rank > self._rank(top[1][-1]):
+                    continue  # not maintained, or ranks below a truncated top-k
+                insort(top[1], number, key=self._rank)
+                if len(top[1]) > TOP_K:
+                    top[1].pop()
+                    top[0] = False
+            self._memo.clear()
+
+    def remove(self, collection: str, doc_id: str):
+        with self._lock:
+            self._remove(TYPES.index(collection), doc_id)
+
+    def _remove(self, type_: int, doc_id: str):
+        number = self._entries.pop((type_, doc_id), None)
+        if number is None:
+            return
+        keys = label_keys(self._labels[number])
+        for prefix in _prefixes(keys):
+            by_type = self._top.get(prefix, {})
+            top = by_type.get(type_)
+            if top is not None and number in top[1]:
+                top[1].remove(number)
+                if not top[0] and len(top[1]) < MAX_LIMIT:
+                    del by_type[type_]  # rescanned on next use
+        for key in keys:
+            pos = bisect_left(self._keys, key)
+            while pos < len(self._keys) and self._keys[pos] == key:
+                if self._refs[pos] == number:
+                    del self._keys[pos]
+                    del self._refs[pos]
+                    break
+                pos += 1
+        self._labels[number] = self._ids[number] = None
+        self._free.append(number)
+        self._memo.clear()
+
+    # ---------- Bulk build ----------
+    def bulk_load(self, rows: Iterable[Tuple[str, str, Any, float]]):
+        """ Build from (collection, _id, label, weight) rows with a single sort (empty index only). """
+        pairs = []
+        for collection, doc_id, label, weight in rows:
+            if not isinstance(label, str) or not label.strip():
+                continue
+            number = len(self._labels)
+            self._labels.append(label)
+            self._ids.append(doc_id)
+            self._types.append(TYPES.index(collection))
+            self._weights.append(weight)
+            self._entries[(TYPES.index(collection), doc_id)] = number
+            pairs += [(key, number) for key in label_keys(label)]
+        pairs.sort()
+        self._keys = [key for key, _ in pairs]
+        self._refs = array("I", (number for _, number in pairs))
+        del pairs
+        if self._keys:
+            self._build_tops()
+
+    def _build_tops(self):
+        """
+        Top-k of every prefix wider than SCAN_LIMIT, walking down from the first characters.
+        Entries are ranked once globally, so a prefix's top-k is a NumPy partition of the
+        global ranks of its range.
+        """
+        order = np.array(sorted(range(len(self._labels)), key=self._rank), dtype=np.uint32)
+        rank_of = np.empty(len(order), dtype=np.uint32)
+        rank_of[order] = np.arange(len(order), dtype=np.uint32)
+        key_ranks = rank_of[np.frombuffer(self._refs, dtype=np.uint32)]
+        type_by_rank = np.frombuffer(self._types, dtype=np.uint8)[order]
+
+        def top_of(prefix: str, lo: int, hi: int):
+            ranks = key_ranks[lo:hi]
+            types = type_by_rank[ranks]
+            by_type = {}
+            for type_ in range(len(TYPES)):
+                mine = ranks[types == type_]
+                k = (TOP_K + 1) * MAX_WORD_STARTS  # an entry appears at most MAX_WORD_STARTS times
+                whole = len(mine) <= k
+                best = np.unique(mine if whole else np.partition(mine, k - 1)[:k])
+                by_type[type_] = [whole and len(best) <= TOP_K, order[best[:TOP_K]].tolist()]
+            self._top[prefix] = by_type
+
+        keys, frontier = self._keys, [("", 0, len(self._keys))]
+        while frontier:
+            parent, lo, hi = frontier.pop()
+            depth, pos = len(parent) + 1, lo
+            while pos < hi:
+                if len(keys[pos]) < depth:  # the parent prefix itself
+                    pos += 1
+                    continue
+                prefix = keys[pos][:depth]
+                end = bisect_left(keys, prefix + _END, pos, hi)
+                if end - pos > SCAN_LIMIT:
+                    top_of(prefix, pos, end)
+                    frontier.append((prefix, pos, end))
+                pos = end
+
+    # ---------- Query ----------
+    def _bounds(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect_left(self._keys, prefix)
+        return lo, bisect_left(self._keys, prefix + _END, lo)
+
+    def _scan_top(self, prefix: str, lo: int, hi: int) -> Dict[int, list]:
+        """ Top-k per type of a wide prefix not (or no longer) maintained, from one scan. """
+        candidates = {type_: set() for type_ in range(len(TYPES))}
+        for number in self._refs[lo:hi]:
+            candidates[self._types[number]].add(number)
+        self._top[prefix] = {
+            type_: [len(numbers) <= TOP_K, heapq.nsmallest(TOP_K, numbers, key=self._rank)]
+            for type_, numbers in candidates.items()
+        }
+        return self._top[prefix]
+
+    def complete(self, prefix: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """ Top `limit` entries by weight whose label has a word starting with `prefix`. """
+        prefix = fold(prefix).lstrip()
+        if not prefix:
+            return []
+        limit = min(limit, MAX_LIMIT)
+        type_set = frozenset(TYPES.index(t) for t in types) if types else None
+        wanted = sorted(type_set) if type_set is not None else range(len(TYPES))
+        with self._lock:
+            by_type = self._top.get(prefix)
+            if by_type is None or any(t not in by_type for t in wanted):
+                lo, hi = self._bounds(prefix)
+                if by_type is not None or hi - lo > SCAN_LIMIT:
+                    by_type = self._scan_top(prefix, lo, hi)
+            if by_type is not None:
+                ranked = heapq.merge(*(by_type[t][1] for t in wanted), key=self._rank)
+                numbers = [number for number, _ in zip(ranked, range(limit))]
+            else:
+                memo_key = (prefix, limit, type_set)
+                numbers = self._memo.get(memo_key)
+                if numbers is None:
+                    candidates = set(self._refs[lo:hi])  # a label can match through several word starts
+                    if type_set is not None:
+                        candidates = {n for n in candidates if self._types[n] in type_set}
+                    numbers = heapq.nsmallest(limit, candidates, key=self._rank)
+                    self._memo[memo_key] = numbers
+                    if len(self._memo) > MEMO_SIZE:
+                        self._memo.popitem(last=False)
+                else:
+                    self._memo.move_to_end(memo_key)
+            return [{"type": TYPES[self._types[n]], "id": self._ids[n], "label": self._labels[n],
+                     "weight": self._weights[n]} for n in numbers]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            live = [label for label in self._labels if label is not None]
+            approx_bytes = (
+                sys.getsizeof(self._keys) + sum(sys.getsizeof(k) for k in self._keys)
+                + self._refs.buffer_info()[1] * self._refs.itemsize
+                + sys.getsizeof(self._labels) + sum(sys.getsizeof(label) for label in live)
+                + sys.getsizeof(self._ids) + sum(sys.getsizeof(i) for i in self._ids if i is not None)
+                + len(self._types) + self._weights.buffer_info()[1] * self._weights.itemsize
+                + sys.getsizeof(self._entries) + sys.getsizeof(self._memo) + sys.getsizeof(self._top)
+                + sum(sys.getsizeof(top[1]) for by_type in self._top.values() for top in by_type.values())
+            )
+            counts = {t: 0 for t in TYPES}
+            for type_, _ in self._entries:
+                counts[TYPES[type_]] += 1
+            return {"entries": len(self._entries), "keys": len(self._keys), "by_type": counts,
+                    "top_k_prefixes": len(self._top), "memoized_prefixes": len(self._memo),
+                    "approx_bytes": approx_bytes}
+
+
+INDEX = PrefixIndex()
+STATE = {"ready": False, "building": False, "built_at": None, "build_seconds": None}
+
+_build_lock = threading.Lock()
+_swap_lock = threading.Lock()
+_pending: Optional[List[Tuple[str, str, str, Optional[Dict[str, Any]]]]] = None
+
+
+# ---------- Build ----------
+def _rows():
+    for collection, (label_field, weight_fields, _) in SOURCES.items():
+        projection = {field: 1 for field in (label_field, *weight_fields)}
+        for doc in MC[collection].find({}, projection, batch_size=5000):
+            yield collection, str(doc["_id"]), doc.get(label_field), weight_of(collection, doc)
+
+def rebuild() -> Dict[str, Any]:
+    """ Build a fresh index from MongoDB and swap it in; writes arriving meanwhile are replayed. """
+    global INDEX, _pending
+    with _build_lock:
+        STATE["building"] = True
+        start = time.perf_counter()
+        try:
+            with _swap_lock:
+                _pending = []
+            index = PrefixIndex()
+            index.bulk_load(_rows())
+            with _swap_lock:
+                for collection, op, doc_id, doc in _pending:
+                    _apply(index, collection, op, doc_id, doc)
+                INDEX, _pending = index, None
+            STATE.update(ready=True, built_at=time.time(), build_seconds=round(time.perf_counter() - start, 3))
+            print(f"[autocomplete] {len(index)} entries indexed")
+        finally:
+            STATE["building"] = False
+            with _swap_lock:
+                _pending = None
+    return stats()
+
+def start_background_build():
+    if BUILD_ON_STARTUP and not STATE["building"]:
+        threading.Thread(target=rebuild, name="autocomplete-build", daemon=True).start()
+
+
+# ---------- Write hook ----------
+def _apply(index: PrefixIndex, collection: str, op: str, doc_id: str, doc: Optional[Dict[str, Any]]):
+    if op == "delete" or doc is None:
+        index.remove(collection, doc_id)
+    else:
+        index.add(collection, doc_id, doc.get(SOURCES[collection][0]), weight_of(collection, doc))
+
+async def on_write(collection: str, op: str, doc_id: str, document: Optional[Dict[str, Any]]):
+    """ Keep the index current (registered as a write hook). Updates re-read the document. """
+    source = SOURCES.get(collection)
+    if source is None:
+        return
+    if op == "update":
+        if not set(document or {}) & {source[0], *source[1]}:
+            return
+        from app.db import async_crud
+        document = await async_crud.get_one_by_field(collection, "_id", doc_id)
+        op = "insert" if document else "delete"
+    with _swap_lock:
+        if _pending is not None:
+            _pending.append((collection, op, doc_id, document))
+        _apply(INDEX, collection, op, doc_id, document)
+
+events.register_write_hook(on_write)
+
+
+def complete(prefix: str, limit: int = 10, types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    return INDEX.complete(prefix, limit, types)
+
+def stats() -> Dict[str, Any]:
+    return {**STATE, **INDEX.stats()}
@@ -0,0 +1,181 @@
+# services/charts_service.py
+# Real-time top charts (global, per genre, per artist) in Redis sorted sets, fed by like and
+# play events (write hooks on likes / plays, and record() for the play event ingestion).
+#
+# Every window ("day", "week") is split in time buckets, one ZSET per (window, scope, bucket):
+# an event adds weight * 2^((t - bucket start) / half_life) to its track in the current bucket
+# (forward decay: the exponent stays small since the landmark is the bucket start).
+# A chart is the ZUNIONSTORE of the window's live buckets, each weighted by
+# 2^(-(now - bucket start) / half_life), i.e. every event counts weight * 2^(-age / half_life),
+# over a window sliding one bucket at a time. Buckets expire on their own (TTL).
+# The union is kept VIEW_TTL seconds, so a top-N request is one ZREVRANGE.
+# A background thread snapshots the top SNAPSHOT_SIZE of every chart to MongoDB
+# (chart_snapshots) every SNAPSHOT_INTERVAL seconds, once across workers (Redis lock).
+
+from app.core import events
+from app.db import async_crud
+from app.db.mongo import get_mongo_database
+from app.db.redis import get_redis_client, get_async_redis_client
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import os
+import threading
+import time
+
+REDIS = get_redis_client()
+MC = get_mongo_database()
+
+WINDOWS: Dict[str, Dict[str, int]] = {
+    "day": {"bucket": 3600, "buckets": 24, "half_life": 6 * 3600},
+    "week": {"bucket": 86400, "buckets": 7, "half_life": 2 * 86400},
+}
+WEIGHTS = {"play": 1.0, "like": 3.0}
+PREFIX = "charts"
+VIEW_TTL = int(os.getenv("CHARTS_VIEW_TTL", "30"))
+MAX_LIMIT = 100
+SNAPSHOT_INTERVAL = float(os.getenv("CHARTS_SNAPSHOT_INTERVAL", "3600"))  # 0 = never
+SNAPSHOT_SIZE = 100
+SNAPSHOT_COLLECTION = "chart_snapshots"
+
+_snapshot_thread: Optional[threading.Thread] = None
+_stop = threading.Event()
+
+
+# ---------- Keys ----------
+def scope_key(kind: str, value: Any = None) -> str:
+    """ "global", "genre:Jazz", "artist:artist1". """
+    return kind if kind == "global" else f"{kind}:{value}"
+
+def _scopes(track: Dict[str, Any]) -> List[str]:
+    scopes = ["global"]
+    if track.get("genre"):
+        scopes.append(scope_key("genre", track["genre"]))
+    if track.get("artist_id"):
+        scopes.append(scope_key("artist", track["artist_id"]))
+    return scopes
+
+def _bucket_key(window: str, scope: str, bucket: int) -> str:
+    return f"{PREFIX}:{window}:{scope}:{bucket}"
+
+def _view_key(window: str, scope: str) -> str:
+    return f"{PREFIX}:view:{window}:{scope}"
+
+def _union(window: str, scope: str, now: float) -> Tuple[List[str], List[float]]:
+    """ Live bucket keys of a chart and their decay weights at `now`. """
+    spec = WINDOWS[window]
+    current = int(now // spec["bucket"])
+    buckets = range(current - spec["buckets"] + 1, current + 1)
+    keys = [_bucket_key(window, scope, b) for b in buckets]
+    weights = [2 ** (-(now - b * spec["bucket"]) / spec["half_life"]) for b in buckets]
+    return keys, weights
+
+
+# ---------- Record ----------
+async def record(items: Iterable[Tuple[str, str, Optional[float]]]) -> int:
+    """
+    Add (track_id, kind, timestamp or None for now) events to every chart of the track
+    (kind: a key of WEIGHTS). Track genre / artist come from the per-document cache.
+    One pipeline for the whole batch; returns the number of events counted.
+    """
+    items = [(str(t), kind, ts) for t, kind, ts in items if t is not None and kind in WEIGHTS]
+    if not items:
+        return 0
+    tracks = await async_crud.documents_by_ids("tracks", list({t for t, _, _ in items}))
+    pipe = get_async_redis_client().pipeline(transaction=False)
+    counted, scopes = 0, set()
+    now = time.time()
+    for track_id, kind, ts in items:
+        track = tracks.get(track_id)
+        if track is None:
+            continue
+        ts = now if ts is None else ts
+        counted += 1
+        for scope in _scopes(track):
+            scopes.add(scope)
+            for window, spec in WINDOWS.items():
+                bucket = int(ts // spec["bucket"])
+                if now - bucket * spec["bucket"] >= spec["bucket"] * spec["buckets"]:
+                    continue  # already out of the window
+                key = _bucket_key(window, scope, bucket)
+                pipe.zincrby(key, WEIGHTS[kind] * 2 ** ((ts - bucket * spec["bucket"]) / spec["half_life"]), track_id)
+                pipe.expireat(key, (bucket + spec["buckets"]) * spec["bucket"] + 60)
+    if counted:
+        pipe.sadd(f"{PREFIX}:scopes", *scopes)
+        await pipe.execute()
+    return counted
+
+async def on_write(collection: str, op: str, doc_id: str, document: Optional[Dict[str, Any]]):
+    """ Likes of tracks and plays count when they are created (unlikes do not rewind a chart). """
+    if op != "insert" or not isinstance(document, dict):
+        return
+    if collection == "likes" and document.get("target_type") == "track":
+        await record([(document.get("target_id"), "like", None)])
+    elif collection == "plays":
+        await record([(document.get("track_id"), "play", None)])
+
+events.register_write_hook(on_write)
+
+
+# ---------- Read ----------
+def _top_result(window: str, scope: str, rows) -> Dict[str, Any]:
+    return {"window": window, "scope": scope,
+            "items": [{"track_id": m.decode() if isinstance(m, bytes) else m, "score": round(s, 4)} for m, s in rows]}
+
+async def top(window: str, scope: str = "global", limit: int = 20, now: Optional[float] = None) -> Dict[str, Any]:
+    """ Top `limit` tracks of a chart, read from the sorted sets only. """
+    client = get_async_redis_client()
+    view = _view_key(window, scope)
+    if now is not None or not await client.exists(view):
+        keys, weights = _union(window, scope, time.time() if now is None else now)
+        pipe = client.pipeline(transaction=False)
+        pipe.zunionstore(view, dict(zip(keys, weights)))
+        pipe.expire(view, VIEW_TTL)
+        await pipe.execute()
+    return _top_result(window, scope, await client.zrevrange(view, 0, limit - 1, withscores=True))
+
+def top_sync(window: str, scope: str = "global", limit: int = 20) -> Dict[str, Any]:
+    keys, weights = _union(window, scope, time.time())
+    view = _view_key(window, scope)
+    pipe = REDIS.pipeline(transaction=False)
+    pipe.zunionstore(view, dict(zip(keys, weights)))
+    pipe.expire(view, VIEW_TTL)
+    pipe.zrevrange(view, 0, limit - 1, withscores=True)
+    return _top_result(window, scope, pipe.execute()[-1])
+
+
+# ---------- Snapshots ----------
+def snapshot() -> Dict[str, int]:
+    """ Store the current top SNAPSHOT_SIZE of every chart seen so far in chart_snapshots. """
+    taken_at = time.time()
+    documents = []
+    for scope in sorted(m.decode() for m in REDIS.sscan_iter(f"{PREFIX}:scopes")):
+        for window in WINDOWS:
+            chart = top_sync(window, scope, SNAPSHOT_SIZE)
+            if chart["items"]:
+                documents.append({**chart, "taken_at": taken_at})
+            elif window == "week":
+                REDIS.srem(f"{PREFIX}:scopes", scope)  # nothing left in its longest window
+    if documents:
+        MC[SNAPSHOT_COLLECTION].insert_many(documents)
+    print(f"[charts] snapshot: {len(documents)} charts")
+    return {"charts": len(documents), "taken_at": taken_at}
+
+def _snapshotter():
+    while not _stop.wait(SNAPSHOT_INTERVAL):
+        try:
+            # One worker per interval
+            if REDIS.set(f"{PREFIX}:snapshot:lock", 1, nx=True, ex=max(1, int(SNAPSHOT_INTERVAL) - 1)):
+                snapshot()
+        except Exception as e:
+            print(f"[charts] snapshot failed: {e}")
+
+def start_snapshotter():
+    global _snapshot_thread
+    if SNAPSHOT_INTERVAL and _snapshot_thread is None:
+        _stop.clear()
+        _snapshot_thread = threading.Thread(target=_snapshotter, name="charts-snapshot", daemon=True)
+        _snapshot_thread.start()
+
+def stop_snapshotter():
+    global _snapshot_thread
+    _stop.set()
+    _snapshot_thread = None
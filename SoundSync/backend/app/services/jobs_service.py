@@ -0,0 +1,466 @@
+# services/jobs_service.py
+# Background jobs for heavy admin operations (seeding, cleaning, reindexing, cache warming,
+# counter / index reconciliation): the route only queues the job and answers 202 with its id,
+# GET /jobs/{id} reports status and progress.
+#
+# Queue and job state live in Redis, shared by every API process:
+#   jobs:queue               LIST of queued ids (LPUSH, taken from the right: FIFO)
+#   jobs:running:<worker>    LIST holding the job a worker thread is running. BLMOVE takes it from
+#                            the queue atomically, so the job of a worker that died stays there and
+#                            is requeued once that process' heartbeat expired (MAX_ATTEMPTS runs).
+#   jobs:<id>                HASH kind, params, status (queued, running, succeeded, failed),
+#                            progress (0-1), message, result / error, timestamps; kept JOB_TTL
+#   jobs:recent              ZSET id -> created_at, for the listing
+#   jobs:active:<kind>:<h>   id of the queued / running job of that kind with the same params:
+#                            submitting it again returns that job instead of queueing a second one
+#   jobs:instance:<id>       heartbeat of a process running workers
+#   jobs:exclusive:queue     LIST of queued ids of the exclusive kinds (below)
+#   jobs:exclusive:lock      worker holding the exclusive lane (lease renewed by its heartbeat)
+# Each process runs CONCURRENCY worker threads (JOBS_CONCURRENCY, 0 = queue only): at most that
+# many jobs run in it at once, whatever is queued.
+# Kinds registered with exclusive=True (the ones rewriting whole collections: init_db, clean_db,
+# recount, reconcile_indexes) go through a separate lane: each process has one more worker for
+# it, which only takes a job while holding the lock. So they run one at a time across all
+# processes, in submission order ("clean_db" then "init_db" ends with the seed data loaded).
+#
+# The search, autocomplete and recommendation indexes live in every process: "reindex" rebuilds
+# the process running the job and asks the others to do the same over BROADCAST_CHANNEL.
+
+from app.db import cache, counters, crud
+from app.db.indexes import reconcile_indexes
+from app.db.mongo import get_mongo_database
+from app.db.redis import get_redis_client
+from typing import Any, Callable, Dict, Iterable, List, Optional
+import hashlib
+import inspect
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+REDIS = get_redis_client()
+MC = get_mongo_database()
+
+PREFIX = "jobs"
+QUEUE = f"{PREFIX}:queue"
+EXCLUSIVE_QUEUE = f"{PREFIX}:exclusive:queue"
+EXCLUSIVE_LOCK = f"{PREFIX}:exclusive:lock"
+RECENT = f"{PREFIX}:recent"
+BROADCAST_CHANNEL = f"{PREFIX}:broadcast"
+CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+JOB_TTL = 7 * 86400
+RECENT_SIZE = 1000
+HEARTBEAT_TTL = 30
+POLL_TIMEOUT = 1  # seconds a worker waits on the queue between shutdown checks
+MAX_ATTEMPTS = 3
+ACTIVE = ("queued", "running")
+
+INSTANCE = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+JOBS: Dict[str, Callable[..., Any]] = {}
+EXCLUSIVE: set = set()  # kinds run one at a time, in order, across processes
+STATS = {"run": 0, "succeeded": 0, "failed": 0, "requeued": 0}
+
+_threads: List[threading.Thread] = []
+_stop = threading.Event()
+_listener = None
+
+
+class UnknownJob(LookupError):
+    pass
+
+class JobError(ValueError):
+    """ Invalid job parameters (raised by submit() and by job functions refusing their input). """
+
+
+def job(kind: str, exclusive: bool = False):
+    """
+    Register fn(ctx, **params) as job `kind`; its return value (JSON) is the job result.
+    exclusive: run through the exclusive lane (see above).
+    """
+    def register(fn):
+        JOBS[kind] = fn
+        if exclusive:
+            EXCLUSIVE.add(kind)
+        return fn
+    return register
+
+
+class JobContext:
+    """ Passed to the job function as its first argument. """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    def progress(self, fraction: float, message: Optional[str] = None):
+        fields: Dict[str, Any] = {"progress": round(min(max(fraction, 0.0), 1.0), 4)}
+        if message is not None:
+            fields["message"] = message
+        REDIS.hset(_job_key(self.job_id), mapping=fields)
+
+
+# ---------- Keys ----------
+def _job_key(job_id: str) -> str:
+    return f"{PREFIX}:{job_id}"
+
+def _running_key(worker: str) -> str:
+    return f"{PREFIX}:running:{worker}"
+
+def _heartbeat_key(instance: str) -> str:
+    return f"{PREFIX}:instance:{instance}"
+
+def _queue(kind: str) -> str:
+    return EXCLUSIVE_QUEUE if kind in EXCLUSIVE else QUEUE
+
+def _active_key(kind: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{PREFIX}:active:{kind}:{digest}"
+
+
+# ---------- Submit / read ----------
+def _decode(raw: Dict[bytes, bytes]) -> Dict[str, Any]:
+    doc = {k.decode(): v.decode() for k, v in raw.items()}
+    for field in ("params", "result"):
+        if field in doc:
+            doc[field] = json.loads(doc[field])
+    for field in ("progress", "created_at", "started_at", "finished_at", "seconds"):
+        if field in doc:
+            doc[field] = float(doc[field])
+    doc["attempts"] = int(doc.get("attempts", 0))
+    doc.pop("active", None)
+    return doc
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    raw = REDIS.hgetall(_job_key(job_id))
+    return _decode(raw) if raw else None
+
+def list_jobs(limit: int = 50) -> List[Dict[str, Any]]:
+    """ Most recent jobs first. """
+    ids = [i.decode() for i in REDIS.zrevrange(RECENT, 0, limit - 1)]
+    pipe = REDIS.pipeline(transaction=False)
+    for job_id in ids:
+        pipe.hgetall(_job_key(job_id))
+    return [_decode(raw) for raw in pipe.execute() if raw]
+
+def depth() -> int:
+    return REDIS.llen(QUEUE) + REDIS.llen(EXCLUSIVE_QUEUE)
+
+def submit(kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Queue a job and return its document. The same kind and params already queued or running
+    returns that job ("deduplicated": true). Raises UnknownJob, or JobError for bad params.
+    """
+    fn = JOBS.get(kind)
+    if fn is None:
+        raise UnknownJob(f"Unknown job '{kind}'")
+    params = params or {}
+    try:
+        inspect.signature(fn).bind(None, **params)
+    except TypeError as e:
+        raise JobError(f"Invalid parameters for '{kind}': {e}")
+
+    active = _active_key(kind, params)
+    job_id = uuid.uuid4().hex
+    if not REDIS.set(active, job_id, nx=True, ex=JOB_TTL):
+        current = REDIS.get(active)
+        existing = get(current.decode()) if current else None
+        if existing and existing["status"] in ACTIVE:
+            return {**existing, "deduplicated": True}
+        REDIS.set(active, job_id, ex=JOB_TTL)  # leftover of a job that never finished cleanly
+    now = time.time()
+    pipe = REDIS.pipeline()
+    pipe.hset(_job_key(job_id), mapping={
+        "id": job_id, "kind": kind, "params": json.dumps(params, default=str), "status": "queued",
+        "progress": 0, "message": "", "created_at": now, "attempts": 0, "active": active,
+    })
+    pipe.zadd(RECENT, {job_id: now})
+    pipe.zremrangebyrank(RECENT, 0, -RECENT_SIZE - 1)
+    pipe.lpush(_queue(kind), job_id)
+    pipe.execute()
+    print(f"[jobs] queued {kind} {job_id} {params}")
+    return get(job_id)
+
+
+# ---------- Run ----------
+def run(job_id: str, worker: str = INSTANCE) -> Optional[Dict[str, Any]]:
+    """ Run a queued job in the calling thread and store its outcome. """
+    key = _job_key(job_id)
+    doc = get(job_id)
+    if doc is None or doc["status"] != "queued":
+        return doc  # expired, or already taken
+    active = REDIS.hget(key, "active")
+    REDIS.hset(key, mapping={"status": "running", "started_at": time.time(), "worker": worker,
+                             "attempts": doc["attempts"] + 1})
+    STATS["run"] += 1
+    start = time.perf_counter()
+    try:
+        fn = JOBS.get(doc["kind"])
+        if fn is None:
+            raise UnknownJob(f"Unknown job '{doc['kind']}' (not registered in this process)")
+        result = fn(JobContext(job_id), **doc["params"])
+        fields = {"status": "succeeded", "progress": 1, "result": json.dumps(result, default=str)}
+        STATS["succeeded"] += 1
+    except Exception as e:
+        fields = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+        STATS["failed"] += 1
+    seconds = round(time.perf_counter() - start, 3)
+    fields.update(finished_at=time.time(), seconds=seconds)
+    pipe = REDIS.pipeline()
+    pipe.hset(key, mapping=fields)
+    pipe.expire(key, JOB_TTL)
+    if active and REDIS.get(active) == job_id.encode():
+        pipe.delete(active)
+    pipe.execute()
+    print(f"[jobs] {doc['kind']} {job_id} {fields['status']} in {seconds}s {fields.get('error', '')}")
+    return get(job_id)
+
+def _worker(worker: str):
+    running = _running_key(worker)
+    while not _stop.is_set():
+        try:
+            job_id = REDIS.blmove(QUEUE, running, POLL_TIMEOUT, "RIGHT", "LEFT")
+        except Exception as e:
+            print(f"[jobs] {worker}: queue unavailable: {e}")
+            _stop.wait(POLL_TIMEOUT)
+            continue
+        if job_id is None:
+            continue
+        try:
+            run(job_id.decode(), worker)
+        finally:
+            REDIS.lrem(running, 1, job_id)
+
+def _exclusive_worker(worker: str):
+    """ Takes the exclusive jobs one at a time, only while holding EXCLUSIVE_LOCK. """
+    running = _running_key(worker)
+    while not _stop.is_set():
+        try:
+            if not REDIS.set(EXCLUSIVE_LOCK, worker, nx=True, ex=HEARTBEAT_TTL):
+                _stop.wait(POLL_TIMEOUT)
+                continue
+            try:
+                job_id = REDIS.blmove(EXCLUSIVE_QUEUE, running, POLL_TIMEOUT, "RIGHT", "LEFT")
+                if job_id is not None:
+                    try:
+                        run(job_id.decode(), worker)
+                    finally:
+                        REDIS.lrem(running, 1, job_id)
+            finally:
+                if REDIS.get(EXCLUSIVE_LOCK) == worker.encode():
+                    REDIS.delete(EXCLUSIVE_LOCK)
+        except Exception as e:
+            print(f"[jobs] {worker}: exclusive queue unavailable: {e}")
+            _stop.wait(POLL_TIMEOUT)
+
+def recover() -> int:
+    """ Requeue the jobs held by workers whose process stopped sending heartbeats. """
+    if not REDIS.set(f"{PREFIX}:recovering", INSTANCE, nx=True, ex=HEARTBEAT_TTL):
+        return 0  # another process is at it
+    requeued = 0
+    for running in REDIS.scan_iter(f"{PREFIX}:running:*"):
+        instance = running.decode()[len(f"{PREFIX}:running:"):].rsplit(":", 1)[0]
+        if REDIS.exists(_heartbeat_key(instance)):
+            continue
+        while (raw := REDIS.lindex(running, -1)) is not None:
+            job_id = raw.decode()
+            doc = get(job_id)
+            if doc and doc["attempts"] >= MAX_ATTEMPTS:
+                REDIS.hset(_job_key(job_id), mapping={"status": "failed", "finished_at": time.time(),
+                                                      "error": f"worker died {doc['attempts']} times"})
+                REDIS.lrem(running, 1, raw)
+            elif doc:
+                REDIS.hset(_job_key(job_id), mapping={"status": "queued", "message": "requeued (worker died)"})
+                if doc["kind"] in EXCLUSIVE:
+                    REDIS.lmove(running, EXCLUSIVE_QUEUE, "RIGHT", "RIGHT")  # first in line again
+                else:
+                    REDIS.lmove(running, QUEUE, "RIGHT", "LEFT")
+                requeued += 1
+            else:
+                REDIS.lrem(running, 1, raw)
+    REDIS.delete(f"{PREFIX}:recovering")
+    if requeued:
+        STATS["requeued"] += requeued
+        print(f"[jobs] requeued {requeued} jobs of stopped workers")
+    return requeued
+
+def _heartbeat():
+    while not _stop.is_set():
+        try:
+            REDIS.set(_heartbeat_key(INSTANCE), 1, ex=HEARTBEAT_TTL)
+            holder = REDIS.get(EXCLUSIVE_LOCK)
+            if holder and holder.decode().startswith(f"{INSTANCE}:"):
+                REDIS.expire(EXCLUSIVE_LOCK, HEARTBEAT_TTL)  # a long exclusive job keeps the lane
+            recover()
+        except Exception as e:
+            print(f"[jobs] heartbeat failed: {e}")
+        _stop.wait(HEARTBEAT_TTL / 3)
+
+def start_workers():
+    """ Broadcast listener (always), CONCURRENCY worker threads and the exclusive lane worker (idempotent). """
+    global _listener
+    if _listener is None:
+        pubsub = REDIS.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{BROADCAST_CHANNEL: _on_broadcast})
+        _listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+    if _threads or CONCURRENCY <= 0:
+        return
+    _stop.clear()
+    REDIS.set(_heartbeat_key(INSTANCE), 1, ex=HEARTBEAT_TTL)
+    targets = [("jobs-heartbeat", _heartbeat, ())]
+    targets += [(f"jobs-{n}", _worker, (f"{INSTANCE}:{n}",)) for n in range(CONCURRENCY)]
+    targets.append(("jobs-exclusive", _exclusive_worker, (f"{INSTANCE}:exclusive",)))
+    for name, target, args in targets:
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        _threads.append(thread)
+    print(f"[jobs] {CONCURRENCY} workers + exclusive lane started ({INSTANCE})")
+
+def stop_workers(timeout: float = 5.0):
+    """ Stop taking jobs; a job still running after `timeout` is requeued by another process. """
+    global _listener
+    _stop.set()
+    deadline = time.monotonic() + timeout
+    for thread in _threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+    if _threads and not any(t.is_alive() for t in _threads):
+        REDIS.delete(_heartbeat_key(INSTANCE))
+    _threads.clear()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def stats() -> Dict[str, Any]:
+    return {**STATS, "instance": INSTANCE, "concurrency": CONCURRENCY, "queued": depth(),
+            "kinds": sorted(JOBS), "exclusive": sorted(EXCLUSIVE)}
+
+
+# ---------- Per-process indexes ----------
+def _rebuilders() -> Dict[str, Callable[[], Dict[str, Any]]]:
+    from app.services import autocomplete_service, recommendation_service, search_service
+    return {"search": search_service.rebuild, "autocomplete": autocomplete_service.rebuild,
+            "recommendations": recommendation_service.rebuild}
+
+def rebuild_indexes(targets: Iterable[str], ctx: Optional[JobContext] = None, start: float = 0.0) -> Dict[str, Any]:
+    """ Rebuild `targets` here, then have every other process rebuild them too. """
+    rebuilders, targets = _rebuilders(), list(targets)
+    report = {}
+    for i, target in enumerate(targets):
+        if ctx:
+            ctx.progress(start + (1 - start) * i / len(targets), f"rebuilding {target}")
+        built = rebuilders[target]()
+        report[target] = {k: v for k, v in built.items() if not isinstance(v, (dict, list))}
+    REDIS.publish(BROADCAST_CHANNEL, json.dumps({"origin": INSTANCE, "reindex": targets}))
+    return report
+
+def _on_broadcast(message):
+    try:
+        data = json.loads(message["data"])
+    except (TypeError, ValueError):
+        return
+    if data.get("origin") == INSTANCE or not data.get("reindex"):
+        return
+    rebuilders = _rebuilders()
+
+    def rebuild():
+        for target in data["reindex"]:
+            if target in rebuilders:
+                try:
+                    rebuilders[target]()
+                except Exception as e:
+                    print(f"[jobs] broadcast rebuild of {target} failed: {e}")
+
+    threading.Thread(target=rebuild, name="jobs-reindex", daemon=True).start()
+
+
+# ---------- Jobs ----------
+INDEX_TARGETS = ("search", "autocomplete", "recommendations")
+WARM_COLLECTIONS = ("tracks", "artists", "albums", "playlists")
+WARM_SORT = {"tracks": [("popularity", -1), ("_id", -1)]}
+WARM_BATCH = 1000
+
+def _invalidate(collections: Iterable[str]):
+    for collection in collections:
+        cache.invalidate_collection(collection)
+
+@job("init_db", exclusive=True)
+def init_db(ctx: JobContext, collection: str = "ALL", batch_size: int = crud.DEFAULT_BATCH_SIZE,
+            workers: int = crud.DEFAULT_WORKERS, data_dir: Optional[str] = None):
+    """
+    Load the seed files (crud.init_database), retire the cached entries, rebuild the indexes.
+    data_dir: load the files of the same layout from there instead (generated data).
+    """
+    if collection != "ALL" and collection not in crud.PATHS:
+        raise JobError(f"Unknown seed collection '{collection}' (ALL or one of {sorted(crud.PATHS)})")
+    if data_dir is not None and not os.path.isdir(data_dir):
+        raise JobError(f"No data directory '{data_dir}'")
+    total = len(crud.PATHS) if collection == "ALL" else 1
+    loaded = []
+
+    def on_loaded(stats):
+        loaded.append(stats["collection"])
+        ctx.progress(0.6 * len(loaded) / total, f"loaded {stats['collection']}")
+
+    stats = crud.init_database(collection, batch_size=batch_size, workers=workers, on_loaded=on_loaded,
+                               data_dir=data_dir)
+    _invalidate(MC.list_collection_names())  # counters were recomputed on other collections too
+    return {"collections": stats, "reindexed": rebuild_indexes(INDEX_TARGETS, ctx, start=0.6)}
+
+@job("clean_db", exclusive=True)
+def clean_db(ctx: JobContext):
+    """ Drop every collection, retire their cached entries and empty the indexes. """
+    names = MC.list_collection_names()
+    dropped, errors = [], {}
+    for i, name in enumerate(names):
+        try:
+            MC.drop_collection(name)
+            dropped.append(name)
+            print(f"✓ Dropped collection: {name}")
+        except Exception as e:
+            errors[name] = str(e)
+            print(f"✗ Error dropping {name}: {e}")
+        ctx.progress(0.5 * (i + 1) / len(names), f"dropped {name}")
+    _invalidate(names)
+    return {"collections_dropped": dropped, "errors": errors,
+            "reindexed": rebuild_indexes(INDEX_TARGETS, ctx, start=0.5)}
+
+@job("reindex")
+def reindex(ctx: JobContext, targets: Optional[List[str]] = None):
+    """ Rebuild the in-memory indexes (search, autocomplete, recommendations) of every process. """
+    targets = list(targets or INDEX_TARGETS)
+    unknown = set(targets) - set(INDEX_TARGETS)
+    if unknown:
+        raise JobError(f"Unknown index {sorted(unknown)} (one of {list(INDEX_TARGETS)})")
+    return rebuild_indexes(targets, ctx)
+
+@job("warm_cache")
+def warm_cache(ctx: JobContext, collections: Optional[List[str]] = None, limit: int = 10000, ttl: int = 1800):
+    """ Pre-fill the per-document cache entries (/by/_id/{id}, documents_by_ids) of the first `limit` documents. """
+    collections = list(collections or WARM_COLLECTIONS)
+    report = {}
+    for i, collection in enumerate(collections):
+        pipe, warmed = REDIS.pipeline(transaction=False), 0
+        for doc in MC[collection].find({}, sort=WARM_SORT.get(collection), limit=limit, batch_size=WARM_BATCH):
+            doc = crud._to_str_id(doc)
+            pipe.setex(cache.collection_key(collection, "_id", doc["_id"]), ttl, cache.encode_value({"document": doc}))
+            warmed += 1
+            if warmed % WARM_BATCH == 0:
+                pipe.execute()
+                ctx.progress((i + warmed / limit) / len(collections), f"{collection}: {warmed}")
+        pipe.execute()
+        report[collection] = warmed
+        ctx.progress((i + 1) / len(collections), f"{collection}: {warmed}")
+    return {"warmed": report, "ttl": ttl}
+
+@job("recount", exclusive=True)
+def recount(ctx: JobContext, sources: Optional[List[str]] = None):
+    """ Recompute the denormalized counters (counters.reconcile_counters). """
+    report = counters.reconcile_counters(sources)
+    _invalidate({target for entry in report.values() for target in entry["targets"]})
+    return report
+
+@job("reconcile_indexes", exclusive=True)
+def reconcile_mongo_indexes(ctx: JobContext):
+    """ Create / drop the managed MongoDB indexes to match INDEX_SPECS. """
+    return reconcile_indexes(force=True)
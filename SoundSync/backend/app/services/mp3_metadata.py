@@ -0,0 +1,193 @@
+# services/mp3_metadata.py
+# Dependency-free MP3 inspection: ID3v2 / ID3v1 tags and MPEG audio frame headers.
+# Duration comes from the Xing / Info / VBRI header when the encoder wrote one, else from walking
+# every frame header (exact for CBR and VBR alike). Imports nothing from the app: it runs in the
+# analysis worker processes (see audio_analysis_service).
+
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+# kbps by (MPEG-1?, layer) ; index 0 = free format, 15 = invalid
+BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}  # by version bits
+TEXT_FRAMES = {"TIT2": "title", "TT2": "title", "TPE1": "artist", "TP1": "artist", "TALB": "album", "TAL": "album"}
+MAX_RESYNC = 64 * 1024  # garbage bytes skipped looking for the next frame
+
+
+class Frame:
+    __slots__ = ("mpeg1", "version", "layer", "bitrate", "sample_rate", "padding", "mono", "protected", "length", "samples")
+
+    def __init__(self, header: int):
+        self.version = (header >> 19) & 3
+        self.layer = 4 - ((header >> 17) & 3)
+        self.mpeg1 = self.version == 3
+        self.protected = not (header >> 16) & 1
+        self.bitrate = BITRATES[(self.mpeg1, self.layer)][(header >> 12) & 15] * 1000
+        self.sample_rate = SAMPLE_RATES[self.version][(header >> 10) & 3]
+        self.padding = (header >> 9) & 1
+        self.mono = (header >> 6) & 3 == 3
+        if self.layer == 1:
+            self.samples = 384
+            self.length = (12 * self.bitrate // self.sample_rate + self.padding) * 4
+        else:
+            self.samples = 1152 if self.mpeg1 or self.layer == 2 else 576
+            self.length = self.samples // 8 * self.bitrate // self.sample_rate + self.padding
+
+
+def parse_frame(data: bytes, pos: int) -> Optional[Frame]:
+    """ Frame whose header starts at pos, or None (no sync, reserved or free-format values). """
+    if pos + 4 > len(data):
+        return None
+    return _decode(int.from_bytes(data[pos:pos + 4], "big"))
+
+@lru_cache(maxsize=1024)  # a file repeats a handful of distinct headers thousands of times
+def _decode(header: int) -> Optional[Frame]:
+    if header >> 21 != 0x7FF:
+        return None
+    version, layer, bitrate, rate = (header >> 19) & 3, (header >> 17) & 3, (header >> 12) & 15, (header >> 10) & 3
+    if version == 1 or layer == 0 or bitrate in (0, 15) or rate == 3:
+        return None
+    return Frame(header)
+
+
+# ---------- Tags ----------
+def _syncsafe(b: bytes) -> int:
+    return (b[0] << 21) | (b[1] << 14) | (b[2] << 7) | b[3]
+
+def _text(payload: bytes) -> Optional[str]:
+    if not payload:
+        return None
+    encoding, body = payload[0], payload[1:]
+    try:
+        if encoding == 0:
+            text = body.decode("latin-1")
+        elif encoding == 1:
+            text = body.decode("utf-16")
+        elif encoding == 2:
+            text = body.decode("utf-16-be")
+        else:
+            text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    text = text.split("\x00")[0].strip()
+    return text or None
+
+def id3v2(data: bytes) -> Tuple[int, Dict[str, str]]:
+    """ (bytes taken by the tag at the start of the file, {title, artist, album} found). """
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0, {}
+    major, flags = data[3], data[5]
+    end = 10 + _syncsafe(data[6:10]) + (10 if flags & 0x10 else 0)
+    tags = {}
+    pos = 10
+    if flags & 0x40:  # extended header
+        pos += _syncsafe(data[10:14]) if major == 4 else 4 + int.from_bytes(data[10:14], "big")
+    id_len, head_len = (3, 6) if major == 2 else (4, 10)
+    while pos + head_len <= min(end, len(data)):
+        frame_id = data[pos:pos + id_len].decode("latin-1", "replace")
+        if not frame_id.strip("\x00"):
+            break  # padding
+        raw_size = data[pos + id_len:pos + id_len + (3 if major == 2 else 4)]
+        size = _syncsafe(raw_size) if major == 4 else int.from_bytes(raw_size, "big")
+        if size <= 0:
+            break
+        field = TEXT_FRAMES.get(frame_id)
+        if field and field not in tags:
+            text = _text(data[pos + head_len:pos + head_len + size])
+            if text:
+                tags[field] = text
+        pos += head_len + size
+    return end, tags
+
+def id3v1(data: bytes) -> Dict[str, str]:
+    if len(data) < 128 or data[-128:-125] != b"TAG":
+        return {}
+    tag = data[-128:]
+    fields = {"title": tag[3:33], "artist": tag[33:63], "album": tag[63:93]}
+    return {k: v.split(b"\x00")[0].decode("latin-1").strip() for k, v in fields.items() if v.split(b"\x00")[0].strip()}
+
+
+# ---------- Audio ----------
+def _first_frame(data: bytes, pos: int) -> Optional[int]:
+    """ First offset from pos holding a frame followed by another valid frame (rules out false syncs). """
+    limit = min(len(data), pos + MAX_RESYNC)
+    while pos < limit:
+        pos = data.find(b"\xff", pos, limit)
+        if pos < 0:
+            return None
+        frame = parse_frame(data, pos)
+        if frame and (pos + frame.length >= len(data) or parse_frame(data, pos + frame.length)):
+            return pos
+        pos += 1
+    return None
+
+def _vbr_frames(data: bytes, pos: int, frame: Frame) -> Optional[int]:
+    """ Frame count announced by a Xing / Info or VBRI header in the first frame. """
+    side_info = (32 if not frame.mono else 17) if frame.mpeg1 else (17 if not frame.mono else 9)
+    xing = pos + 4 + (2 if frame.protected else 0) + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing + 4:xing + 8], "big")
+        if flags & 1:
+            return int.from_bytes(data[xing + 8:xing + 12], "big")
+    vbri = pos + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        return int.from_bytes(data[vbri + 14:vbri + 18], "big")
+    return None
+
+def analyze_bytes(data: bytes) -> Dict[str, Any]:
+    """
+    {"duration_sec", "bitrate_kbps", "sample_rate", "channels", "vbr", "frames", "title", "artist", "album"}
+    (tags None when absent); raises ValueError when no MPEG audio frame is found.
+    """
+    tag_end, tags = id3v2(data)
+    audio_end = len(data) - (128 if data[-128:-125] == b"TAG" else 0)
+    start = _first_frame(data, tag_end)
+    if start is None:
+        raise ValueError("no MPEG audio frame found")
+    first = parse_frame(data, start)
+
+    frames = _vbr_frames(data, start, first)
+    header_frame = frames is not None
+    if header_frame:
+        vbr = data[start:audio_end].find(b"Xing", 0, 64) >= 0 or data[start + 36:start + 40] == b"VBRI"
+        audio_bytes = audio_end - start - first.length
+    else:
+        frames, audio_bytes, bitrates, pos = 0, 0, set(), start
+        while pos < audio_end:
+            frame = parse_frame(data, pos)
+            if frame is None:
+                nxt = _first_frame(data, pos + 1)
+                if nxt is None:
+                    break
+                pos = nxt
+                continue
+            frames += 1
+            audio_bytes += frame.length
+            bitrates.add(frame.bitrate)
+            pos += frame.length
+        vbr = len(bitrates) > 1
+    duration = frames * first.samples / first.sample_rate
+    for field, value in id3v1(data).items():
+        tags.setdefault(field, value)
+    return {
+        "duration_sec": round(duration, 3),
+        "bitrate_kbps": round(audio_bytes * 8 / duration / 1000) if duration else first.bitrate // 1000,
+        "sample_rate": first.sample_rate,
+        "channels": 1 if first.mono else 2,
+        "vbr": vbr,
+        "frames": frames,
+        "title": tags.get("title"),
+        "artist": tags.get("artist"),
+        "album": tags.get("album"),
+    }
+
+def analyze(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return analyze_bytes(f.read())
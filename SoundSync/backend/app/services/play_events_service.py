@@ -0,0 +1,224 @@
+# services/play_events_service.py
+# Play (listen) event ingestion. The route only appends to a bounded in-process buffer; a
+# flusher thread (with its own event loop) writes it to the plays collection with one unordered
+# insert_many per batch, when FLUSH_SIZE events are waiting or FLUSH_INTERVAL seconds passed.
+# Per flush, not per event: one $inc per played track (tracks.play_count), one cache
+# invalidation of plays, one pipeline to the charts. The tracks cache is moved to a new generation
+# at most once per TRACKS_REFRESH_INTERVAL seconds across workers (SET NX EX): under steady play
+# traffic a per-flush bump would keep the hottest collection cold, so cached tracks show a
+# play_count up to that old.
+#
+# Durability: accepted (202) means buffered in this worker's memory, not written yet.
+#   - a crash or kill loses the buffer: at most MAX_QUEUE events, normally under FLUSH_INTERVAL;
+#   - a graceful shutdown (close_services) drains it;
+#   - a failed insert is retried FLUSH_RETRIES times; _ids are assigned on accept, so a retry
+#     never duplicates what a partial insert already wrote.
+# A full buffer rejects the whole request (503 + Retry-After) rather than blocking the loop.
+
+from app.db import cache, counters
+from app.db.mongo import get_async_mongo_database
+from app.db.redis import get_async_redis_client
+from bson import ObjectId
+from datetime import datetime, timezone
+from pymongo.errors import BulkWriteError
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+import threading
+import time
+
+COLLECTION = "plays"
+MAX_QUEUE = int(os.getenv("PLAY_EVENTS_MAX_QUEUE", "200000"))
+FLUSH_SIZE = int(os.getenv("PLAY_EVENTS_FLUSH_SIZE", "5000"))
+FLUSH_INTERVAL = float(os.getenv("PLAY_EVENTS_FLUSH_INTERVAL", "0.5"))
+FLUSH_RETRIES = 3
+MAX_BATCH = 1000  # events per request
+MAX_CLOCK_SKEW = 300  # seconds a client's played_at may be ahead of ours
+TRACKS_REFRESH_INTERVAL = int(os.getenv("PLAY_EVENTS_TRACKS_REFRESH", "30"))
+TRACKS_REFRESH_KEY = "plays:tracks_refresh"
+FIELDS = ("track_id", "user_id", "played_at", "ms_played")
+DUPLICATE_KEY = 11000
+
+STATS = {"accepted": 0, "rejected": 0, "written": 0, "flushes": 0, "failed_flushes": 0, "dropped": 0,
+         "last_flush_ms": None}
+
+_buffer: List[Dict[str, Any]] = []
+_attempts: Dict[Any, int] = {}  # _id -> failed inserts so far
+_lock = threading.Lock()
+_wakeup = threading.Event()
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_tracks_stale = False  # play_count written since this worker last refreshed the tracks cache
+
+
+# ---------- Accept ----------
+def now_iso() -> str:
+    return utc_iso(datetime.now(timezone.utc))
+
+def utc_iso(moment: datetime) -> str:
+    """ The one stored format, "2025-10-10T10:05:00.000Z": fixed width, so it sorts chronologically. """
+    return moment.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+def normalize_played_at(value: Any) -> str:
+    """
+    Client ISO 8601 date -> utc_iso. Offsets are converted, dates without one are taken as UTC;
+    more than MAX_CLOCK_SKEW seconds in the future raises ValueError.
+    """
+    try:
+        moment = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError("'played_at' must be an ISO 8601 date")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    if moment.timestamp() > time.time() + MAX_CLOCK_SKEW:
+        raise ValueError("'played_at' is in the future")
+    return utc_iso(moment)
+
+def parse_event(event: Any, received_at: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validated plays document (only FIELDS kept; played_at normalized to UTC, defaulting to
+    received_at); raises ValueError.
+    """
+    if not isinstance(event, dict):
+        raise ValueError("an event must be an object")
+    track_id = event.get("track_id")
+    if not isinstance(track_id, (str, int)) or track_id == "":
+        raise ValueError("'track_id' is required")
+    ms_played = event.get("ms_played")
+    if ms_played is not None and (not isinstance(ms_played, int) or ms_played < 0):
+        raise ValueError("'ms_played' must be a non-negative integer")
+    played_at = event.get("played_at")
+    played_at = (received_at or now_iso()) if played_at is None else normalize_played_at(played_at)
+    document = {field: event[field] for field in FIELDS if event.get(field) is not None}
+    document.update(_id=ObjectId(), track_id=str(track_id), played_at=played_at)
+    return document
+
+def offer(documents: List[Dict[str, Any]]) -> bool:
+    """ Buffer all of `documents`, or none of them when the buffer would overflow. """
+    with _lock:
+        if len(_buffer) + len(documents) > MAX_QUEUE:
+            STATS["rejected"] += len(documents)
+            return False
+        _buffer.extend(documents)
+        STATS["accepted"] += len(documents)
+        full = len(_buffer) >= FLUSH_SIZE
+    if full:
+        _wakeup.set()
+    return True
+
+def depth() -> int:
+    return len(_buffer)
+
+
+# ---------- Flush ----------
+def _timestamp(played_at: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(played_at.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+async def _write(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """ insert_many the batch; returns the documents to retry (written ones feed counters and charts). """
+    global _tracks_stale
+    from app.services import charts_service
+    retry = []
+    try:
+        await get_async_mongo_database()[COLLECTION].insert_many(batch, ordered=False)
+        written = batch
+    except BulkWriteError as e:
+        failed = {error["index"]: error["code"] for error in e.details.get("writeErrors", [])}
+        written = [doc for i, doc in enumerate(batch) if i not in failed]
+        retry = [batch[i] for i, code in failed.items() if code != DUPLICATE_KEY]
+        print(f"[plays] {len(failed)} of {len(batch)} inserts failed: {e.details['writeErrors'][0].get('errmsg')}")
+    if written:
+        STATS["written"] += len(written)
+        try:  # the plays are stored: a failure here must not re-insert them
+            await counters.apply_counter_deltas(counters.counter_deltas(COLLECTION, added=written))
+            _tracks_stale = True
+            await cache.ainvalidate_collection(COLLECTION)
+            await charts_service.record((doc["track_id"], "play", _timestamp(doc["played_at"])) for doc in written)
+        except Exception as e:
+            print(f"[plays] counters / charts update failed after {len(written)} inserts: {e}")
+    return retry
+
+async def _refresh_tracks():
+    """ Invalidate the tracks cache unless a worker did within TRACKS_REFRESH_INTERVAL (then retry later). """
+    global _tracks_stale
+    if await get_async_redis_client().set(TRACKS_REFRESH_KEY, 1, nx=True, ex=TRACKS_REFRESH_INTERVAL):
+        _tracks_stale = False
+        await cache.ainvalidate_collection("tracks")
+
+def _requeue(batch: List[Dict[str, Any]]):
+    """ Failed documents go back to the front of the buffer until FLUSH_RETRIES is reached. """
+    keep = []
+    for doc in batch:
+        attempts = _attempts.get(doc["_id"], 0) + 1
+        if attempts > FLUSH_RETRIES:
+            _attempts.pop(doc["_id"], None)
+            STATS["dropped"] += 1
+        else:
+            _attempts[doc["_id"]] = attempts
+            keep.append(doc)
+    with _lock:
+        _buffer[:0] = keep
+
+def flush(loop: asyncio.AbstractEventLoop) -> int:
+    """ Write everything buffered so far (in FLUSH_SIZE batches); returns the events taken. """
+    global _buffer
+    with _lock:
+        taken, _buffer = _buffer, []
+    for start in range(0, len(taken), FLUSH_SIZE):
+        batch = taken[start:start + FLUSH_SIZE]
+        t0 = time.perf_counter()
+        try:
+            retry = loop.run_until_complete(_write(batch))
+        except Exception as e:
+            print(f"[plays] flush of {len(batch)} events failed: {e}")
+            STATS["failed_flushes"] += 1
+            retry = batch
+        if _attempts:
+            retried = {doc["_id"] for doc in retry}
+            for doc in batch:
+                if doc["_id"] not in retried:
+                    _attempts.pop(doc["_id"], None)
+        if retry:
+            _requeue(retry)
+        STATS["flushes"] += 1
+        STATS["last_flush_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+    if _tracks_stale:  # checked on every wakeup, so the last plays of a burst still show up
+        try:
+            loop.run_until_complete(_refresh_tracks())
+        except Exception as e:
+            print(f"[plays] tracks cache refresh failed: {e}")
+    return len(taken)
+
+def _flusher():
+    loop = asyncio.new_event_loop()
+    try:
+        while not _stop.is_set():
+            _wakeup.wait(FLUSH_INTERVAL)
+            _wakeup.clear()
+            flush(loop)
+        flush(loop)  # drain on shutdown
+    finally:
+        loop.close()
+
+def start_flusher():
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _stop.clear()
+        _thread = threading.Thread(target=_flusher, name="play-events", daemon=True)
+        _thread.start()
+
+def stop_flusher(timeout: float = 10.0):
+    """ Drain the buffer and stop (graceful shutdown). """
+    global _thread
+    if _thread is not None:
+        _stop.set()
+        _wakeup.set()
+        _thread.join(timeout)
+        _thread = None
+
+def stats() -> Dict[str, Any]:
+    return {**STATS, "queued": depth(), "max_queue": MAX_QUEUE, "flush_size": FLUSH_SIZE,
+            "flush_interval": FLUSH_INTERVAL, "tracks_refresh_interval": TRACKS_REFRESH_INTERVAL}
@@ -0,0 +1,572 @@
+# services/recommendation_service.py
+# Item-to-item recommendations from implicit feedback. Every playlist is a basket of tracks, and
+# so is every user's set of liked tracks (likes with target_type "track" + users.liked_tracks).
+# X is the baskets x tracks binary matrix (SciPy sparse); track co-occurrence is C = XᵀX,
+# cosine-normalized (C_ij / sqrt(n_i n_j), n_i = baskets holding track i). Precomputed:
+#   - the best neighbours of every track,
+#   - the TOP_K unseen tracks of every user, scored by summing the neighbour lists of their tracks.
+# Rows are stored sorted by score, so a request is an O(k) slice.
+# Writes to playlists / likes / users replace the touched baskets (write hooks; a like only marks
+# its user, whose basket the refresher re-reads off the request path); a background
+# refresher applies them at most every REFRESH_INTERVAL seconds:
+#   - tracks added to / removed from a basket ("moved": their n changed) get their row recomputed;
+#   - C is symmetric, so those rows also hold every other track's new score against them: other
+#     rows only swap these entries in place. Each row keeps STORED_K > TOP_K entries and the best
+#     score it left out (floor), so the served prefix stays exact; a row that falls short of TOP_K
+#     entries above its floor is recomputed;
+#   - users owning a changed basket or holding a moved track (up to USER_FANOUT) are recomputed.
+# Other users' lists catch up at the next full rebuild (REBUILD_INTERVAL, or
+# POST /recommendations/rebuild). Each worker process holds its own model.
+
+from app.core import events
+from app.db.mongo import get_mongo_database
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+MC = get_mongo_database()
+
+BUILD_ON_STARTUP = os.getenv("RECOMMENDATIONS_ON_STARTUP", "1") == "1"
+REFRESH_INTERVAL = float(os.getenv("RECOMMENDATIONS_REFRESH_INTERVAL", "2"))
+REBUILD_INTERVAL = float(os.getenv("RECOMMENDATIONS_REBUILD_INTERVAL", "3600"))  # 0 = never
+TOP_K = 50               # served per track / user
+STORED_K = 64            # kept per track: slack for the in-place updates
+MIN_SUPPORT = 1          # co-occurrences needed before two tracks are related
+USER_FANOUT = 20000
+POPULAR_SIZE = 200       # fallback list for users without history
+CHUNK_NNZ = 20_000_000   # co-occurrences materialized at once
+USER_CHUNK = 4096
+BUILD_BATCH = 5000
+
+
+# ---------- Score rows ----------
+class Rows:
+    """ CSR-like rows whose entries are sorted by descending score (row i = indices/data[indptr[i]:indptr[i+1]]). """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray):
+        self.indptr, self.indices, self.data = indptr, indices, data
+
+    @classmethod
+    def empty(cls, n_rows: int = 0) -> "Rows":
+        return cls(np.zeros(n_rows + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32))
+
+    @classmethod
+    def top_k(cls, rows: np.ndarray, cols: np.ndarray, scores: np.ndarray, n_rows: int, k: int) -> Tuple["Rows", np.ndarray]:
+        """
+        The k best (col, score) of each row from unordered triplets, without a Python loop,
+        and the best score each row left out (0: none).
+        """
+        order = np.lexsort((cols, -scores, rows))  # ties: lowest number (first seen) first
+        rows, cols, scores = rows[order], cols[order], scores[order]
+        counts = np.bincount(rows, minlength=n_rows)
+        position = np.arange(len(rows)) - (np.cumsum(counts) - counts)[rows]
+        left_out = np.zeros(n_rows, dtype=np.float32)
+        first_out = position == k
+        left_out[rows[first_out]] = scores[first_out]
+        keep = position < k
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.minimum(counts, k), out=indptr[1:])
+        return cls(indptr, cols[keep].astype(np.int32), scores[keep].astype(np.float32)), left_out
+
+    @classmethod
+    def top_k_csr(cls, matrix: sparse.csr_matrix, k: int) -> Tuple["Rows", np.ndarray]:
+        """ Same as top_k for the rows of a CSR matrix: one argpartition per row beats a global sort on wide rows. """
+        n_rows = matrix.shape[0]
+        lengths = np.zeros(n_rows, dtype=np.int64)
+        left_out = np.zeros(n_rows, dtype=np.float32)
+        cols, scores = [], []
+        for i in range(n_rows):
+            start, end = matrix.indptr[i], matrix.indptr[i + 1]
+            seg, seg_cols = matrix.data[start:end], matrix.indices[start:end]
+            if end - start > k:
+                best = np.argpartition(-seg, k)[:k + 1]
+                best = best[np.lexsort((seg_cols[best], -seg[best]))]
+                left_out[i] = seg[best[k]]
+                best = best[:k]
+            else:
+                best = np.lexsort((seg_cols, -seg))
+            lengths[i] = len(best)
+            cols.append(seg_cols[best])
+            scores.append(seg[best])
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        if not cols:
+            return cls.empty(n_rows), left_out
+        return cls(indptr, np.concatenate(cols).astype(np.int32), np.concatenate(scores).astype(np.float32)), left_out
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    def row(self, i: int, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        if i >= len(self):
+            return self.indices[:0], self.data[:0]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        end = min(end, start + limit)
+        return self.indices[start:end], self.data[start:end]
+
+    def row_numbers(self) -> np.ndarray:
+        """ Row of every entry. """
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    def resized(self, n_rows: int) -> "Rows":
+        if n_rows <= len(self):
+            return self
+        pad = np.full(n_rows - len(self), self.indptr[-1], dtype=np.int64)
+        return Rows(np.concatenate([self.indptr, pad]), self.indices, self.data)
+
+    def truncated(self, k: int) -> "Rows":
+        lengths = np.diff(self.indptr)
+        keep = np.arange(len(self.indices)) - np.repeat(self.indptr[:-1], lengths) < k
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.minimum(lengths, k), out=indptr[1:])
+        return Rows(indptr, self.indices[keep], self.data[keep])
+
+    def replace(self, rows: np.ndarray, new: "Rows") -> "Rows":
+        """ Copy with rows[j] replaced by new row j (rows sorted, unique, < len(self)). """
+        lengths = np.diff(self.indptr)
+        replaced = np.zeros(len(self), dtype=bool)
+        replaced[rows] = True
+        kept = ~np.repeat(replaced, lengths)
+        lengths[rows] = np.diff(new.indptr)
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        data = np.empty(indptr[-1], dtype=np.float32)
+        old_rows = self.row_numbers()[kept]
+        dest = indptr[old_rows] + (np.flatnonzero(kept) - self.indptr[old_rows])
+        indices[dest], data[dest] = self.indices[kept], self.data[kept]
+        new_rows = new.row_numbers()
+        dest = indptr[rows[new_rows]] + (np.arange(len(new.indices)) - new.indptr[new_rows])
+        indices[dest], data[dest] = new.indices, new.data
+        return Rows(indptr, indices, data)
+
+    def as_csr(self, n_cols: int) -> sparse.csr_matrix:
+        return sparse.csr_matrix((self.data, self.indices, self.indptr), shape=(len(self), n_cols))
+
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+
+def _concat(parts: List[Rows]) -> Rows:
+    if not parts:
+        return Rows.empty()
+    offsets = np.cumsum([0] + [p.indptr[-1] for p in parts[:-1]])
+    indptr = np.concatenate([[0]] + [p.indptr[1:] + off for p, off in zip(parts, offsets)])
+    return Rows(indptr.astype(np.int64), np.concatenate([p.indices for p in parts]),
+                np.concatenate([p.data for p in parts]))
+
+def _binary(matrix: sparse.spmatrix) -> sparse.csr_matrix:
+    matrix = matrix.tocsr()
+    matrix.sum_duplicates()
+    matrix.data = np.ones(len(matrix.data), dtype=np.float32)
+    return matrix
+
+
+# ---------- Model ----------
+class CoOccurrenceModel:
+    """
+    Baskets x tracks matrix plus the precomputed rows. Ids are numbered on first sight and never
+    renumbered (a deleted playlist leaves an empty basket) until the next full build.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.track_ids: List[str] = []
+        self.track_no: Dict[str, int] = {}
+        self.user_ids: List[str] = []
+        self.user_no: Dict[str, int] = {}
+        self.basket_no: Dict[str, int] = {}
+        self.basket_owner = array("i")          # basket -> user number, -1 if none
+        self.X = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.similar = Rows.empty()
+        self.floor = np.zeros(0, dtype=np.float32)  # track -> best score left out of its row
+        self.for_user = Rows.empty()
+        self.popular = np.zeros(0, dtype=np.int32)
+        self._pending: Dict[int, Set[int]] = {}  # basket -> its new tracks, applied by refresh()
+
+    # ---------- Numbering ----------
+    def _track(self, track_id: Any) -> int:
+        track_id = str(track_id)
+        number = self.track_no.get(track_id)
+        if number is None:
+            number = self.track_no[track_id] = len(self.track_ids)
+            self.track_ids.append(track_id)
+        return number
+
+    def _user(self, user_id: Any) -> int:
+        if user_id is None:
+            return -1
+        user_id = str(user_id)
+        number = self.user_no.get(user_id)
+        if number is None:
+            number = self.user_no[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+        return number
+
+    def _basket(self, key: str, owner: Any) -> int:
+        number = self.basket_no.get(key)
+        if number is None:
+            number = self.basket_no[key] = len(self.basket_owner)
+            self.basket_owner.append(self._user(owner))
+        elif owner is not None:  # unknown on deletes: the owner's list is refreshed too
+            self.basket_owner[number] = self._user(owner)
+        return number
+
+    # ---------- Build ----------
+    def load(self, baskets: Iterable[Tuple[str, Any, Iterable[Any]]]):
+        """ Fill X from (basket key, owner user id, track ids) rows (a basket may repeat: merged). """
+        rows, cols = array("i"), array("i")
+        for key, owner, tracks in baskets:
+            number = self._basket(key, owner)
+            for track_id in tracks:
+                if track_id is not None:
+                    rows.append(number)
+                    cols.append(self._track(track_id))
+        shape = (len(self.basket_owner), len(self.track_ids))
+        rows, cols = np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32)
+        self.X = _binary(sparse.coo_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape))
+        self.similar, self.floor = self._similar_rows(np.arange(shape[1]), self.X.T.tocsr())
+        self.popular = self._popular()
+        owners = np.array(self.basket_owner, dtype=np.int32)
+        self.for_user = self._user_rows(np.arange(len(self.user_ids)), owners, len(self.user_ids))
+
+    def _counts(self) -> np.ndarray:
+        return np.bincount(self.X.indices, minlength=self.X.shape[1])
+
+    def _popular(self) -> np.ndarray:
+        counts = self._counts()
+        top = np.argsort(-counts, kind="stable")[:POPULAR_SIZE]
+        return top[counts[top] > 0].astype(np.int32)
+
+    def _cosine_rows(self, tracks: np.ndarray, XT: sparse.csr_matrix) -> Iterator[Tuple[np.ndarray, sparse.csr_matrix]]:
+        """
+        (chunk of tracks, their rows of C as cosine scores) with about CHUNK_NNZ entries per chunk:
+        a row of C has at most the summed length of the baskets holding the track.
+        """
+        X = self.X
+        norms = np.sqrt(self._counts().astype(np.float32))
+        bound = np.cumsum(XT[tracks] @ np.diff(X.indptr).astype(np.float64))
+        start = 0
+        while start < len(tracks):
+            base = bound[start - 1] if start else 0.0
+            end = max(start + 1, int(np.searchsorted(bound, base + CHUNK_NNZ, side="right")))
+            chunk = tracks[start:end]
+            C = XT[chunk] @ X
+            mine = np.repeat(chunk, np.diff(C.indptr))
+            related = (C.indices != mine) & (C.data >= MIN_SUPPORT)
+            C.data = np.where(related, C.data / (norms[mine] * norms[C.indices]), 0).astype(np.float32)
+            C.eliminate_zeros()
+            yield chunk, C
+            start = end
+
+    def _similar_rows(self, tracks: np.ndarray, XT: sparse.csr_matrix) -> Tuple[Rows, np.ndarray]:
+        parts, floors = [], []
+        for _, C in self._cosine_rows(tracks, XT):
+            rows, left_out = Rows.top_k_csr(C, STORED_K)
+            parts.append(rows)
+            floors.append(left_out)
+        return _concat(parts), np.concatenate(floors) if floors else np.zeros(0, dtype=np.float32)
+
+    def _user_rows(self, users: np.ndarray, owners: np.ndarray, n_users: int) -> Rows:
+        """
+        Top-k unseen tracks of `users`: their tracks (U) times the neighbour matrix, minus U.
+        Rows short of k are topped up with popular tracks, scored below any real neighbour
+        (users without history keep an empty row: the route answers them with `popular`).
+        """
+        baskets = np.flatnonzero(owners >= 0)
+        n_tracks = self.X.shape[1]
+        O = sparse.csr_matrix((np.ones(len(baskets), dtype=np.float32), (owners[baskets], baskets)),
+                              shape=(n_users, len(owners)))
+        S = self.similar.truncated(TOP_K).as_csr(n_tracks)
+        top_up = np.linspace(1e-9, 1e-10, len(self.popular), dtype=np.float32)
+        parts = []
+        for start in range(0, len(users), USER_CHUNK):
+            chunk = users[start:start + USER_CHUNK]
+            U = _binary(O[chunk] @ self.X)
+            has_history = np.diff(U.indptr) > 0
+            popular = sparse.csr_matrix((np.outer(has_history, top_up).ravel(), np.tile(self.popular, len(chunk)),
+                                         np.arange(len(chunk) + 1) * len(top_up)), shape=(len(chunk), n_tracks))
+            R = U @ S + popular
+            R = (R - R.multiply(U)).tocoo()  # drop what the user already has
+            keep = R.data > 0
+            parts.append(Rows.top_k(R.row[keep], R.col[keep], R.data[keep], len(chunk), TOP_K)[0])
+        return _concat(parts)
+
+    # ---------- Incremental ----------
+    def set_basket(self, key: str, owner: Any, tracks: Iterable[Any]):
+        """ Record the new content of a basket; applied by the next refresh(). """
+        with self._lock:
+            number = self._basket(key, owner)
+            self._pending[number] = {self._track(t) for t in tracks if t is not None}
+
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def refresh(self) -> Dict[str, int]:
+        """ Apply the pending baskets and update the affected track and user rows. """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            owners = np.array(self.basket_owner, dtype=np.int32)  # copy: hooks keep appending
+            n_tracks, n_users = len(self.track_ids), len(self.user_ids)
+        if not pending:
+            return {"baskets": 0, "moved": 0, "updated": 0, "recomputed": 0, "users": 0}
+
+        X = self.X
+        X.resize((len(owners), n_tracks))
+        baskets = np.array(sorted(pending), dtype=np.int64)
+        moved = set()
+        for number in baskets:
+            moved |= set(X.indices[X.indptr[number]:X.indptr[number + 1]].tolist()) ^ pending[number]
+        lengths = [len(pending[number]) for number in baskets]
+        new = Rows(np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+                   np.fromiter((t for number in baskets for t in sorted(pending[number])), dtype=np.int32, count=sum(lengths)),
+                   np.ones(sum(lengths), dtype=np.float32))
+        current = Rows(X.indptr.astype(np.int64), X.indices.astype(np.int32), X.data)
+        self.X = current.replace(baskets, new).as_csr(n_tracks)
+        XT = self.X.T.tocsr()
+
+        similar = self.similar.resized(n_tracks)
+        floor = np.concatenate([self.floor, np.zeros(n_tracks - len(self.floor), dtype=np.float32)])
+        moved = np.array(sorted(moved), dtype=np.int64)
+        updated = recomputed = np.zeros(0, dtype=np.int64)
+        if len(moved):
+            is_moved = np.zeros(n_tracks, dtype=bool)
+            is_moved[moved] = True
+            # Rows of the moved tracks; read by column, the same scores are every other
+            # track's new score against them
+            parts, floors, against, owner_of, scores = [], [], [], [], []
+            for chunk, C in self._cosine_rows(moved, XT):
+                rows, left_out = Rows.top_k_csr(C, STORED_K)
+                parts.append(rows)
+                floors.append(left_out)
+                against.append(C.indices)
+                owner_of.append(np.repeat(chunk, np.diff(C.indptr)))
+                scores.append(C.data)
+            similar = similar.replace(moved, _concat(parts))
+            floor[moved] = np.concatenate(floors)
+            against, owner_of, scores = np.concatenate(against), np.concatenate(owner_of), np.concatenate(scores)
+
+            # Other rows: drop their moved entries, insert the new scores clearing their floor
+            row_of = similar.row_numbers()
+            stale = is_moved[similar.indices] & ~is_moved[row_of]
+            fresh = ~is_moved[against] & (scores >= floor[against])
+            updated = np.union1d(row_of[stale], against[fresh]).astype(np.int64)
+            is_updated = np.zeros(n_tracks, dtype=bool)
+            is_updated[updated] = True
+            kept = is_updated[row_of] & ~is_moved[similar.indices]
+            merged, left_out = Rows.top_k(
+                np.searchsorted(updated, np.concatenate([row_of[kept], against[fresh]])),
+                np.concatenate([similar.indices[kept], owner_of[fresh].astype(np.int32)]),
+                np.concatenate([similar.data[kept], scores[fresh]]),
+                len(updated), STORED_K)
+            similar = similar.replace(updated, merged)
+            floor[updated] = np.maximum(floor[updated], left_out)
+
+            # Rows left with fewer than TOP_K entries known to beat everything they left out
+            recomputed = updated[(np.diff(merged.indptr) < TOP_K) & (floor[updated] > 0)]
+            if len(recomputed):
+                rows, left_out = self._similar_rows(recomputed, XT)
+                similar = similar.replace(recomputed, rows)
+                floor[recomputed] = left_out
+        self.similar, self.floor = similar, floor
+        self.popular = self._popular()
+
+        users = owners[baskets]
+        if len(moved):
+            holders = np.unique(owners[np.unique(XT[moved].indices)])
+            if len(holders) <= USER_FANOUT:
+                users = np.concatenate([users, holders])
+        users = np.unique(users[users >= 0]).astype(np.int64)
+        for_user = self.for_user.resized(n_users)
+        if len(users):
+            for_user = for_user.replace(users, self._user_rows(users, owners, n_users))
+        self.for_user = for_user
+        return {"baskets": len(baskets), "moved": len(moved), "updated": len(updated),
+                "recomputed": len(recomputed), "users": len(users)}
+
+    # ---------- Query ----------
+    def similar_tracks(self, track_id: str, limit: int) -> Optional[List[Tuple[str, float]]]:
+        number = self.track_no.get(str(track_id))
+        if number is None:
+            return None
+        indices, scores = self.similar.row(number, min(limit, TOP_K))
+        return [(self.track_ids[i], round(float(s), 4)) for i, s in zip(indices, scores)]
+
+    def user_tracks(self, user_id: str, limit: int) -> Tuple[List[Tuple[str, float]], bool]:
+        """ ([(track_id, score)], fallback): popular tracks when the user has no history yet. """
+        number = self.user_no.get(str(user_id))
+        if number is not None:
+            indices, scores = self.for_user.row(number, limit)
+            if len(indices):
+                return [(self.track_ids[i], round(float(s), 4)) for i, s in zip(indices, scores)], False
+        return [(self.track_ids[i], 0.0) for i in self.popular[:limit]], True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"tracks": len(self.track_ids), "users": len(self.user_ids), "baskets": len(self.basket_owner),
+                "interactions": int(self.X.nnz), "pending_baskets": len(self._pending),
+                "approx_bytes": int(self.X.data.nbytes + self.X.indices.nbytes + self.X.indptr.nbytes
+                                    + self.similar.nbytes() + self.floor.nbytes + self.for_user.nbytes())}
+
+
+MODEL = CoOccurrenceModel()
+STATE = {"ready": False, "building": False, "built_at": None, "build_seconds": None, "refreshed_at": None}
+
+_build_lock = threading.Lock()
+_swap_lock = threading.Lock()  # hook writes vs. the swap of a rebuilt model
+_wakeup = threading.Event()
+_pending: Optional[List[Tuple[str, Any, List[Any]]]] = None  # baskets changed during a build
+_dirty_users: Set[Any] = set()   # like baskets to re-read (written by the hooks, read by refresh)
+_dirty_likes: Set[str] = set()   # updated likes whose user is not known yet
+
+
+# ---------- Build ----------
+def playlist_basket(doc: Dict[str, Any]) -> Tuple[str, Any, List[Any]]:
+    tracks = doc.get("tracks")
+    return f"playlist:{doc['_id']}", doc.get("user_id"), tracks if isinstance(tracks, list) else []
+
+def _baskets():
+    for doc in MC.playlists.find({}, {"user_id": 1, "tracks": 1}, batch_size=BUILD_BATCH):
+        yield playlist_basket(doc)
+    # A user's like basket comes from two sources; load() merges the repeated key
+    for doc in MC.users.find({"liked_tracks.0": {"$exists": True}}, {"liked_tracks": 1}, batch_size=BUILD_BATCH):
+        yield f"likes:{doc['_id']}", doc["_id"], doc["liked_tracks"]
+    for doc in MC.likes.find({"target_type": "track"}, {"user_id": 1, "target_id": 1}, batch_size=BUILD_BATCH):
+        if doc.get("user_id") is not None:
+            yield f"likes:{doc['user_id']}", doc["user_id"], [doc.get("target_id")]
+
+def rebuild() -> Dict[str, Any]:
+    """ Build a fresh model from MongoDB and swap it in; baskets changed meanwhile are replayed. """
+    global MODEL, _pending
+    with _build_lock:
+        STATE["building"] = True
+        start = time.perf_counter()
+        try:
+            with _swap_lock:
+                _pending = []
+            model = CoOccurrenceModel()
+            model.load(_baskets())
+            with _swap_lock:
+                for basket in _pending:
+                    model.set_basket(*basket)
+                MODEL, _pending = model, None
+            model.refresh()
+            STATE.update(ready=True, built_at=time.time(), build_seconds=round(time.perf_counter() - start, 3))
+            print(f"[recommendations] {len(model.track_ids)} tracks, {model.X.shape[0]} baskets, {model.X.nnz} interactions")
+        finally:
+            STATE["building"] = False
+            with _swap_lock:
+                _pending = None
+    return stats()
+
+def _like_basket(user_id: Any) -> List[Any]:
+    """ Liked tracks of a user, from users.liked_tracks and the likes collection. """
+    user = MC.users.find_one({"_id": user_id}, {"liked_tracks": 1}) or {}
+    tracks = list(user.get("liked_tracks") or [])
+    for like in MC.likes.find({"user_id": user_id, "target_type": "track"}, {"target_id": 1}):
+        tracks.append(like.get("target_id"))
+    return tracks
+
+def _reload_dirty() -> int:
+    """ Re-read the like baskets marked by the write hook. """
+    global _dirty_users, _dirty_likes
+    with _swap_lock:
+        users, likes = _dirty_users, _dirty_likes
+        _dirty_users, _dirty_likes = set(), set()
+    if likes:
+        from app.db.crud import _ids_query
+        users |= {doc["user_id"] for doc in MC.likes.find(_ids_query(list(likes)), {"user_id": 1})
+                  if doc.get("user_id") is not None}
+    for user_id in users:
+        _apply_basket(f"likes:{user_id}", user_id, _like_basket(user_id))
+    return len(users)
+
+def refresh() -> Dict[str, int]:
+    _reload_dirty()
+    with _build_lock:
+        report = MODEL.refresh()
+    STATE["refreshed_at"] = time.time()
+    return report
+
+def _refresher():
+    """ Full build, then incremental refreshes (debounced) and periodic full rebuilds. """
+    while True:
+        try:
+            built_at = STATE["built_at"]
+            if built_at is None or REBUILD_INTERVAL and time.time() - built_at >= REBUILD_INTERVAL:
+                _wakeup.clear()  # the rebuild reads every basket
+                rebuild()
+            elif _wakeup.is_set():
+                time.sleep(REFRESH_INTERVAL)  # let a burst of writes land in one refresh
+                _wakeup.clear()
+                refresh()
+        except Exception as e:
+            print(f"[recommendations] refresh failed: {e}")
+            time.sleep(REFRESH_INTERVAL)
+        _wakeup.wait(timeout=60)
+
+def start_background_build():
+    if BUILD_ON_STARTUP and not STATE["building"]:
+        threading.Thread(target=_refresher, name="recommendations", daemon=True).start()
+
+
+# ---------- Write hook ----------
+def _apply_basket(key: str, owner: Any, tracks: List[Any]):
+    with _swap_lock:
+        if _pending is not None:
+            _pending.append((key, owner, tracks))
+        MODEL.set_basket(key, owner, tracks)
+
+def _set_basket(key: str, owner: Any, tracks: List[Any]):
+    _apply_basket(key, owner, tracks)
+    _wakeup.set()
+
+def _mark_dirty(user_id: Any = None, like_id: Optional[str] = None):
+    """ Defer a like basket to the refresher: the hook runs inside the request. """
+    with _swap_lock:
+        if user_id is not None:
+            _dirty_users.add(user_id)
+        elif like_id is not None:
+            _dirty_likes.add(like_id)
+    _wakeup.set()
+
+async def on_write(collection: str, op: str, doc_id: str, document: Optional[Dict[str, Any]]):
+    """ Replace the baskets touched by a write (registered as a write hook). """
+    if collection == "playlists":
+        if op == "delete":
+            _set_basket(f"playlist:{doc_id}", (document or {}).get("user_id"), [])
+            return
+        if op == "update":
+            if not set(document or {}) & {"tracks", "user_id"}:
+                return
+            from app.db import async_crud
+            document = await async_crud.get_one_by_field(collection, "_id", doc_id)
+            if document is None:
+                return
+        _set_basket(*playlist_basket({**document, "_id": doc_id}))
+    elif collection == "likes":
+        user_id = (document or {}).get("user_id")
+        _mark_dirty(user_id, doc_id if op == "update" else None)
+    elif collection == "users":
+        if op == "delete":
+            _set_basket(f"likes:{doc_id}", doc_id, [])
+        elif "liked_tracks" in (document or {}):
+            _mark_dirty(doc_id)
+
+events.register_write_hook(on_write)
+
+
+# ---------- Query ----------
+def similar_tracks(track_id: str, limit: int = 10) -> Optional[List[Tuple[str, float]]]:
+    return MODEL.similar_tracks(track_id, limit)
+
+def user_tracks(user_id: str, limit: int = 10) -> Tuple[List[Tuple[str, float]], bool]:
+    return MODEL.user_tracks(user_id, limit)
+
+def stats() -> Dict[str, Any]:
+    return {**STATE, **MODEL.stats()}
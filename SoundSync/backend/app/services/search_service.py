@@ -0,0 +1,271 @@
+# services/search_service.py
+# In-process full-text search over tracks, artists, albums and concerts.
+# One inverted index per collection, BM25-ranked over weighted fields, accent and case folded
+# ("Français" matches "francais"). Built from MongoDB in a background thread at startup and kept
+# current by the CRUD write hooks (see core/events.emit_write).
+# Each worker process holds its own index and only sees writes made through itself;
+# POST /crud/search/rebuild resynchronizes it.
+
+from app.core import events
+from app.db.mongo import get_mongo_database
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import math
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+MC = get_mongo_database()
+
+# collection -> {field: weight}
+SEARCH_FIELDS: Dict[str, Dict[str, float]] = {
+    "tracks": {"title": 1.0},
+    "artists": {"username": 2.0, "biography": 1.0},
+    "albums": {"title": 2.0, "description": 1.0},
+    "concerts": {"title": 1.0},
+}
+
+BUILD_ON_STARTUP = os.getenv("SEARCH_INDEX_ON_STARTUP", "1") == "1"
+BUILD_BATCH = 5000
+K1, B = 1.2, 0.75
+COMPACT_MIN_DEAD = 1000
+COMPACT_RATIO = 0.25
+
+_TOKEN = re.compile(r"\w+")
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "Œ": "oe", "Æ": "ae"})
+
+
+def fold(text: str) -> str:
+    """ Lowercase without accents: 'Chanson Française' -> 'chanson francaise'. """
+    decomposed = unicodedata.normalize("NFKD", text.translate(_LIGATURES))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+def tokenize(text: Any) -> List[str]:
+    if isinstance(text, list):
+        text = " ".join(t for t in text if isinstance(t, str))
+    if not isinstance(text, str) or not text:
+        return []
+    return _TOKEN.findall(fold(text))
+
+
+# ---------- Index ----------
+class SearchIndex:
+    """
+    Inverted index of one collection. Postings are append-only arrays (doc number, weighted tf)
+    scored with NumPy views over them; removed documents become tombstones, compacted once
+    they exceed COMPACT_RATIO.
+    """
+
+    def __init__(self, fields: Dict[str, float]):
+        self.fields = fields
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._keys: List[Optional[str]] = []  # doc number -> _id, None once removed
+        self._lengths = array("f")
+        self._alive = array("b")             # doc number -> 1 / 0 (tombstone)
+        self._numbers: Dict[str, int] = {}   # live _id -> doc number
+        self._total_length = 0.0
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def add(self, doc_id: str, doc: Dict[str, Any]):
+        """ Index (or re-index) a document. """
+        tf = Counter()
+        for field, weight in self.fields.items():
+            for token in tokenize(doc.get(field)):
+                tf[token] += weight
+        with self._lock:
+            self._remove(doc_id)
+            if not tf:
+                return
+            number = len(self._keys)
+            self._keys.append(doc_id)
+            self._numbers[doc_id] = number
+            length = sum(tf.values())
+            self._lengths.append(length)
+            self._alive.append(1)
+            self._total_length += length
+            for term, weight in tf.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("f"))
+                postings[0].append(number)
+                postings[1].append(weight)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        number = self._numbers.pop(doc_id, None)
+        if number is None:
+            return
+        self._keys[number] = None
+        self._alive[number] = 0
+        self._total_length -= self._lengths[number]
+        self._dead += 1
+        if self._dead >= COMPACT_MIN_DEAD and self._dead > COMPACT_RATIO * len(self._keys):
+            self._compact()
+
+    def _compact(self):
+        """ Drop tombstones and renumber the live documents. """
+        renumber, keys, lengths = {}, [], array("f")
+        for number, key in enumerate(self._keys):
+            if key is not None:
+                renumber[number] = len(keys)
+                keys.append(key)
+                lengths.append(self._lengths[number])
+        postings = {}
+        for term, (docs, tfs) in self._postings.items():
+            new_docs, new_tfs = array("I"), array("f")
+            for number, weight in zip(docs, tfs):
+                if number in renumber:
+                    new_docs.append(renumber[number])
+                    new_tfs.append(weight)
+            if new_docs:
+                postings[term] = (new_docs, new_tfs)
+        self._postings, self._keys, self._lengths = postings, keys, lengths
+        self._alive = array("b", [1]) * len(keys)
+        self._numbers = {key: number for number, key in enumerate(keys)}
+        self._dead = 0
+
+    def search(self, terms: Iterable[str], skip: int = 0, limit: int = 20) -> Tuple[int, List[Tuple[str, float]]]:
+        """ (number of matching documents, [(_id, score)] of the requested page) ranked by BM25. """
+        with self._lock:
+            n_docs = len(self._numbers)
+            if not n_docs:
+                return 0, []
+            avg_length = self._total_length / n_docs
+            lengths = np.frombuffer(self._lengths, dtype=np.float32)
+            scores = None
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                docs = np.frombuffer(postings[0], dtype=np.uint32)
+                tfs = np.frombuffer(postings[1], dtype=np.float32)
+                df = len(docs)  # tombstones included, bounded by compaction
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                norm = K1 * (1 - B + B * lengths[docs] / avg_length)
+                if scores is None:
+                    scores = np.zeros(len(self._keys), dtype=np.float64)
+                scores[docs] += idf * tfs * (K1 + 1) / (tfs + norm)  # a doc appears once per postings list
+            if scores is None:
+                return 0, []
+            scores *= np.frombuffer(self._alive, dtype=np.int8)
+            matched = np.flatnonzero(scores)
+            k = min(skip + limit, len(matched))
+            if k <= skip:
+                return len(matched), []
+            top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            page = top[np.argsort(-scores[top], kind="stable")][skip:]
+            return len(matched), [(self._keys[n], round(float(scores[n]), 4)) for n in page]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            postings = sum(len(docs) for docs, _ in self._postings.values())
+            approx_bytes = (
+                sys.getsizeof(self._postings) + sys.getsizeof(self._numbers) + sys.getsizeof(self._keys)
+                + sum(sys.getsizeof(term) + docs.buffer_info()[1] * docs.itemsize + tfs.buffer_info()[1] * tfs.itemsize
+                      for term, (docs, tfs) in self._postings.items())
+                + sum(sys.getsizeof(key) for key in self._numbers)
+                + self._lengths.buffer_info()[1] * self._lengths.itemsize
+                + self._alive.buffer_info()[1]
+            )
+            return {"documents": len(self._numbers), "terms": len(self._postings), "postings": postings,
+                    "tombstones": self._dead, "approx_bytes": approx_bytes}
+
+
+INDEXES: Dict[str, SearchIndex] = {c: SearchIndex(fields) for c, fields in SEARCH_FIELDS.items()}
+STATE = {"ready": False, "building": False, "built_at": None, "build_seconds": None}
+
+_build_lock = threading.Lock()
+_swap_lock = threading.Lock()  # hook writes vs. the swap of a rebuilt index
+_pending: Dict[str, List[Tuple[str, str, Optional[Dict[str, Any]]]]] = {}  # writes seen during a build
+
+
+# ---------- Build ----------
+def build_index(collection: str, documents: Iterable[Dict[str, Any]]) -> SearchIndex:
+    index = SearchIndex(SEARCH_FIELDS[collection])
+    for doc in documents:
+        index.add(str(doc["_id"]), doc)
+    return index
+
+def rebuild(collections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Rebuild the indexes from MongoDB (streamed, fields-only projection) and swap them in.
+    Writes arriving meanwhile are replayed on the new index.
+    """
+    with _build_lock:
+        STATE["building"] = True
+        start = time.perf_counter()
+        try:
+            for collection in collections or SEARCH_FIELDS:
+                _pending[collection] = []
+                projection = {field: 1 for field in SEARCH_FIELDS[collection]}
+                cursor = MC[collection].find({}, projection, batch_size=BUILD_BATCH)
+                index = build_index(collection, cursor)
+                with _swap_lock:
+                    for op, doc_id, doc in _pending.pop(collection):
+                        _apply(index, op, doc_id, doc)
+                    INDEXES[collection] = index
+                print(f"[search] {collection}: {len(index)} documents indexed")
+            STATE.update(ready=True, built_at=time.time(), build_seconds=round(time.perf_counter() - start, 3))
+        finally:
+            STATE["building"] = False
+            with _swap_lock:
+                _pending.clear()
+    return stats()
+
+def start_background_build():
+    """ Build the indexes without delaying startup (searches answer 503 until ready). """
+    if BUILD_ON_STARTUP and not STATE["building"]:
+        threading.Thread(target=rebuild, name="search-index-build", daemon=True).start()
+
+
+# ---------- Write hook ----------
+def _apply(index: SearchIndex, op: str, doc_id: str, doc: Optional[Dict[str, Any]]):
+    if op == "delete" or doc is None:
+        index.remove(doc_id)
+    else:
+        index.add(doc_id, doc)
+
+async def on_write(collection: str, op: str, doc_id: str, document: Optional[Dict[str, Any]]):
+    """ Keep the index current (registered as a write hook). Updates re-read the document. """
+    fields = SEARCH_FIELDS.get(collection)
+    if fields is None:
+        return
+    if op == "update":
+        if not set(document or {}) & set(fields):
+            return
+        from app.db import async_crud
+        document = await async_crud.get_one_by_field(collection, "_id", doc_id)
+        op = "insert" if document else "delete"
+    with _swap_lock:
+        if collection in _pending:
+            _pending[collection].append((op, doc_id, document))
+        _apply(INDEXES[collection], op, doc_id, document)
+
+events.register_write_hook(on_write)
+
+
+# ---------- Query ----------
+def search(q: str, types: Optional[Iterable[str]] = None, skip: int = 0, limit: int = 20) -> Dict[str, Dict[str, Any]]:
+    """ {collection: {"total", "hits": [(_id, score)]}} for each searched collection. """
+    terms = tokenize(q)
+    results = {}
+    for collection in types or SEARCH_FIELDS:
+        total, hits = INDEXES[collection].search(terms, skip, limit) if terms else (0, [])
+        results[collection] = {"total": total, "hits": hits}
+    return results
+
+def stats() -> Dict[str, Any]:
+    return {**STATE, "indexes": {c: index.stats() for c, index in INDEXES.items()}}
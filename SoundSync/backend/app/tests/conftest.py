@@ -1,6 +1,7 @@
 # tests/conftest.py
 import pytest
 import os
+import time
 from fastapi.testclient import TestClient
 
 # CRITICAL: Set MongoDB URI to localhost BEFORE importing app modules
@@ -32,6 +33,37 @@ def db():
     return get_mongo_database()
 
 
+@pytest.fixture(scope="function")
+def wait_for():
+    """Poll a predicate (background flushers, analysis...) until it holds or `timeout` passes."""
+    def wait(predicate, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return predicate()
+    return wait
+
+
+@pytest.fixture(scope="function")
+def scratch_db(monkeypatch):
+    """
+    A throwaway database in place of soundsync_db for the modules that drop and reload whole
+    collections (seeding, clean_db, generated data), dropped afterwards. Their jobs go through
+    queues of this process only, so no other API process runs them against its database.
+    """
+    from app.db import counters, crud, indexes, mongo, seed, synthetic
+    from app.services import jobs_service
+    client = mongo.get_mongo_client()
+    scratch = client[f"{mongo.mongo_db_name}_test_scratch"]
+    client.drop_database(scratch.name)
+    for module in (seed, crud, counters, indexes, synthetic, jobs_service):
+        monkeypatch.setattr(module, "MC", scratch)
+    for name in ("QUEUE", "EXCLUSIVE_QUEUE", "EXCLUSIVE_LOCK"):
+        monkeypatch.setattr(jobs_service, name, f"{getattr(jobs_service, name)}:test:{jobs_service.INSTANCE}")
+    yield scratch
+    client.drop_database(scratch.name)
+
+
 @pytest.fixture(scope="function", autouse=True)
 def cleanup_test_data(db):
     """Automatically clean up test data after each test."""
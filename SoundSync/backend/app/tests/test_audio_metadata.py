@@ -0,0 +1,88 @@
+# tests/test_audio_metadata.py
+"""
+MP3 metadata: frame header / ID3 parsing, background analysis on upload, write-back to tracks.
+"""
+import hashlib
+import os
+import struct
+
+import pytest
+
+from app.services import audio_analysis_service, audio_service, mp3_metadata
+
+FRAME_HEADER = b"\xff\xfb\x90\x64"  # MPEG-1 layer III, 128 kbps, 44.1 kHz, joint stereo
+FRAME_LENGTH = 417                  # 144 * 128000 / 44100
+
+
+def id3v23(**frames) -> bytes:
+    body = b""
+    for frame_id, text in frames.items():
+        payload = b"\x03" + text.encode()  # UTF-8
+        body += frame_id.encode() + struct.pack(">I", len(payload)) + b"\x00\x00" + payload
+    size = len(body)
+    syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+    return b"ID3\x03\x00\x00" + syncsafe + body
+
+def mp3(frames: int, xing: bool = False, **tags) -> bytes:
+    audio = [FRAME_HEADER + os.urandom(FRAME_LENGTH - 4) for _ in range(frames)]
+    if xing:  # Info header (frame count) in the first frame, after 32 bytes of side info
+        info = b"Info" + struct.pack(">II", 1, frames - 1)
+        audio[0] = FRAME_HEADER + b"\x00" * 32 + info + b"\x00" * (FRAME_LENGTH - 4 - 32 - len(info))
+    return id3v23(**tags) + b"".join(audio)
+
+
+def test_parse_frames_and_tags():
+    meta = mp3_metadata.analyze_bytes(mp3(100, TIT2="Delusion", TPE1="t+pazolite"))
+    assert meta["frames"] == 100 and meta["duration_sec"] == pytest.approx(100 * 1152 / 44100, abs=1e-3)
+    assert meta["bitrate_kbps"] == 128 and meta["sample_rate"] == 44100 and meta["channels"] == 2
+    assert meta["vbr"] is False
+    assert (meta["title"], meta["artist"], meta["album"]) == ("Delusion", "t+pazolite", None)
+
+    # The Info header is trusted without walking the frames
+    assert mp3_metadata.analyze_bytes(mp3(50, xing=True))["frames"] == 49
+
+    # ID3v1 at the end, garbage before the first frame
+    v1 = b"TAG" + b"Old Title".ljust(30, b"\x00") + b"Old Artist".ljust(30, b"\x00") + b"\x00" * 65
+    meta = mp3_metadata.analyze_bytes(b"\x00\xff\x01" + mp3(10)[10:] + v1)
+    assert meta["frames"] == 10 and (meta["title"], meta["artist"]) == ("Old Title", "Old Artist")
+
+    with pytest.raises(ValueError):
+        mp3_metadata.analyze_bytes(os.urandom(2048).replace(b"\xff", b"\x00"))
+
+
+def test_upload_analysis_is_written_to_tracks(client, db, wait_for):
+    content = mp3(200, TIT2="Analyzed")
+    sha256 = hashlib.sha256(content).hexdigest()
+    filename = f"{sha256}.mp3"
+    try:
+        assert client.post("/upload/audio", files={"file": ("a.mp3", content, "audio/mpeg")}).status_code == 200
+        assert wait_for(lambda: db.audio_metadata.find_one({"_id": sha256}) is not None)
+        analyzed = audio_analysis_service.STATS["analyzed"]
+
+        # Created after the upload (as the frontend does): the cached result is applied
+        created = client.post("/crud/tracks", json={"_id": "test_meta_t1", "title": "Analyzed",
+                                                    "duration_sec": 180, "audio_url": f"/static/audio/{filename}"})
+        assert created.status_code == 200
+        assert wait_for(lambda: "audio_meta" in db.tracks.find_one({"_id": "test_meta_t1"}))
+        track = client.get("/crud/tracks/by/_id/test_meta_t1").json()["document"]
+        assert track["duration_sec"] == 5  # 200 * 1152 / 44100 = 5.22
+        assert track["audio_meta"]["bitrate_kbps"] == 128 and track["audio_meta"]["sample_rate"] == 44100
+        assert track["audio_meta"]["sha256"] == sha256 and track["audio_meta"]["tags"]["title"] == "Analyzed"
+
+        # Without an _id (addAlbums.jsx): the track gets an ObjectId, the hook its string form
+        created = client.post("/crud/tracks", json={"title": "test_meta_oid", "duration_sec": 180,
+                                                    "audio_url": f"/static/audio/{filename}"})
+        assert created.status_code == 200
+        assert wait_for(lambda: "audio_meta" in db.tracks.find_one({"title": "test_meta_oid"}))
+        assert db.tracks.find_one({"title": "test_meta_oid"})["duration_sec"] == 5
+
+        # Uploading the same bytes again is not re-analyzed
+        client.post("/upload/audio", files={"file": ("b.mp3", content, "audio/mpeg")})
+        future = audio_analysis_service.submit(filename, sha256)
+        assert future.result(10)["_id"] == sha256
+        assert audio_analysis_service.STATS["analyzed"] == analyzed
+    finally:
+        db.tracks.delete_many({"$or": [{"_id": "test_meta_t1"}, {"title": "test_meta_oid"}]})
+        db.audio_metadata.delete_many({"_id": sha256})
+        audio_service.path_of(filename).unlink(missing_ok=True)
+    print("✓ AUDIO METADATA: parsed in the pool, cached by hash, written to tracks")
@@ -0,0 +1,58 @@
+# tests/test_audio_streaming.py
+"""
+Audio streaming: byte ranges, multi-range, ETag / If-None-Match / If-Range, cache headers.
+"""
+import io
+import os
+
+import pytest
+
+from app.services import audio_service
+
+
+@pytest.fixture
+def audio_file():
+    content = os.urandom(4096)
+    stored = audio_service.store(io.BytesIO(content), ".mp3")
+    yield stored, content
+    audio_service.path_of(stored["filename"]).unlink(missing_ok=True)
+
+
+def test_full_and_conditional(client, audio_file):
+    stored, content = audio_file
+    url = f"/static/audio/{stored['filename']}"
+    response = client.get(url)
+    assert response.status_code == 200 and response.content == content
+    assert response.headers["etag"] == f'"{stored["sha256"]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+
+    assert client.get(url, headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    head = client.head(url)
+    assert head.status_code == 200 and head.headers["content-length"] == str(len(content)) and head.content == b""
+    assert client.get("/static/audio/test_missing.mp3").status_code == 404
+
+
+def test_ranges(client, audio_file):
+    stored, content = audio_file
+    url = f"/static/audio/{stored['filename']}"
+    single = client.get(url, headers={"Range": "bytes=10-19"})
+    assert single.status_code == 206 and single.content == content[10:20]
+    assert single.headers["content-range"] == f"bytes 10-19/{len(content)}"
+    assert client.get(url, headers={"Range": "bytes=-5"}).content == content[-5:]
+
+    multi = client.get(url, headers={"Range": "bytes=0-4,100-104"})
+    assert multi.status_code == 206 and multi.headers["content-type"].startswith("multipart/byteranges")
+    assert int(multi.headers["content-length"]) == len(multi.content)
+    assert content[0:5] in multi.content and content[100:105] in multi.content
+    assert f"Content-Range: bytes 100-104/{len(content)}".encode() in multi.content
+
+    unsatisfiable = client.get(url, headers={"Range": "bytes=5000-"})
+    assert unsatisfiable.status_code == 416 and unsatisfiable.headers["content-range"] == f"bytes */{len(content)}"
+
+    # A stale If-Range (the file changed since) gets the whole file
+    stale = client.get(url, headers={"Range": "bytes=10-19", "If-Range": '"not-the-current-etag"'})
+    assert stale.status_code == 200 and stale.content == content
+    fresh = client.get(url, headers={"Range": "bytes=10-19", "If-Range": f'"{stored["sha256"]}"'})
+    assert fresh.status_code == 206
+    print("✓ AUDIO: ranges, validators, immutable caching")
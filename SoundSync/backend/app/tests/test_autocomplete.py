@@ -0,0 +1,62 @@
+# tests/test_autocomplete.py
+"""
+Typeahead: word-start keys, weighted ranking, maintained top-k and the /crud/autocomplete route.
+"""
+from app.services import autocomplete_service
+from app.services.autocomplete_service import PrefixIndex, label_keys
+
+PATH = "crud"
+
+
+def test_label_keys_are_word_starts():
+    assert label_keys("Chanson Française") == ["chanson francaise", "francaise"]
+    assert label_keys("t+pazolite") == ["t+pazolite", "pazolite"]
+
+
+def test_complete_ranks_by_weight_then_length():
+    index = PrefixIndex()
+    index.bulk_load([
+        ("tracks", "t1", "Jazz Night", 5.0),
+        ("tracks", "t2", "All That Jazz", 50.0),
+        ("genres", "g1", "Jazz", 100.0),
+        ("artists", "a1", "Jazzy", 100.0),
+        ("albums", "b1", "Rock", 20.0),
+    ])
+    assert [s["id"] for s in index.complete("jaz")] == ["g1", "a1", "t2", "t1"]
+    assert [s["id"] for s in index.complete("JAZ", types=["tracks"])] == ["t2", "t1"]
+    assert index.complete("zz") == []
+
+
+def test_top_k_is_maintained_on_writes(monkeypatch):
+    monkeypatch.setattr(autocomplete_service, "SCAN_LIMIT", 3)
+    monkeypatch.setattr(autocomplete_service, "TOP_K", 4)
+    monkeypatch.setattr(autocomplete_service, "MAX_LIMIT", 3)
+    index = PrefixIndex()
+    index.bulk_load([("tracks", f"t{i}", f"Song {i}", float(i)) for i in range(10)])
+    assert "so" in index._top                      # wide prefix: answered from its top-k
+
+    index.add("tracks", "t_new", "Sonic", 100.0)
+    index.add("tracks", "t9", "Renamed", 9.0)      # update = remove + add
+    index.remove("tracks", "t8")                   # truncated top-k falls below MAX_LIMIT: rescanned
+    assert [s["id"] for s in index.complete("so", 3)] == ["t_new", "t7", "t6"]
+    assert [s["id"] for s in index.complete("ren")] == ["t9"]
+
+
+def test_autocomplete_route(client, db):
+    db.artists.insert_one({"_id": "test_autocomplete_artist", "username": "Zéphyrine"})
+    assert client.post(f"/{PATH}/autocomplete/rebuild").status_code == 200
+
+    response = client.get(f"/{PATH}/autocomplete?prefix=zeph&types=artists")
+    assert response.status_code == 200
+    assert response.json()["suggestions"][0]["id"] == "test_autocomplete_artist"
+
+    # Writes through the API reach the index without a rebuild
+    client.post(f"/{PATH}/artists", json={"_id": "test_autocomplete_band", "username": "Zéphyr Band"})
+    ids = [s["id"] for s in client.get(f"/{PATH}/autocomplete?prefix=zeph").json()["suggestions"]]
+    assert "test_autocomplete_band" in ids
+    client.delete(f"/{PATH}/artists/by/test_autocomplete_band")
+    ids = [s["id"] for s in client.get(f"/{PATH}/autocomplete?prefix=zeph").json()["suggestions"]]
+    assert "test_autocomplete_band" not in ids
+
+    assert client.get(f"/{PATH}/autocomplete?prefix=z&types=bogus").status_code == 400
+    print("✓ AUTOCOMPLETE: word starts, weighted, kept current")
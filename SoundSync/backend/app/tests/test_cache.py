@@ -0,0 +1,137 @@
+# tests/test_cache.py
+"""
+Cache layer: local LRU tier, invalidation messages, stored format and single-flight.
+"""
+import asyncio
+import time
+import uuid
+
+from app.db import cache
+
+
+def test_local_cache_lru_eviction():
+    local = cache.LocalCache(max_entries=2, ttl=60)
+    evictions = cache.STATS["local"]["evictions"]
+    local.set("a", b"1")
+    local.set("b", b"2")
+    assert local.get("a") == b"1"      # "a" becomes most recently used
+    local.set("c", b"3")               # evicts "b"
+    assert local.get("b") is None
+    assert local.get("a") == b"1" and local.get("c") == b"3"
+    assert cache.STATS["local"]["evictions"] == evictions + 1
+
+
+def test_local_cache_ttl():
+    local = cache.LocalCache(max_entries=10, ttl=0.05)
+    local.set("k", b"v", ttl=300)      # capped by the local TTL
+    assert local.get("k") == b"v"
+    time.sleep(0.06)
+    assert local.get("k") is None
+
+
+def test_invalidation_message_drops_collection_entries():
+    cache.LOCAL.set("tracks:v3:x", b"1")
+    cache.LOCAL.set("tracks_archive:v1:x", b"2")
+    cache.LOCAL.set("users:v1:x", b"3")
+    cache._local_gens["tracks"] = (time.monotonic() + 60, b"3")
+
+    cache._drop_local("gen:tracks")
+    assert cache.LOCAL.get("tracks:v3:x") is None
+    assert "tracks" not in cache._local_gens
+    assert cache.LOCAL.get("tracks_archive:v1:x") == b"2"
+
+    cache._drop_local("pattern:users:*")
+    assert cache.LOCAL.get("users:v1:x") is None
+    cache.LOCAL.clear()
+
+
+def test_generation_read_across_an_invalidation_is_not_memoized(monkeypatch):
+    """A write invalidating the collection while a reader awaits the generation GET wins."""
+    monkeypatch.setattr(cache, "LOCAL_TIER_ENABLED", True)
+
+    class SlowRedis:
+        async def get(self, key):
+            await asyncio.sleep(0)
+            cache._drop_local("gen:test_epoch")  # a write on this worker, mid-GET
+            return b"1"
+
+    monkeypatch.setattr(cache, "get_async_redis_client", lambda: SlowRedis())
+    assert asyncio.run(cache._agen("test_epoch")) == b"1"
+    assert "test_epoch" not in cache._local_gens
+
+    epoch = cache._local_epochs.get("test_epoch", 0)
+    cache._remember_gen("test_epoch", b"2", epoch)
+    assert cache._local_gen("test_epoch") == b"2"
+    cache._drop_local("gen:test_epoch")
+
+
+def test_stored_format_round_trip():
+    small = {"items": [{"_id": "t1", "title": "Été"}], "total": 1}
+    stored = cache.encode_value(small)
+    assert stored[:1] == b"J" and not cache.is_compressed(stored)
+    assert cache.decode_value(stored) == small
+
+    large = {"items": [{"_id": f"t{i}", "title": "x" * 40} for i in range(100)]}
+    stored = cache.encode_value(large)
+    assert cache.is_compressed(stored)
+    assert cache.decode_value(stored) == large
+    assert cache.stored_payload(stored)[:2] == b"\x1f\x8b"   # gzip magic, sent as-is
+
+
+def test_legacy_plain_json_values():
+    assert cache.decode_value(b'{"a": 1}') == {"a": 1}
+    assert cache.stored_json(b'{"a": 1}') == b'{"a": 1}'
+
+
+def test_cache_stats_endpoint(client):
+    response = client.get("/crud/meta/cache_stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert {"local", "redis"} <= set(data)
+    assert {"hits", "misses", "evictions"} <= set(data["local"])
+
+
+def test_single_flight_coalesces_concurrent_misses():
+    key = f"test_single_flight:{uuid.uuid4().hex}"
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    async def burst():
+        return await asyncio.gather(*(cache.aget_or_compute(key, compute, ttl=30) for _ in range(20)))
+
+    results = asyncio.run(burst())
+    assert calls == 1
+    assert all(cache.decode_value(r) == {"value": 42} for r in results)
+
+
+def test_single_flight_survives_a_cancelled_leader():
+    key = f"test_single_flight:{uuid.uuid4().hex}"
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return {"value": 7}
+
+    async def leader_goes_away():
+        leader = asyncio.ensure_future(cache.aget_or_compute(key, compute, ttl=30))
+        await asyncio.sleep(0.01)  # the leader starts the computation
+        follower = asyncio.ensure_future(cache.aget_or_compute(key, compute, ttl=30))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # e.g. its client disconnected
+        return await follower
+
+    assert cache.decode_value(asyncio.run(leader_goes_away())) == {"value": 7}
+
+
+def test_single_flight_none_is_not_cached():
+    key = f"test_single_flight:{uuid.uuid4().hex}"
+
+    async def compute():
+        return None
+
+    assert asyncio.run(cache.aget_or_compute(key, compute, ttl=30)) is None
+    assert cache.get_cache_raw(key) is None
@@ -0,0 +1,69 @@
+# tests/test_charts.py
+"""
+Charts: forward-decayed scores in Redis sorted sets, per scope, and the top-N routes.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.db.redis import get_redis_client
+from app.services import charts_service
+
+TRACKS = [
+    {"_id": "test_chart_t0", "title": "Chart 0", "genre": "test_chart_genre", "artist_id": "test_chart_a0"},
+    {"_id": "test_chart_t1", "title": "Chart 1", "genre": "test_chart_genre", "artist_id": "test_chart_a1"},
+]
+
+
+@pytest.fixture
+def chart_tracks(client, db):
+    db.tracks.insert_many([dict(t) for t in TRACKS])
+    yield [t["_id"] for t in TRACKS]
+    redis = get_redis_client()
+    for key in redis.scan_iter(f"{charts_service.PREFIX}:*"):
+        if b"test_chart" in key:
+            redis.delete(key)
+        elif redis.type(key) == b"zset":
+            redis.zrem(key, *[t["_id"] for t in TRACKS])
+    redis.srem(f"{charts_service.PREFIX}:scopes", *[s for t in TRACKS for s in charts_service._scopes(t)[1:]])
+
+
+def test_scores_per_scope(chart_tracks):
+    t0, t1 = chart_tracks
+    assert asyncio.run(charts_service.record([(t0, "play", None), (t0, "play", None), (t1, "like", None),
+                                              ("test_chart_unknown", "play", None)])) == 3
+
+    genre = asyncio.run(charts_service.top("day", "genre:test_chart_genre", 10, now=time.time()))
+    assert [item["track_id"] for item in genre["items"]] == [t1, t0]  # a like weighs 3 plays
+    artist = asyncio.run(charts_service.top("week", "artist:test_chart_a0", 10, now=time.time()))
+    assert [item["track_id"] for item in artist["items"]] == [t0]
+
+
+def test_forward_decay(chart_tracks):
+    t0, _ = chart_tracks
+    now = time.time()
+    half_life = charts_service.WINDOWS["day"]["half_life"]
+    asyncio.run(charts_service.record([(t0, "play", now - half_life), (t0, "like", now - 30 * 3600)]))
+
+    day = asyncio.run(charts_service.top("day", "artist:test_chart_a0", 10, now=now))
+    assert day["items"][0]["score"] == pytest.approx(0.5, abs=1e-3)  # one half-life old; the like left the window
+    week = asyncio.run(charts_service.top("week", "artist:test_chart_a0", 10, now=now))
+    week_half_life = charts_service.WINDOWS["week"]["half_life"]
+    expected = 2 ** (-half_life / week_half_life) + 3 * 2 ** (-30 * 3600 / week_half_life)
+    assert week["items"][0]["score"] == pytest.approx(expected, abs=1e-3)
+
+
+def test_chart_routes(client, db, chart_tracks):
+    t0, _ = chart_tracks
+    asyncio.run(charts_service.record([(t0, "play", None)]))
+    response = client.get("/charts/day/artist/test_chart_a0")
+    assert response.status_code == 200
+    assert [item["track_id"] for item in response.json()["items"]] == [t0]
+    assert client.get("/charts/month").status_code == 404
+
+    taken = client.post("/charts/snapshot").json()
+    stored = db.chart_snapshots.find_one({"scope": "artist:test_chart_a0", "window": "day", "taken_at": taken["taken_at"]})
+    assert stored["items"][0]["track_id"] == t0
+    db.chart_snapshots.delete_many({"scope": {"$regex": "test_chart"}})
+    print("✓ CHARTS: decayed leaderboards in Redis")
@@ -348,6 +348,334 @@ def test_combined_filter_sort_projection(client, db):
     db.artists.delete_many({"_id": {"$regex": "^artist_combo_"}})
 
 
+# ==========================================
+# TEST: KEYSET PAGINATION
+# ==========================================
+
+def test_get_all_keyset_pagination(client, db):
+    """Walk a filtered collection with the `after` cursor and a compound sort."""
+
+    tracks = [
+        {"_id": f"test_keyset_{i:02d}", "title": f"Song {i}", "genre": "Keyset", "popularity": i % 4}
+        for i in range(7)
+    ]
+    db.tracks.insert_many(tracks)
+    expected = [t["_id"] for t in sorted(tracks, key=lambda t: (-t["popularity"], t["_id"]))]
+
+    filter_param = quote(json.dumps({"genre": "Keyset"}))
+    sort_param = quote(json.dumps([["popularity", -1], ["_id", 1]]))
+    projection_param = quote(json.dumps({"title": 1}))
+
+    seen, after, pages, first_token = [], "", 0, None
+    while after is not None:
+        response = client.get(
+            f"/{PATH}/tracks?filter={filter_param}&sort={sort_param}&projection={projection_param}"
+            f"&limit=3&after={quote(after)}"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert all("popularity" not in item for item in data["items"])
+        seen += [item["_id"] for item in data["items"]]
+        after = data["next_after"]
+        first_token = first_token or after
+        pages += 1
+
+    assert seen == expected
+    assert pages == 3
+    print("✓ KEYSET: cursor walk returns every document once, in order")
+
+    # A cursor from another sort is rejected
+    other_sort = quote(json.dumps([["title", 1]]))
+    response = client.get(f"/{PATH}/tracks?sort={other_sort}&after={quote(first_token)}")
+    assert response.status_code == 400
+
+
+def test_get_all_keyset_descending_with_nulls(client, db):
+    """Null and missing sort values come last in a descending walk, and are not skipped."""
+    tracks = [{"_id": f"test_keynull_{i}", "genre": "KeysetNull", "popularity": i} for i in range(5)]
+    tracks += [{"_id": "test_keynull_none", "genre": "KeysetNull", "popularity": None},
+               {"_id": "test_keynull_missing", "genre": "KeysetNull"}]
+    db.tracks.insert_many(tracks)
+
+    filter_param = quote(json.dumps({"genre": "KeysetNull"}))
+    sort_param = quote(json.dumps([["popularity", -1]]))
+    seen, after = [], ""
+    while after is not None:
+        response = client.get(f"/{PATH}/tracks?filter={filter_param}&sort={sort_param}&limit=2&after={quote(after)}")
+        assert response.status_code == 200
+        data = response.json()
+        seen += [item["_id"] for item in data["items"]]
+        after = data["next_after"]
+
+    assert sorted(seen) == sorted(t["_id"] for t in tracks)
+    assert len(seen) == len(tracks)
+    assert seen[:5] == [f"test_keynull_{i}" for i in range(4, -1, -1)]
+
+
+def test_get_all_keyset_keeps_projected_sibling_subfields(client, db):
+    """A sort field forced into an inclusive projection is stripped alone, not its parent."""
+    db.tracks.insert_many([{"_id": f"test_keysub_{i}", "title": f"Sub {i}", "genre": "KeysetSub",
+                            "stats": {"plays": 10 * i, "likes": i}} for i in range(5)])
+    filter_param = quote(json.dumps({"genre": "KeysetSub"}))
+    sort_param = quote(json.dumps([["stats.likes", -1]]))
+
+    for projection, expected in (({"stats.plays": 1}, lambda i: {"stats": {"plays": 10 * i}}),
+                                 ({"title": 1}, lambda i: {"title": f"Sub {i}"})):
+        projection_param = quote(json.dumps(projection))
+        seen, after = [], ""
+        while after is not None:
+            response = client.get(f"/{PATH}/tracks?filter={filter_param}&sort={sort_param}"
+                                  f"&projection={projection_param}&limit=2&after={quote(after)}")
+            assert response.status_code == 200
+            data = response.json()
+            seen += data["items"]
+            after = data["next_after"]
+        assert seen == [{"_id": f"test_keysub_{i}", **expected(i)} for i in range(4, -1, -1)]
+
+
+# ==========================================
+# TEST: COUNT STRATEGIES
+# ==========================================
+
+@pytest.mark.parametrize("count_mode", ["exact", "estimated", "cached", "facet", "none"])
+def test_get_all_count_modes(client, db, count_mode):
+    """Every count mode returns the same page; 'total' is exact except for 'none'."""
+
+    tracks = [{"_id": f"test_countmode_{i}", "title": f"Song {i}", "genre": "CountMode", "popularity": i} for i in range(4)]
+    db.tracks.insert_many(tracks)
+
+    filter_param = quote(json.dumps({"genre": "CountMode"}))
+    sort_param = quote(json.dumps([["popularity", -1]]))
+    response = client.get(f"/{PATH}/tracks?filter={filter_param}&sort={sort_param}&skip=1&limit=2&count={count_mode}")
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["_id"] for item in data["items"]] == ["test_countmode_2", "test_countmode_1"]
+    # With a filter, "estimated" falls back to an exact count
+    assert data["total"] == (None if count_mode == "none" else 4)
+    print(f"✓ COUNT MODE: {count_mode}")
+
+
+def test_get_all_invalid_count_mode(client):
+    response = client.get(f"/{PATH}/tracks?count=guess")
+    assert response.status_code == 422
+
+
+# ==========================================
+# TEST: INDEX ADVISOR
+# ==========================================
+
+def test_index_advice_reports_unindexed_shape(client, db):
+    """A filter on an unindexed field shows up in the advisor with a suggested index."""
+
+    db.tracks.insert_one({"_id": "test_advice_1", "title": "Advice", "mood": "calm"})
+    filter_param = quote(json.dumps({"mood": "calm"}))
+    response = client.get(f"/{PATH}/tracks?filter={filter_param}&limit=7")
+    assert response.status_code == 200
+
+    response = client.get(f"/{PATH}/meta/index_advice")
+    assert response.status_code == 200
+    shapes = [s for s in response.json()["shapes"] if s["collection"] == "tracks" and s["equality"] == ["mood"]]
+    assert shapes and shapes[0]["count"] >= 1
+    assert shapes[0]["supported"] is False
+    assert shapes[0]["suggested_index"] == [["mood", 1]]
+    print("✓ ADVISOR: unindexed filter reported")
+
+
+def test_reconcile_indexes_tolerates_a_concurrent_drop(monkeypatch):
+    """Workers starting together race on dropping a stale index: the loser carries on."""
+    from pymongo.errors import OperationFailure
+    from app.db import indexes
+
+    class Collection:
+        def index_information(self):
+            return {"_id_": {"key": [("_id", 1)]}, "ss_stale_1": {"key": [("stale", 1)]}}
+
+        def drop_index(self, name):
+            raise OperationFailure("index not found with name [ss_stale_1]", code=indexes.INDEX_NOT_FOUND)
+
+        def create_indexes(self, models):
+            return [model.document["name"] for model in models]
+
+    monkeypatch.setattr(indexes, "MC", {collection: Collection() for collection in indexes.INDEX_SPECS})
+    report = indexes.reconcile_indexes(force=True)
+    assert report["tracks"]["dropped"] == ["ss_stale_1"]
+    assert set(report["tracks"]["created"]) == {indexes.index_name(keys) for keys in indexes.INDEX_SPECS["tracks"]}
+
+
+# ==========================================
+# TEST: BULK WRITE
+# ==========================================
+
+def test_bulk_write_mixed_operations(client, db):
+    """Insert, update and delete in one request, with per-operation results."""
+
+    db.tracks.insert_many([
+        {"_id": "test_bulk_1", "title": "Keep"},
+        {"_id": "test_bulk_2", "title": "Drop"},
+    ])
+    operations = [
+        {"op": "insert", "document": {"_id": "test_bulk_3", "title": "New"}},
+        {"op": "insert", "document": {"_id": "test_bulk_1", "title": "Duplicate"}},
+        {"op": "update", "id": "test_bulk_1", "updates": {"title": "Kept"}},
+        {"op": "delete", "id": "test_bulk_2"},
+        {"op": "delete", "id": "test_bulk_missing"},
+        {"op": "upsert", "id": "test_bulk_1"},
+    ]
+    response = client.post(f"/{PATH}/tracks/bulk", json={"operations": operations})
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["status"] for r in data["results"]] == ["ok", "error", "ok", "ok", "not_found", "error"]
+    assert (data["inserted"], data["modified"], data["deleted"], data["errors"]) == (1, 1, 1, 2)
+
+    assert db.tracks.find_one({"_id": "test_bulk_1"})["title"] == "Kept"
+    assert db.tracks.find_one({"_id": "test_bulk_2"}) is None
+    assert db.tracks.find_one({"_id": "test_bulk_3"}) is not None
+    print("✓ BULK: mixed batch applied")
+
+    response = client.post(f"/{PATH}/tracks/bulk", json={"operations": []})
+    assert response.status_code == 400
+
+
+def test_bulk_write_updates_and_deletes_what_the_batch_inserted(client, db):
+    """An update or delete of a document inserted earlier in the batch is applied and counted."""
+    db.tracks.insert_one({"_id": "test_bulk_liked", "title": "Liked", "like_count": 0})
+    like = {"target_type": "track", "target_id": "test_bulk_liked", "user_id": "test_bulk_u"}
+    operations = [
+        {"op": "insert", "document": {"_id": "test_bulk_like_1", **like}},
+        {"op": "insert", "document": {"_id": "test_bulk_like_2", **like}},
+        {"op": "update", "id": "test_bulk_like_1", "updates": {"user_id": "test_bulk_u2"}},
+        {"op": "delete", "id": "test_bulk_like_2"},
+    ]
+    try:
+        data = client.post(f"/{PATH}/likes/bulk", json={"operations": operations}).json()
+        assert [r["status"] for r in data["results"]] == ["ok", "ok", "ok", "ok"]
+        assert db.likes.find_one({"_id": "test_bulk_like_1"})["user_id"] == "test_bulk_u2"
+        assert db.likes.find_one({"_id": "test_bulk_like_2"}) is None
+        assert db.tracks.find_one({"_id": "test_bulk_liked"})["like_count"] == 1
+    finally:
+        db.likes.delete_many({"_id": {"$regex": "^test_bulk_like"}})
+
+
+# ==========================================
+# TEST: NDJSON EXPORT
+# ==========================================
+
+def test_export_ndjson_streams_past_max_limit(client, db):
+    """Export returns every matching document, one JSON object per line, beyond MAX_LIMIT."""
+
+    tracks = [{"_id": f"test_export_{i:03d}", "title": f"Song {i}", "genre": "Export"} for i in range(250)]
+    db.tracks.insert_many(tracks)
+
+    filter_param = quote(json.dumps({"genre": "Export"}))
+    projection_param = quote(json.dumps({"title": 1}))
+    response = client.get(f"/{PATH}/tracks/export?filter={filter_param}&projection={projection_param}&batch_size=50")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 250
+    assert set(rows[0]) == {"_id", "title"}
+    print("✓ EXPORT: 250 rows streamed")
+
+
+# ==========================================
+# TEST: CACHE INVALIDATION
+# ==========================================
+
+def test_write_invalidates_cached_list(client, db):
+    """A write moves the collection to a new cache generation: cached lists are not served again."""
+
+    db.tracks.insert_one({"_id": "test_cache_gen_1", "title": "Before", "genre": "CacheGen"})
+    filter_param = quote(json.dumps({"genre": "CacheGen"}))
+
+    # Warm the cache
+    response = client.get(f"/{PATH}/tracks?filter={filter_param}")
+    assert response.status_code == 200
+    assert response.json()["items"][0]["title"] == "Before"
+
+    # Update through the API -> generation bump
+    response = client.put(f"/{PATH}/tracks/by/test_cache_gen_1", json={"title": "After"})
+    assert response.status_code == 200
+
+    response = client.get(f"/{PATH}/tracks?filter={filter_param}")
+    assert response.status_code == 200
+    assert response.json()["items"][0]["title"] == "After"
+    print("✓ CACHE: list refreshed after update")
+
+
+# ==========================================
+# TEST: MULTI-GET
+# ==========================================
+
+def test_get_by_ids_keeps_request_order(client, db):
+    """by_ids returns documents in the requested order (cached or not) and lists unknown ids."""
+
+    db.tracks.insert_many([{"_id": f"test_by_ids_{i}", "title": f"Song {i}"} for i in range(3)])
+
+    # One of them already cached through the single-document route
+    assert client.get(f"/{PATH}/tracks/by/_id/test_by_ids_1").status_code == 200
+
+    ids = "test_by_ids_2,test_by_ids_1,test_by_ids_unknown,test_by_ids_0"
+    for _ in range(2):  # second call: everything from the cache
+        response = client.get(f"/{PATH}/tracks/by_ids?ids={ids}")
+        assert response.status_code == 200
+        data = response.json()
+        assert [d["_id"] for d in data["documents"]] == ["test_by_ids_2", "test_by_ids_1", "test_by_ids_0"]
+        assert data["missing"] == ["test_by_ids_unknown"]
+    print("✓ BY_IDS: ordered documents + missing ids")
+
+
+# ==========================================
+# TEST: REFERENCE EXPANSION
+# ==========================================
+
+def test_expand_playlist_tracks_and_artists(client, db):
+    """expand resolves nested references in one call; unknown paths are rejected."""
+
+    db.artists.insert_one({"_id": "test_expand_artist", "username": "Expander"})
+    db.tracks.insert_many([
+        {"_id": f"test_expand_track_{i}", "title": f"Song {i}", "artist_id": "test_expand_artist"} for i in range(3)
+    ])
+    db.playlists.insert_one({"_id": "test_expand_pl", "name": "Expand",
+                             "tracks": ["test_expand_track_2", "test_expand_track_0", "test_expand_missing"]})
+
+    response = client.get(f"/{PATH}/playlists/by/_id/test_expand_pl?expand=tracks,tracks.artist_id")
+    assert response.status_code == 200
+    tracks = response.json()["document"]["tracks"]
+    assert [t["_id"] for t in tracks[:2]] == ["test_expand_track_2", "test_expand_track_0"]
+    assert tracks[0]["artist_id"]["username"] == "Expander"
+    assert tracks[2] == "test_expand_missing"   # unresolved ids are left as they are
+
+    response = client.get(f"/{PATH}/playlists/by/_id/test_expand_pl?expand=nope")
+    assert response.status_code == 400
+    print("✓ EXPAND: playlist -> tracks -> artist")
+
+
+# ==========================================
+# TEST: COUNTERS
+# ==========================================
+
+def test_like_counter_follows_likes(client, db):
+    """Creating / deleting a like through the API $inc's the track's like_count; reconcile repairs drift."""
+
+    if "likes" not in db.list_collection_names():
+        db.create_collection("likes")
+    db.tracks.insert_one({"_id": "test_counter_track", "title": "Counted", "like_count": 0})
+    like = {"_id": "test_counter_like", "user_id": "test_user", "target_type": "track", "target_id": "test_counter_track"}
+
+    assert client.post(f"/{PATH}/likes", json=like).status_code == 200
+    assert db.tracks.find_one({"_id": "test_counter_track"})["like_count"] == 1
+
+    db.tracks.update_one({"_id": "test_counter_track"}, {"$set": {"like_count": 7}})  # drift
+    response = client.post(f"/{PATH}/meta/reconcile_counters?source=likes")
+    assert response.status_code == 200
+    assert db.tracks.find_one({"_id": "test_counter_track"})["like_count"] == 1
+
+    assert client.delete(f"/{PATH}/likes/by/test_counter_like").status_code == 200
+    assert db.tracks.find_one({"_id": "test_counter_track"})["like_count"] == 0
+    print("✓ COUNTERS: like_count follows likes")
+
+
 # ==========================================
 # RUN ALL TESTS
 # ==========================================
@@ -0,0 +1,90 @@
+# tests/test_jobs.py
+"""
+Background jobs: queue, status / progress, deduplication, failures, recovery of dead workers.
+"""
+import threading
+import time
+
+from app.db import crud
+from app.db.seed import iter_json_array
+from app.services import jobs_service as jobs
+
+release = threading.Event()
+
+
+@jobs.job("test_steps")
+def steps(ctx, n: int = 3, fail: bool = False):
+    for i in range(n):
+        ctx.progress((i + 1) / n, f"step {i + 1}")
+    release.wait(5)
+    if fail:
+        raise RuntimeError("step failed")
+    return {"steps": n}
+
+
+def wait_done(client, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while (job := client.get(f"/jobs/{job_id}").json())["status"] in jobs.ACTIVE and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return job
+
+
+def test_job_lifecycle(client):
+    release.clear()
+    response = client.post("/jobs/test_steps", json={"n": 4})
+    assert response.status_code == 202
+    job = response.json()["job"]
+    assert response.headers["location"] == f"/jobs/{job['id']}" and job["status"] in ("queued", "running")
+
+    # Same kind and params while it is active: the same job comes back
+    again = client.post("/jobs/test_steps", json={"n": 4}).json()["job"]
+    assert again["id"] == job["id"] and again["deduplicated"] is True
+
+    release.set()
+    done = wait_done(client, job["id"])
+    assert done["status"] == "succeeded" and done["result"] == {"steps": 4}
+    assert done["progress"] == 1 and done["message"] == "step 4" and done["attempts"] == 1
+    assert job["id"] in [j["id"] for j in client.get("/jobs").json()["jobs"]]
+
+    # Finished: a new submission is a new job
+    assert client.post("/jobs/test_steps", json={"n": 4}).json()["job"]["id"] != job["id"]
+
+
+def test_job_errors(client):
+    assert client.post("/jobs/test_no_such_job").status_code == 404
+    assert client.post("/jobs/test_steps", json={"unknown": 1}).status_code == 400
+    assert client.post("/jobs/reindex", json={"targets": ["nope"]}).status_code == 202  # checked when run
+    assert client.get("/jobs/test_missing_id").status_code == 404
+
+    release.set()
+    failed = wait_done(client, client.post("/jobs/test_steps", json={"fail": True}).json()["job"]["id"])
+    assert failed["status"] == "failed" and "step failed" in failed["error"]
+
+
+def test_dead_worker_job_is_requeued(client):
+    # A worker of a crashed process (no heartbeat for its instance) was running this job
+    release.set()
+    job_id, running = "test_dead_job", jobs._running_key("test-dead-instance:0")
+    jobs.REDIS.hset(jobs._job_key(job_id), mapping={"id": job_id, "kind": "test_steps", "params": '{"n": 2}',
+                                                    "status": "running", "progress": 0.5, "attempts": 1})
+    jobs.REDIS.lpush(running, job_id)
+    try:
+        jobs.REDIS.delete(f"{jobs.PREFIX}:recovering")
+        assert jobs.recover() >= 1 and not jobs.REDIS.exists(running)
+        done = wait_done(client, job_id)
+        assert done["status"] == "succeeded" and done["attempts"] == 2
+    finally:
+        jobs.REDIS.delete(jobs._job_key(job_id), running)
+    print("✓ JOBS: queued, deduplicated, progress, failures, recovery")
+
+
+def test_exclusive_jobs_run_in_submission_order(client, scratch_db):
+    """clean_db then init_db (the documented reset): the drop never lands in the middle of the load."""
+    cleaned = client.post("/api/clean_db").json()["job"]
+    seeded = client.post("/api/init_db?batch_size=2").json()["job"]
+    assert "init_db" in jobs.EXCLUSIVE and "clean_db" in jobs.EXCLUSIVE
+    cleaned, seeded = wait_done(client, cleaned["id"], 60), wait_done(client, seeded["id"], 60)
+    assert cleaned["status"] == seeded["status"] == "succeeded"
+    assert cleaned["finished_at"] <= seeded["started_at"]
+    for key, path in crud.PATHS.items():
+        assert scratch_db[key.lower()].count_documents({}) == sum(1 for _ in iter_json_array(path))
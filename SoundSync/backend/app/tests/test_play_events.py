@@ -0,0 +1,65 @@
+# tests/test_play_events.py
+"""
+Play event ingestion: buffered, batched writes to `plays`, counters, backpressure.
+"""
+import time
+
+from app.db import cache
+from app.services import play_events_service
+
+
+def test_play_events_are_flushed(client, db, wait_for):
+    db.tracks.insert_one({"_id": "test_play_t0", "title": "Played", "play_count": 0})
+    try:
+        single = client.post("/events/play", json={"track_id": "test_play_t0", "user_id": "test_play_u1"})
+        assert single.status_code == 202 and single.json()["accepted"] == 1
+        batch = client.post("/events/play", json={"events": [
+            {"track_id": "test_play_t0", "played_at": "2025-10-10T12:05:00+02:00", "ms_played": 30000},
+            {"track_id": "test_play_t0", "unknown_field": "dropped"},
+        ]})
+        assert batch.json()["accepted"] == 2
+
+        assert wait_for(lambda: db.plays.count_documents({"track_id": "test_play_t0"}) == 3)
+        assert wait_for(lambda: db.tracks.find_one({"_id": "test_play_t0"})["play_count"] == 3)
+        stored = db.plays.find_one({"track_id": "test_play_t0", "ms_played": 30000})
+        assert stored["played_at"] == "2025-10-10T10:05:00.000Z"  # normalized to UTC
+        assert "unknown_field" not in db.plays.find_one({"track_id": "test_play_t0", "user_id": {"$exists": False},
+                                                         "ms_played": {"$exists": False}})
+    finally:
+        db.plays.delete_many({"track_id": "test_play_t0"})
+
+
+def test_flush_keeps_the_tracks_cache_generation(client, db, monkeypatch, wait_for):
+    refresh_key = f"{play_events_service.TRACKS_REFRESH_KEY}:test"
+    monkeypatch.setattr(play_events_service, "TRACKS_REFRESH_KEY", refresh_key)
+    cache.REDIS.set(refresh_key, 1, ex=60)  # refreshed within the interval, by this or another worker
+    db.tracks.insert_one({"_id": "test_play_t1", "title": "Played", "play_count": 0})
+    key = cache.collection_key("tracks", "test_play_t1")
+    try:
+        assert client.post("/events/play", json={"track_id": "test_play_t1"}).status_code == 202
+        assert wait_for(lambda: db.tracks.find_one({"_id": "test_play_t1"})["play_count"] == 1)
+        assert wait_for(lambda: play_events_service.depth() == 0)
+        time.sleep(2 * play_events_service.FLUSH_INTERVAL)
+        assert cache.collection_key("tracks", "test_play_t1") == key
+
+        cache.REDIS.delete(refresh_key)  # interval over: the pending refresh goes through
+        assert wait_for(lambda: cache.collection_key("tracks", "test_play_t1") != key)
+    finally:
+        cache.REDIS.delete(refresh_key)
+        db.plays.delete_many({"track_id": "test_play_t1"})
+
+
+def test_play_events_validation_and_backpressure(client, monkeypatch):
+    assert client.post("/events/play", json={"user_id": "test_play_u1"}).status_code == 400
+    assert client.post("/events/play", json={"events": [{"track_id": "t", "played_at": "yesterday"}]}).status_code == 400
+    assert client.post("/events/play", json={"track_id": "t", "played_at": "2999-01-01T00:00:00Z"}).status_code == 400
+    assert play_events_service.normalize_played_at("2025-10-10") == "2025-10-10T00:00:00.000Z"
+    assert play_events_service.normalize_played_at("2025-10-10T10:05:00") == "2025-10-10T10:05:00.000Z"
+
+    monkeypatch.setattr(play_events_service, "MAX_BATCH", 2)
+    assert client.post("/events/play", json={"events": [{"track_id": "t"}] * 3}).status_code == 413
+
+    monkeypatch.setattr(play_events_service, "MAX_QUEUE", 0)
+    rejected = client.post("/events/play", json={"track_id": "test_play_t0"})
+    assert rejected.status_code == 503 and "Retry-After" in rejected.headers
+    print("✓ PLAY EVENTS: batched ingestion with backpressure")
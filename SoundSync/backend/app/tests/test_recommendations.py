@@ -0,0 +1,106 @@
+# tests/test_recommendations.py
+"""
+Recommendations: sorted score rows, co-occurrence model, incremental refresh and the routes.
+"""
+import asyncio
+
+import numpy as np
+
+from app.services import recommendation_service
+from app.services.recommendation_service import CoOccurrenceModel, Rows
+
+
+def test_rows_top_k_and_replace():
+    rows, left_out = Rows.top_k(np.array([0, 0, 0, 2]), np.array([5, 6, 7, 1]), np.array([0.1, 0.9, 0.5, 0.3]), 3, 2)
+    assert rows.row(0, 10)[0].tolist() == [6, 7]      # best first, cut at k
+    assert rows.row(1, 10)[0].tolist() == []
+    assert left_out.tolist() == [np.float32(0.1), 0, 0]  # best score cut from each row
+    replaced = rows.replace(np.array([1]), Rows.top_k(np.array([0]), np.array([4]), np.array([1.0]), 1, 2)[0])
+    assert [replaced.row(i, 10)[0].tolist() for i in range(3)] == [[6, 7], [4], [1]]
+
+    matrix = rows.as_csr(8)
+    assert Rows.top_k_csr(matrix, 1)[0].row(0, 10)[0].tolist() == [6]
+    assert Rows.top_k_csr(matrix, 1)[1].tolist() == [np.float32(0.5), 0, 0]
+
+
+def test_model_similar_and_user_tracks():
+    model = CoOccurrenceModel()
+    model.load([
+        ("playlist:p1", "u1", ["a", "b", "c"]),
+        ("playlist:p2", "u2", ["a", "b"]),
+        ("likes:u3", "u3", ["a"]),
+        ("likes:u3", "u3", ["d"]),                     # same basket from a second source
+    ])
+    similar = model.similar_tracks("a", 10)
+    assert [t for t, _ in similar] == ["b", "c", "d"]  # b: 2 co-occurrences, c and d: 1
+    assert similar[0][1] == round(2 / np.sqrt(3 * 2), 4)
+    assert model.similar_tracks("zzz", 10) is None
+
+    tracks, fallback = model.user_tracks("u2", 10)
+    assert not fallback and tracks[0][0] in ("c", "d")  # never a track the user already has
+    assert "a" not in [t for t, _ in tracks] and "b" not in [t for t, _ in tracks]
+    assert model.user_tracks("nobody", 2) == ([("a", 0.0), ("b", 0.0)], True)
+
+
+def test_incremental_refresh_matches_rebuild():
+    baskets = {"playlist:p1": ("u1", ["a", "b"]), "playlist:p2": ("u2", ["b", "c"])}
+    model = CoOccurrenceModel()
+    model.load((key, owner, tracks) for key, (owner, tracks) in baskets.items())
+
+    baskets["playlist:p3"] = ("u1", ["c", "d", "a"])
+    baskets["playlist:p2"] = ("u2", ["c"])
+    for key in ("playlist:p3", "playlist:p2"):
+        model.set_basket(key, *baskets[key])
+    assert model.refresh()["baskets"] == 2
+
+    fresh = CoOccurrenceModel()
+    fresh.load((key, owner, tracks) for key, (owner, tracks) in baskets.items())
+    for track in ("a", "b", "c", "d"):
+        assert model.similar_tracks(track, 10) == fresh.similar_tracks(track, 10)
+    assert model.user_tracks("u2", 10) == fresh.user_tracks("u2", 10)
+
+
+def test_recommendation_routes(client, db):
+    db.tracks.insert_many([{"_id": f"test_rec_t{i}", "title": f"Rec {i}"} for i in range(3)])
+    db.playlists.insert_one({"_id": "test_rec_p1", "user_id": "test_rec_u1", "tracks": ["test_rec_t0", "test_rec_t1"]})
+    assert client.post("/recommendations/rebuild").status_code == 200
+
+    response = client.get("/recommendations/track/test_rec_t0")
+    assert response.status_code == 200
+    assert [item["_id"] for item in response.json()["items"]] == ["test_rec_t1"]
+
+    # A playlist edit through the API reaches the model on the next refresh
+    client.put("/crud/playlists/by/test_rec_p1", json={"tracks": ["test_rec_t0", "test_rec_t2"]})
+    client.post("/recommendations/refresh")
+    items = client.get("/recommendations/track/test_rec_t0").json()["items"]
+    assert [item["_id"] for item in items] == ["test_rec_t2"]
+
+    assert client.get("/recommendations/track/test_rec_unknown").status_code == 404
+    assert client.get("/recommendations/user/test_rec_nobody").json()["fallback"] is True
+    print("✓ RECOMMENDATIONS: co-occurrence, kept current")
+
+
+def test_like_hook_defers_the_basket_to_the_refresher(client, db, monkeypatch):
+    """A like write only marks its user: the request does no read, refresh() re-reads the basket."""
+    db.tracks.insert_many([{"_id": f"test_rec_l{i}", "title": f"Rec {i}"} for i in range(2)])
+    assert client.post("/recommendations/rebuild").status_code == 200
+
+    class NoReads:
+        def __getattr__(self, name):
+            raise AssertionError("the write hook read MongoDB")
+
+    like = {"_id": "test_rec_like1", "user_id": "test_rec_u9", "target_type": "track", "target_id": "test_rec_l1"}
+    with monkeypatch.context() as m:
+        m.setattr(recommendation_service, "MC", NoReads())
+        asyncio.run(recommendation_service.on_write("likes", "insert", like["_id"], like))
+    assert "test_rec_u9" in recommendation_service._dirty_users
+
+    try:
+        db.users.insert_one({"_id": "test_rec_u9", "liked_tracks": ["test_rec_l0"]})
+        db.likes.insert_one(like)
+        client.post("/recommendations/refresh")
+        assert not recommendation_service._dirty_users
+        items = client.get("/recommendations/track/test_rec_l0").json()["items"]
+        assert [item["_id"] for item in items] == ["test_rec_l1"]
+    finally:
+        db.likes.delete_many({"_id": {"$regex": "^test_"}})
@@ -0,0 +1,63 @@
+# tests/test_search.py
+"""
+Full-text search: folding, BM25 ranking, index maintenance and the /crud/search route.
+"""
+from app.services import search_service
+from app.services.search_service import SearchIndex, fold, tokenize
+
+PATH = "crud"
+
+
+def test_fold_and_tokenize():
+    assert fold("Chanson Française") == "chanson francaise"
+    assert tokenize("Électro-Cœur, t+pazolite!") == ["electro", "coeur", "t", "pazolite"]
+    assert tokenize(None) == []
+
+
+def test_index_ranks_weighted_fields_first():
+    index = SearchIndex({"username": 2.0, "biography": 1.0})
+    index.add("a1", {"username": "Jazz Cat", "biography": "plays rock"})
+    index.add("a2", {"username": "Rocker", "biography": "jazz and rock"})
+    index.add("a3", {"username": "Nobody", "biography": "électronique"})
+
+    total, hits = index.search(tokenize("jazz"))
+    assert total == 2
+    assert [doc_id for doc_id, _ in hits] == ["a1", "a2"]
+    assert index.search(tokenize("electronique"))[1][0][0] == "a3"
+
+
+def test_index_update_remove_and_compaction(monkeypatch):
+    monkeypatch.setattr(search_service, "COMPACT_MIN_DEAD", 3)
+    index = SearchIndex({"title": 1.0})
+    for i in range(6):
+        index.add(f"t{i}", {"title": f"song {i}"})
+    index.add("t0", {"title": "renamed"})      # re-index = tombstone + new entry
+    index.remove("t1")
+    index.remove("t2")                          # crosses the compaction threshold
+
+    assert index.stats()["tombstones"] == 0
+    assert len(index) == 4
+    total, hits = index.search(["song"], limit=10)
+    assert total == 3 and {doc_id for doc_id, _ in hits} == {"t3", "t4", "t5"}
+    assert index.search(["renamed"])[1][0][0] == "t0"
+    assert index.search(["song"], skip=2, limit=10)[1] == hits[2:]
+
+
+def test_search_route(client, db):
+    db.artists.insert_one({"_id": "test_search_artist", "username": "Zéphyrine",
+                           "biography": "Chanteuse de variété française"})
+    assert client.post(f"/{PATH}/search/rebuild").status_code == 200
+
+    response = client.get(f"/{PATH}/search?q=zephyrine variete&types=artists")
+    assert response.status_code == 200
+    artists = response.json()["results"]["artists"]
+    assert artists["items"][0]["_id"] == "test_search_artist"
+    assert artists["items"][0]["_score"] > 0
+
+    # Writes through the API reach the index without a rebuild
+    client.put(f"/{PATH}/artists/by/test_search_artist", json={"username": "Renamed"})
+    response = client.get(f"/{PATH}/search?q=zephyrine&types=artists")
+    assert response.json()["results"]["artists"]["total"] == 0
+
+    assert client.get(f"/{PATH}/search?q=x&types=bogus").status_code == 400
+    print("✓ SEARCH: ranked, accent-insensitive, kept current")
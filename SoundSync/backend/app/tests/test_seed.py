@@ -0,0 +1,59 @@
+# tests/test_seed.py
+"""
+Streaming seed loader: incremental JSON array parsing and batching.
+"""
+import json
+import time
+import pytest
+
+from app.db import seed
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 64 * 1024])
+def test_iter_json_array_matches_json_load(tmp_path, chunk_size):
+    """Items come out identical to json.load whatever the read chunk size."""
+    data = [
+        {"_id": "a", "text": "Je T'emmène au vent ]}", "tags": ["x", {"y": None}]},
+        123456789,
+        "plain",
+        [],
+        {"_id": "b", "nested": {"deep": [1, 2.5, True]}},
+    ]
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    assert list(seed.iter_json_array(str(path), chunk_size=chunk_size)) == data
+
+
+@pytest.mark.parametrize("content", ["", "[]", "  [ ]  "])
+def test_iter_json_array_empty(tmp_path, content):
+    path = tmp_path / "empty.json"
+    path.write_text(content)
+    assert list(seed.iter_json_array(str(path))) == []
+
+
+@pytest.mark.parametrize("content", ['{"a": 1}', "[1 2]", "[1,"])
+def test_iter_json_array_rejects_malformed(tmp_path, content):
+    path = tmp_path / "bad.json"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        list(seed.iter_json_array(str(path), chunk_size=2))
+
+
+def test_iter_batches():
+    assert list(seed.iter_batches(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_init_db_reports_throughput(client, scratch_db):
+    """init_db is a background job loading every seed collection; its result has per-collection stats."""
+    response = client.post("/api/init_db?batch_size=2&workers=3")
+    assert response.status_code == 202
+    status_url = response.json()["status_url"]
+    deadline = time.monotonic() + 60
+    while (job := client.get(status_url).json())["status"] in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert job["status"] == "succeeded" and job["progress"] == 1
+    stats = job["result"]["collections"]
+    assert stats["tracks"]["documents"] == scratch_db.tracks.count_documents({})
+    assert stats["tracks"]["batches"] == -(-stats["tracks"]["documents"] // 2)
+    assert "docs_per_sec" in stats["users"]
@@ -0,0 +1,76 @@
+# tests/test_synthetic.py
+"""
+Synthetic data generator: Zipf allocation, references between the generated collections,
+and loading the generated files with init_database(data_dir=...).
+"""
+import random
+from collections import Counter
+
+import pytest
+
+from app.db import crud, synthetic
+from app.db.seed import iter_json_array
+
+SIZES = synthetic.scaled_sizes(3000)
+
+
+@pytest.fixture(scope="module")
+def generated(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("synthetic")
+    counts = synthetic.generate(synthetic.file_writers(str(data_dir)), SIZES, seed=3)
+    paths = {key.lower(): path for key, path in crud.seed_paths(str(data_dir)).items()}
+    return data_dir, counts, lambda name: list(iter_json_array(paths[name]))
+
+
+def test_allocate_is_exact_skewed_and_capped():
+    counts = list(synthetic.allocate(10000, 100, 1.0, cap=500))
+    assert sum(counts) == 10000
+    assert max(counts) == 500 and counts[0] >= counts[50] >= counts[-1]
+    with pytest.raises(ValueError):
+        synthetic.allocate(10000, 10, 1.0, cap=500)
+
+
+def test_ranking_is_a_bijection():
+    ranking = synthetic.Ranking(997, random.Random(1))
+    assert sorted(ranking.index(r) for r in range(997)) == list(range(997))
+    assert all(ranking.rank(ranking.index(r)) == r for r in range(997))
+    picked = ranking.draw_distinct(random.Random(2), 600, 1.0)
+    assert len(set(picked)) == 600
+
+
+def test_generated_sizes_and_references(generated):
+    _, counts, load = generated
+    assert counts["likes"] == SIZES["likes"] and counts["users"] == counts["subscriptions"] == SIZES["users"]
+    artists = {a["_id"] for a in load("artists")}
+    tracks = {t["_id"]: t for t in load("tracks")}
+    albums = {a["_id"]: a for a in load("albums")}
+    users = {u["_id"]: u for u in load("users")}
+    playlists = {p["_id"]: p for p in load("playlists")}
+
+    for album in albums.values():
+        assert album["artist_id"] in artists
+        assert all(tracks[t]["album_id"] == album["_id"] for t in album["tracks"])
+    liked = Counter()
+    for like in load("likes"):
+        assert like["target_id"] in (tracks if like["target_type"] == "track" else albums)
+        if like["target_type"] == "track":
+            liked[like["user_id"], like["target_id"]] += 1
+    assert max(liked.values()) == 1
+    for user in users.values():
+        assert {t for (u, t) in liked if u == user["_id"]} == set(user["liked_tracks"])
+        assert all(playlists[p]["user_id"] == user["_id"] for p in user["playlists"])
+        assert set(user["followed_artists"]) <= artists
+    assert all(c["track_id"] in tracks and c["user_id"] in users for c in load("comments"))
+
+    # Zipf-like: the most liked tenth of the tracks gets far more likes than the least liked tenth
+    per_track = sorted(Counter(t for (_, t) in liked).values(), reverse=True)
+    tenth = len(per_track) // 10
+    assert sum(per_track[:tenth]) > 5 * sum(per_track[-tenth:])
+
+
+def test_init_database_loads_generated_files(scratch_db, generated):
+    data_dir, counts, _ = generated
+    stats = crud.init_database("ALL", batch_size=500, data_dir=str(data_dir))
+    assert {name: s["documents"] for name, s in stats.items()} == counts
+    track = scratch_db.tracks.find_one({"like_count": {"$gt": 0}})
+    assert track["like_count"] == scratch_db.likes.count_documents({"target_type": "track", "target_id": track["_id"]})
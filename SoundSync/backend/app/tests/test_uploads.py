@@ -0,0 +1,59 @@
+# tests/test_uploads.py
+"""
+Audio uploads: content-addressed storage, deduplication, size limit.
+"""
+import hashlib
+import os
+
+from app.services import audio_service
+
+
+def upload(client, content: bytes, name: str = "song.mp3"):
+    return client.post("/upload/audio", files={"file": (name, content, "audio/mpeg")})
+
+
+def test_upload_is_content_addressed(client):
+    content = b"ID3 test upload " + os.urandom(64)
+    sha256 = hashlib.sha256(content).hexdigest()
+    first = upload(client, content)
+    try:
+        assert first.status_code == 200
+        body = first.json()
+        assert body["filename"] == f"{sha256}.mp3" and body["url"] == f"/static/audio/{sha256}.mp3"
+        assert body["size"] == len(content) and body["duplicate"] is False
+        assert audio_service.path_of(body["filename"]).read_bytes() == content
+
+        second = upload(client, content, name="copy.mp3").json()
+        assert second["filename"] == body["filename"] and second["duplicate"] is True
+        assert not [p for p in audio_service.STATIC_AUDIO_DIR.iterdir() if p.name.startswith(audio_service.TMP_PREFIX)]
+    finally:
+        assert client.delete(f"/upload/audio/delete/{sha256}.mp3").json()["deleted"] is True
+    assert not audio_service.path_of(f"{sha256}.mp3").exists()
+
+
+def test_shared_file_is_kept_while_a_track_uses_it(client, db):
+    content = b"ID3 shared upload " + os.urandom(64)
+    filename = upload(client, content).json()["filename"]
+    assert upload(client, content).json()["duplicate"] is True  # an unsaved track's upload, deduplicated
+    db.tracks.insert_one({"_id": "test_upload_saved", "audio_url": f"/static/audio/{filename}"})
+    try:
+        # The unsaved track gives the file up: the saved track still uses it
+        assert client.delete(f"/upload/audio/delete/{filename}").json()["deleted"] is False
+        # The saved track gives it up (deleted right after): nobody else uses it
+        response = client.delete(f"/upload/audio/delete/{filename}?track_id=test_upload_saved")
+        assert response.json()["deleted"] is True
+    finally:
+        audio_service.path_of(filename).unlink(missing_ok=True)
+
+
+def test_upload_limits(client, monkeypatch):
+    assert upload(client, b"not audio", name="notes.txt").status_code == 400
+    malformed = client.post("/upload/audio", content=b"no boundary here",
+                            headers={"content-type": "multipart/form-data; boundary=xyz"})
+    assert malformed.status_code == 400
+
+    monkeypatch.setattr(audio_service, "MAX_UPLOAD_BYTES", 10)
+    content = b"x" * 100
+    assert upload(client, content).status_code == 413
+    assert not audio_service.path_of(f"{hashlib.sha256(content).hexdigest()}.mp3").exists()
+    print("✓ UPLOADS: hashed, deduplicated, size-limited")
@@ -0,0 +1,89 @@
+# benchmarks/_backends.py
+"""
+Where the benchmark suite's data lives:
+    local   mongod and redis-server reachable through MONGO_URI / REDIS_URL (as the app uses them)
+    memory  in-process stand-ins (mongomock, mongomock-motor, fakeredis): no servers needed,
+            absolute numbers are not comparable with `local`, regressions in our own code still show
+
+use_backend() must run before any other app module is imported: several of them keep the
+Mongo / Redis clients they found at import time.
+"""
+import random
+import types
+from typing import Dict, List
+
+BACKENDS = ("local", "memory")
+GENRES = ["Electronic", "Rock", "Experimental", "Chanson Française", "Video Game", "Jazz"]
+SEED_BATCH = 1000
+
+
+def use_backend(name: str):
+    if name == "memory":
+        _use_memory()
+    elif name != "local":
+        raise ValueError(f"Unknown backend '{name}', expected one of {', '.join(BACKENDS)}")
+
+
+def _use_memory():
+    try:
+        import fakeredis
+        import mongomock
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError as e:
+        raise SystemExit(f"--backend memory needs {e.name}: pip install -r benchmarks/requirements.txt")
+    from app.db import mongo, redis as app_redis
+
+    mongo.mongo_client = mongomock.MongoClient()
+    mongo.db = mongo.mongo_client[mongo.mongo_db_name]
+    mongo.AsyncIOMotorClient = lambda *args, io_loop=None, **kwargs: AsyncMongoMockClient(
+        mock_mongo_client=mongo.mongo_client, mock_io_loop=io_loop)
+
+    server = fakeredis.FakeServer()
+    app_redis.redis_client = fakeredis.FakeRedis(server=server)
+    app_redis.aioredis = types.SimpleNamespace(Redis=types.SimpleNamespace(
+        from_url=lambda *args, **kwargs: fakeredis.aioredis.FakeRedis(server=server)))
+
+
+# ---------- Synthetic catalog ----------
+def make_track(i: int, artists: int, rnd: random.Random) -> Dict:
+    return {
+        "_id": f"bench_track{i}",
+        "title": f"Je T'emmène au vent {i}",
+        "artist_id": f"bench_artist{rnd.randint(0, artists - 1)}",
+        "album_id": f"bench_album{rnd.randint(0, artists * 3 - 1)}",
+        "duration_sec": rnd.randint(90, 420),
+        "genre": rnd.choice(GENRES),
+        "popularity": int(100 * rnd.random() ** 3),  # few popular tracks, a long tail
+        "audio_url": f"/static/audio/{rnd.getrandbits(128):032x}.mp3",
+    }
+
+def seed_catalog(tracks: int, seed: int = 7) -> Dict[str, List[str]]:
+    """ Replace the bench_* tracks / artists with a synthetic catalog; returns the ids. """
+    from app.db import cache
+    from app.db.indexes import reconcile_indexes
+    from app.db.mongo import get_mongo_database
+    db = get_mongo_database()
+    rnd = random.Random(seed)
+    artists = max(1, tracks // 20)
+    db.tracks.delete_many({"_id": {"$regex": "^bench_"}})
+    db.artists.delete_many({"_id": {"$regex": "^bench_"}})
+    db.artists.insert_many([{"_id": f"bench_artist{i}", "username": f"Artist {i}", "role": "artist"}
+                            for i in range(artists)])
+    batch = []
+    for i in range(tracks):
+        batch.append(make_track(i, artists, rnd))
+        if len(batch) == SEED_BATCH:
+            db.tracks.insert_many(batch)
+            batch = []
+    if batch:
+        db.tracks.insert_many(batch)
+    reconcile_indexes(force=True)
+    cache.invalidate_collection("tracks")
+    cache.invalidate_collection("artists")
+    return {"tracks": [f"bench_track{i}" for i in range(tracks)], "artists": [f"bench_artist{i}" for i in range(artists)]}
+
+def drop_catalog():
+    from app.db.mongo import get_mongo_database
+    db = get_mongo_database()
+    for collection in ("tracks", "artists"):
+        db[collection].delete_many({"_id": {"$regex": "^bench_"}})
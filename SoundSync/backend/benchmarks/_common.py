@@ -0,0 +1,152 @@
+# benchmarks/_common.py
+"""
+Shared helpers for the benchmark scripts: a closed-loop load driver and latency stats.
+Run the scripts from SoundSync/backend, e.g. `python -m benchmarks.bench_async_crud`.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import uvicorn
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    """ Latencies in seconds -> throughput and p50/p95/p99 in milliseconds. """
+    n = len(latencies)
+    return {
+        "requests": n,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(n / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if n else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run_load(
+    call: Callable[[int], Awaitable[Any]],
+    total: int,
+    concurrency: int,
+    ) -> Dict[str, Any]:
+    """
+    Closed-loop load: `concurrency` workers issue `call(i)` until `total` calls are done.
+    A call counts as an error if it raises or returns False.
+    """
+    counter = iter(range(total))
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if ok is False:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """ Run an ASGI app under uvicorn in a daemon thread (real sockets, real threadpool). """
+
+    def __init__(self, app, port: int | None = None):
+        self.port = port or free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def _serve(app_factory: Callable[[], Any], port: int):
+    uvicorn.run(app_factory(), host="127.0.0.1", port=port, log_level="warning")
+
+
+class ServerProcess:
+    """
+    Run an ASGI app under uvicorn in a child process, for benchmarks whose client side is heavy
+    enough to distort the measure when it shares the server's GIL (large bodies).
+    `app_factory` is called in the child; `ready_path` must answer once the server is up.
+    """
+
+    def __init__(self, app_factory: Callable[[], Any], ready_path: str = "/", port: int | None = None):
+        self.port = port or free_port()
+        self.ready_path = ready_path
+        self.process = multiprocessing.get_context("fork").Process(target=_serve, args=(app_factory, self.port), daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        import httpx
+        self.process.start()
+        deadline = time.time() + 10
+        while True:
+            try:
+                httpx.get(self.url + self.ready_path)
+                return self
+            except httpx.TransportError:
+                if time.time() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.join(timeout=10)
+
+
+def quiet_logs():
+    """ The app prints one line per cache hit/miss; silence stdout while measuring (see emit). """
+    sys.stdout = open(os.devnull, "w")
+
+
+def emit(result: Dict[str, Any]):
+    """ Print a result as JSON on the real stdout, even after quiet_logs(). """
+    sys.__stdout__.write(json.dumps(result, indent=2) + "\n")
+    sys.__stdout__.flush()
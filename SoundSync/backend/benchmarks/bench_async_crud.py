@@ -0,0 +1,91 @@
+# benchmarks/bench_async_crud.py
+"""
+Sync (pymongo + threadpool) vs async (Motor + redis.asyncio) CRUD routes under concurrency.
+
+Both routers are served by the same uvicorn process:
+    /sync/{collection}   -> plain `def` routes on app.db.crud + the sync cache (previous behaviour)
+    /crud/{collection}   -> the async routes from app.api.v1.collections_api
+
+Usage (from SoundSync/backend, with mongod and redis-server reachable through MONGO_URI / REDIS_URL):
+    python -m benchmarks.bench_async_crud --concurrency 64 --requests 5000 --mode miss
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+from fastapi import APIRouter, FastAPI, Query
+
+from app.api.v1 import collections_api
+from app.core import events
+from app.db import cache, crud
+from benchmarks._common import BackgroundServer, emit, quiet_logs, run_load
+
+
+# ---------- Previous sync path ----------
+sync_router = APIRouter()
+
+@sync_router.get("/{collection_name}")
+def sync_get_all(collection_name: str, filter: str = Query(None), skip: int = 0, limit: int = 50):
+    filter_val = json.loads(filter) if filter else None
+    cache_key = f"bench-sync:{collection_name}:{json.dumps(filter_val, sort_keys=True)}:{skip}:{limit}"
+    cached = cache.get_cache(cache_key)
+    if cached:
+        return cached
+    result = crud.get_all(collection_name, filter=filter_val, skip=skip, limit=limit)
+    cache.set_cache(cache_key, result, ttl=60)
+    return result
+
+@sync_router.get("/{collection_name}/by/{field}/{value}")
+def sync_get_instance(collection_name: str, field: str, value: str):
+    return {"document": crud.get_one_by_field(collection_name, field, value)}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(sync_router, prefix="/sync")
+    app.include_router(collections_api.router, prefix="/crud")
+    return app
+
+
+async def bench_path(base_url: str, prefix: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def call(i: int):
+            if args.route == "by_id":
+                url = f"/{prefix}/{args.collection}/by/_id/{args.doc_id}"
+            else:
+                # miss mode: a distinct skip per request so every call reaches MongoDB
+                skip = i if args.mode == "miss" else 0
+                url = f"/{prefix}/{args.collection}?skip={skip}&limit={args.limit}"
+            res = await client.get(url)
+            return res.status_code == 200
+
+        await run_load(call, min(args.requests, 200), args.concurrency)  # warm-up
+        return await run_load(call, args.requests, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--collection", default="tracks")
+    parser.add_argument("--route", choices=["list", "by_id"], default="list")
+    parser.add_argument("--doc-id", default="track1")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--mode", choices=["hit", "miss"], default="miss",
+                        help="hit: same cache key every time, miss: distinct key per request")
+    args = parser.parse_args()
+
+    events.connect_to_services()
+    quiet_logs()
+    results = {"concurrency": args.concurrency, "route": args.route, "mode": args.mode}
+    with BackgroundServer(build_app()) as server:
+        for prefix in ("sync", "crud"):
+            results[prefix] = asyncio.run(bench_path(server.url, prefix, args))
+    results["speedup_rps"] = round(results["crud"]["rps"] / max(results["sync"]["rps"], 1e-9), 2)
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/bench_audio_analysis.py
+"""
+MP3 metadata extraction: where the parsing runs decides what the API's event loop feels.
+Analyzes --files synthetic CBR mp3s (no Xing header, so every frame header is walked) with
+  - inline:       mp3_metadata.analyze on the event loop (what a naive upload route would do),
+  - thread_pool:  in the loop's default executor (off the loop, but holding the GIL),
+  - process_pool: the audio analysis service's setup (spawned worker processes),
+while a probe coroutine measures how late a 1 ms timer fires (event-loop lag).
+
+Files go to a temporary directory. No MongoDB / Redis needed.
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.bench_audio_analysis --files 32 --minutes 5 --workers 2
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from app.services import mp3_metadata
+from benchmarks._common import emit, summarize
+
+FRAME_HEADER = b"\xff\xfb\x90\x64"  # MPEG-1 layer III, 128 kbps, 44.1 kHz
+FRAME_LENGTH = 417
+
+
+def write_files(directory: Path, count: int, minutes: float):
+    frames = int(minutes * 60 * 44100 / 1152)
+    body = os.urandom(FRAME_LENGTH - 4)
+    paths = []
+    for i in range(count):
+        path = directory / f"track{i}.mp3"
+        path.write_bytes((FRAME_HEADER + body) * frames)
+        paths.append(str(path))
+    return paths
+
+
+async def bench(paths, mode: str, pool) -> dict:
+    loop = asyncio.get_running_loop()
+    done = asyncio.Event()
+    lags = []
+
+    async def probe():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - t0 - 0.001)
+
+    prober = asyncio.create_task(probe())
+    await asyncio.sleep(0.01)
+    t0 = time.perf_counter()
+    if mode == "inline":
+        results = []
+        for path in paths:
+            results.append(mp3_metadata.analyze(path))
+            await asyncio.sleep(0)
+    else:
+        results = await asyncio.gather(*(loop.run_in_executor(pool, mp3_metadata.analyze, p) for p in paths))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await prober
+    return {
+        "seconds": round(elapsed, 3),
+        "files_per_s": round(len(paths) / elapsed, 1),
+        "loop_lag": {k: v for k, v in summarize(lags, sum(lags)).items() if k.startswith("p")},
+        "duration_ok": all(abs(r["duration_sec"] - results[0]["duration_sec"]) < 1e-6 for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--minutes", type=float, default=5, help="duration of each file")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="bench_analysis_"))
+    results = {"files": args.files, "minutes": args.minutes, "workers": args.workers}
+    try:
+        paths = write_files(directory, args.files, args.minutes)
+        results["file_mb"] = round(os.path.getsize(paths[0]) / 1024 / 1024, 1)
+        results["inline"] = asyncio.run(bench(paths, "inline", None))
+        results["thread_pool"] = asyncio.run(bench(paths, "thread_pool", None))
+        with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            pool.submit(os.getpid).result()  # worker start-up is not part of the measure
+            results["process_pool"] = asyncio.run(bench(paths, "process_pool", pool))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
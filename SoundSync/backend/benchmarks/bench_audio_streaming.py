@@ -0,0 +1,113 @@
+# benchmarks/bench_audio_streaming.py
+"""
+Seek-heavy playback sessions against the generic StaticFiles mount (no Range support: every seek
+downloads the whole file) and the audio streaming route (206 partial responses).
+Each session opens a track, then seeks --seeks times, fetching --window bytes at a random offset
+(If-Range with the ETag, like browsers resuming a download); one extra conditional GET per session
+checks revalidation (304).
+
+Files go to a temporary directory; the server runs in its own process. No MongoDB / Redis needed.
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.bench_audio_streaming --sessions 200 --concurrency 32 --seeks 10
+"""
+import argparse
+import asyncio
+import io
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+from app.api.v1 import audio_api
+from app.services import audio_service
+from benchmarks._common import ServerProcess, emit, quiet_logs, run_load
+
+
+def serving_app(directory: Path) -> FastAPI:
+    """ Runs in the server process: /static/audio/* is the streaming route, /plain/* the mount. """
+    audio_service.STATIC_AUDIO_DIR = directory
+    app = FastAPI()
+    app.include_router(audio_api.router)
+    app.mount("/plain", StaticFiles(directory=directory), name="plain")
+    return app
+
+
+async def bench(base_url: str, prefix: str, files, args) -> dict:
+    rnd = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    received, seeks, not_modified = 0, [], 0
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def session(i: int):
+            nonlocal received, not_modified
+            name, size = files[i % len(files)]
+            url = f"{prefix}/{name}"
+            first = await client.get(url, headers={"Range": f"bytes=0-{args.window - 1}"})
+            received += len(first.content)
+            etag = first.headers.get("etag")
+            for _ in range(args.seeks):
+                offset = rnd.randrange(0, size - args.window)
+                headers = {"Range": f"bytes={offset}-{offset + args.window - 1}"}
+                if etag:
+                    headers["If-Range"] = etag
+                t0 = time.perf_counter()
+                res = await client.get(url, headers=headers)
+                seeks.append(time.perf_counter() - t0)
+                received += len(res.content)
+                if res.status_code not in (200, 206):
+                    return False
+            if etag:
+                revalidated = await client.get(url, headers={"If-None-Match": etag})
+                not_modified += revalidated.status_code == 304
+            return True
+
+        result = await run_load(session, args.sessions, args.concurrency)
+    seeks.sort()
+    result.update({
+        "received_mb": round(received / 1024 / 1024, 1),
+        "seek_p50_ms": round(seeks[len(seeks) // 2] * 1000, 3),
+        "seek_p99_ms": round(seeks[int(len(seeks) * 0.99)] * 1000, 3),
+        "revalidated_304": not_modified,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seeks", type=int, default=10)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=6)
+    parser.add_argument("--window", type=int, default=256 * 1024, help="bytes fetched per seek")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="bench_audio_"))
+    audio_service.STATIC_AUDIO_DIR = directory
+    files = []
+    for _ in range(args.files):
+        stored = audio_service.store(io.BytesIO(os.urandom(int(args.size_mb * 1024 * 1024))), ".mp3")
+        files.append((stored["filename"], stored["size"]))
+    quiet_logs()
+    results = {"sessions": args.sessions, "concurrency": args.concurrency, "seeks_per_session": args.seeks,
+               "file_mb": args.size_mb, "window_kb": args.window // 1024}
+    try:
+        with ServerProcess(lambda: serving_app(directory), ready_path="/plain/missing") as server:
+            results["static_files_mount"] = asyncio.run(bench(server.url, "/plain", files, args))
+            results["streaming_route"] = asyncio.run(bench(server.url, "/static/audio", files, args))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    results["bytes_ratio"] = round(results["static_files_mount"]["received_mb"]
+                                   / max(results["streaming_route"]["received_mb"], 1e-9), 1)
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_autocomplete.py
+"""
+Autocomplete prefix index: build time, memory and per-keystroke latency.
+
+A synthetic catalog (tracks, artists, albums with Zipf-distributed words and popularity) is
+loaded into the in-memory index, then `--sessions` users type labels one character at a time.
+Latency is reported with the narrow-range memo disabled (cold), enabled, and with a write
+(add + remove of an entry) every `--write-every` keystrokes.
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.bench_autocomplete --tracks 1000000 --artists 100000 --albums 200000
+"""
+import argparse
+import random
+import resource
+import time
+
+from app.services import autocomplete_service
+from app.services.autocomplete_service import PrefixIndex
+from benchmarks._common import emit, summarize
+from benchmarks.bench_search import make_vocabulary
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_rows(args, vocabulary, cum_weights, rnd: random.Random):
+    def label(lo, hi):
+        return " ".join(w.capitalize() for w in rnd.choices(vocabulary, cum_weights=cum_weights, k=rnd.randint(lo, hi)))
+
+    for i in range(args.tracks):
+        yield "tracks", f"track{i}", label(2, 5), float(int(100 * rnd.paretovariate(1.5)) % 1000)
+    for i in range(args.artists):
+        yield "artists", f"artist{i}", label(1, 2), 100.0
+    for i in range(args.albums):
+        yield "albums", f"album{i}", label(1, 4), 20.0 + rnd.randint(0, 50)
+
+
+def typing_sessions(index: PrefixIndex, labels, sessions: int, max_chars: int, rnd: random.Random, write_every: int = 0):
+    latencies = []
+    for _ in range(sessions):
+        text = rnd.choice(labels)
+        for n in range(1, min(max_chars, len(text)) + 1):
+            if write_every and len(latencies) % write_every == 0:
+                index.add("tracks", "track_new", rnd.choice(labels), 500.0)
+                index.remove("tracks", "track_new")
+            t0 = time.perf_counter()
+            index.complete(text[:n], 10)
+            latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, sum(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--artists", type=int, default=100_000)
+    parser.add_argument("--albums", type=int, default=200_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--max-chars", type=int, default=8)
+    parser.add_argument("--write-every", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    vocabulary, cum_weights = make_vocabulary(args.vocabulary, rnd)
+    rows = list(make_rows(args, vocabulary, cum_weights, rnd))
+    labels = [row[2] for row in rows]
+
+    rss_before = rss_mb()
+    index = PrefixIndex()
+    start = time.perf_counter()
+    index.bulk_load(rows)
+    build_seconds = time.perf_counter() - start
+    rss_growth = rss_mb() - rss_before
+
+    memo_size = autocomplete_service.MEMO_SIZE
+    autocomplete_service.MEMO_SIZE = 0
+    cold = typing_sessions(index, labels, args.sessions, args.max_chars, random.Random(args.seed))
+    autocomplete_service.MEMO_SIZE = memo_size
+    warm_up = typing_sessions(index, labels, args.sessions, args.max_chars, random.Random(args.seed + 1))
+    warm = typing_sessions(index, labels, args.sessions, args.max_chars, random.Random(args.seed + 2))
+    with_writes = typing_sessions(index, labels, args.sessions, args.max_chars, random.Random(args.seed + 3), args.write_every)
+
+    t0 = time.perf_counter()
+    index.add("tracks", "track_new", "Brand New Song", 50.0)
+    index.remove("tracks", "track_new")
+    write_ms = (time.perf_counter() - t0) / 2 * 1000
+
+    emit({
+        "entries": len(index),
+        "build_seconds": round(build_seconds, 2),
+        "rss_growth_mb": round(rss_growth, 1),
+        "index": index.stats(),
+        "keystroke_cold": cold,
+        "keystroke_first_pass_with_memo": warm_up,
+        "keystroke_steady_state": warm,
+        "keystroke_with_writes": with_writes,
+        "write_ms": round(write_ms, 3),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_cache_encoding.py
+"""
+CPU per cache hit and stored size: previous json.dumps values vs pre-encoded response bodies.
+
+    legacy    : REDIS value = json.dumps(result); hit = json.loads + FastAPI jsonable_encoder + JSONResponse
+    raw       : hit = stored bytes sent as-is (cache.encode_value, compressed above the threshold,
+                client accepts gzip)
+    raw_plain : same, for a client without gzip (server-side gunzip on compressed entries)
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.bench_cache_encoding --items 50 200 --iterations 2000
+    python -m benchmarks.bench_cache_encoding --redis   # also report Redis MEMORY USAGE of both forms
+"""
+import argparse
+import json
+import random
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from app.db import cache
+from benchmarks._common import emit
+
+GENRES = ["Electronic", "Rock", "Experimental", "Chanson Française", "Video Game", "Jazz"]
+
+
+def make_page(n: int) -> dict:
+    rnd = random.Random(n)
+    items = [{
+        "_id": f"track{i}",
+        "title": f"Je T'emmène au vent {rnd.randint(0, 10**6)}",
+        "artist_id": f"artist{rnd.randint(1, 5000)}",
+        "album_id": f"album{rnd.randint(1, 20000)}",
+        "duration_sec": rnd.randint(90, 420),
+        "genre": rnd.choice(GENRES),
+        "popularity": rnd.randint(0, 100),
+        "audio_url": f"/static/audio/{rnd.getrandbits(128):032x}.mp3",
+    } for i in range(n)]
+    return {"items": items, "total": 100000, "skip": 0, "limit": n}
+
+
+def cpu_per_op(fn, iterations: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) / iterations * 1e6  # microseconds
+
+
+def bench(n: int, iterations: int, use_redis: bool) -> dict:
+    page = make_page(n)
+    legacy = json.dumps(page).encode()
+    stored = cache.encode_value(page)
+
+    def legacy_hit():
+        JSONResponse(jsonable_encoder(json.loads(legacy)))
+
+    def raw_hit():
+        Response(cache.stored_payload(stored), media_type="application/json")
+
+    def raw_plain_hit():
+        Response(cache.stored_json(stored), media_type="application/json")
+
+    result = {
+        "items": n,
+        "compressed": cache.is_compressed(stored),
+        "cpu_us_per_hit": {
+            "legacy": round(cpu_per_op(legacy_hit, iterations), 2),
+            "raw": round(cpu_per_op(raw_hit, iterations), 2),
+            "raw_plain": round(cpu_per_op(raw_plain_hit, iterations), 2),
+        },
+        "encode_us_per_miss": {
+            "legacy": round(cpu_per_op(lambda: json.dumps(page), iterations), 2),
+            "raw": round(cpu_per_op(lambda: cache.encode_value(page), iterations), 2),
+        },
+        "value_bytes": {"legacy": len(legacy), "raw": len(stored)},
+    }
+    if use_redis:
+        redis = cache.REDIS
+        redis.set("bench:encoding:legacy", legacy)
+        redis.set("bench:encoding:raw", stored)
+        result["redis_memory_usage"] = {
+            "legacy": redis.memory_usage("bench:encoding:legacy"),
+            "raw": redis.memory_usage("bench:encoding:raw"),
+        }
+        redis.delete("bench:encoding:legacy", "bench:encoding:raw")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 50, 200])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--redis", action="store_true", help="measure MEMORY USAGE on REDIS_URL")
+    args = parser.parse_args()
+    emit({"compress_min_bytes": cache.COMPRESS_MIN_BYTES,
+          "results": [bench(n, args.iterations, args.redis) for n in args.items]})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_play_events.py
+"""
+Play event ingestion: one POST /crud/plays per listen (insert_one + counter $inc + cache purge
+each) against the buffered POST /events/play, with single events and with batches.
+Reports accepted events/s at the route and the time until the flusher has written them all.
+
+Usage (from SoundSync/backend, with mongod and redis-server reachable through MONGO_URI / REDIS_URL):
+    python -m benchmarks.bench_play_events --concurrency 64 --events 200000 --batch 100
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.v1 import collections_api, events_api
+from app.core import events
+from app.db.mongo import get_mongo_database
+from app.services import play_events_service
+from benchmarks._common import BackgroundServer, emit, quiet_logs, run_load
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(events_api.router, prefix="/events")
+    app.include_router(collections_api.router, prefix="/crud")
+    return app
+
+
+def event(rnd: random.Random, tracks: int) -> dict:
+    return {"track_id": f"bench_play_t{int(rnd.paretovariate(1.2)) % tracks}", "user_id": f"bench_u{rnd.randrange(10_000)}"}
+
+
+async def bench(base_url: str, url: str, n_events: int, batch: int, args) -> dict:
+    rnd = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    accepted_before, written_before = play_events_service.STATS["accepted"], play_events_service.STATS["written"]
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def call(i: int):
+            if batch == 1:
+                payload = event(rnd, args.tracks)
+            else:
+                payload = {"events": [event(rnd, args.tracks) for _ in range(batch)]}
+            res = await client.post(url, json=payload)
+            return res.status_code in (200, 202)
+
+        start = time.perf_counter()
+        result = await run_load(call, n_events // batch, args.concurrency)
+    if url == "/events/play":
+        accepted = play_events_service.STATS["accepted"] - accepted_before
+        while play_events_service.STATS["written"] - written_before < accepted:
+            await asyncio.sleep(0.01)
+        result["stored_seconds"] = round(time.perf_counter() - start, 3)
+    result["events_per_s"] = round(result["rps"] * batch, 1)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--baseline-events", type=int, default=5_000, help="events for the per-event CRUD route")
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--tracks", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    events.connect_to_services()
+    MC = get_mongo_database()
+    MC.plays.delete_many({"track_id": {"$regex": "^bench_play_"}})
+    quiet_logs()
+    results = {"concurrency": args.concurrency, "batch": args.batch,
+               "flush_size": play_events_service.FLUSH_SIZE, "flush_interval": play_events_service.FLUSH_INTERVAL}
+    with BackgroundServer(build_app()) as server:
+        results["crud_insert_one"] = asyncio.run(bench(server.url, "/crud/plays", args.baseline_events, 1, args))
+        results["buffered_single"] = asyncio.run(bench(server.url, "/events/play", args.events // 10, 1, args))
+        results["buffered_batch"] = asyncio.run(bench(server.url, "/events/play", args.events, args.batch, args))
+    results["flusher"] = play_events_service.stats()
+    results["speedup_events_per_s"] = round(results["buffered_batch"]["events_per_s"]
+                                            / max(results["crud_insert_one"]["events_per_s"], 1e-9), 1)
+    MC.plays.delete_many({"track_id": {"$regex": "^bench_play_"}})
+    events.close_services()
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_recommendations.py
+"""
+Co-occurrence recommendations on synthetic implicit feedback: full build time and size,
+per-request latency of the precomputed rows against computing a track's row on demand,
+and the cost of an incremental refresh after a burst of playlist edits.
+
+Playlists and like baskets draw tracks with a Zipf skew (a few hits, a long tail), no MongoDB needed.
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.bench_recommendations --tracks 200000 --playlists 200000 --users 100000
+"""
+import argparse
+import itertools
+import random
+import resource
+import time
+
+import numpy as np
+from scipy import sparse
+
+from app.services import recommendation_service
+from app.services.recommendation_service import CoOccurrenceModel, Rows
+from benchmarks._common import emit, summarize
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_baskets(args, rnd: random.Random):
+    tracks = [f"track{i}" for i in range(args.tracks)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(args.tracks)))
+    baskets = []
+    for i in range(args.playlists):
+        baskets.append((f"playlist:p{i}", f"user{rnd.randrange(args.users)}",
+                        rnd.choices(tracks, cum_weights=cum_weights, k=rnd.randint(5, args.playlist_size))))
+    for u in range(args.users):
+        baskets.append((f"likes:user{u}", f"user{u}", rnd.choices(tracks, cum_weights=cum_weights, k=rnd.randint(1, 30))))
+    return tracks, cum_weights, baskets
+
+
+def timed(fn, samples):
+    latencies = []
+    for sample in samples:
+        t0 = time.perf_counter()
+        fn(sample)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, sum(latencies))
+
+
+def on_demand(model: CoOccurrenceModel, XT, norms, track_id: str):
+    """ What a request would cost without precomputation: one row of XᵀX, normalized, top-k. """
+    t = model.track_no[track_id]
+    row = (XT[t] @ model.X).tocoo()
+    scores = row.data / (norms[t] * norms[row.col])
+    return Rows.top_k_csr(sparse.csr_matrix((scores, (row.row, row.col)), shape=row.shape), recommendation_service.TOP_K)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=200_000)
+    parser.add_argument("--playlists", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--playlist-size", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--edits", type=int, default=100, help="playlist edits per incremental refresh")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    tracks, cum_weights, baskets = make_baskets(args, rnd)
+
+    rss_before = rss_mb()
+    model = CoOccurrenceModel()
+    start = time.perf_counter()
+    model.load(baskets)
+    build_seconds = time.perf_counter() - start
+
+    # Requests hit popular tracks more often, like real traffic
+    sample_tracks = [t for t in rnd.choices(tracks, cum_weights=cum_weights, k=args.queries) if t in model.track_no]
+    sample_users = [f"user{rnd.randrange(args.users)}" for _ in range(args.queries)]
+    similar = timed(lambda t: model.similar_tracks(t, 10), sample_tracks)
+    for_user = timed(lambda u: model.user_tracks(u, 10), sample_users)
+    XT = model.X.T.tocsr()
+    norms = np.sqrt(model._counts().astype(np.float64))
+    computed = timed(lambda t: on_demand(model, XT, norms, t), sample_tracks[:200])
+
+    # Typical edits add or remove one track; a few replace the whole playlist
+    contents = {key: tracks_ for key, _, tracks_ in baskets[:args.playlists]}
+    refreshes = []
+    for _ in range(3):
+        for _ in range(args.edits):
+            key = f"playlist:p{rnd.randrange(args.playlists)}"
+            if rnd.random() < 0.1:
+                contents[key] = rnd.choices(tracks, cum_weights=cum_weights, k=rnd.randint(5, args.playlist_size))
+            elif rnd.random() < 0.5 and len(contents[key]) > 1:
+                contents[key] = contents[key][1:]
+            else:
+                contents[key] = contents[key] + rnd.choices(tracks, cum_weights=cum_weights)
+            model.set_basket(key, None, contents[key])
+        t0 = time.perf_counter()
+        report = model.refresh()
+        refreshes.append({**report, "seconds": round(time.perf_counter() - t0, 3)})
+
+    emit({
+        "baskets": len(baskets),
+        "build_seconds": round(build_seconds, 2),
+        "rss_growth_mb": round(rss_mb() - rss_before, 1),
+        "model": model.stats(),
+        "similar_tracks_precomputed": similar,
+        "user_tracks_precomputed": for_user,
+        "similar_tracks_on_demand": computed,
+        "incremental_refresh": refreshes,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_search.py
+"""
+Search index on a synthetic catalog: build time, memory and query latency, against a
+case/accent-insensitive regex scan of the titles (what a `$regex` filter costs without an index).
+
+The catalog is generated in memory (Zipf-distributed vocabulary, accented words included),
+no MongoDB needed.
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.bench_search --tracks 1000000 --queries 500
+"""
+import argparse
+import itertools
+import random
+import re
+import resource
+import time
+
+from app.services import search_service
+from benchmarks._common import emit, summarize
+
+SYLLABLES = ["la", "mo", "ri", "ké", "sa", "to", "nu", "vé", "do", "mi", "ra", "chè", "lu", "po", "zé", "an", "ou"]
+
+
+def make_vocabulary(size: int, rnd: random.Random):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))))
+    words = sorted(words)
+    rnd.shuffle(words)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))  # Zipf, s = 1
+    return words, cum_weights
+
+
+def make_titles(n: int, vocabulary, cum_weights, rnd: random.Random):
+    for i in range(n):
+        words = rnd.choices(vocabulary, cum_weights=cum_weights, k=rnd.randint(2, 5))
+        yield {"_id": f"track{i}", "title": " ".join(w.capitalize() for w in words)}
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--scan-queries", type=int, default=5, help="regex scan baseline (slow)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    vocabulary, cum_weights = make_vocabulary(args.vocabulary, rnd)
+    titles = list(make_titles(args.tracks, vocabulary, cum_weights, rnd))
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    index = search_service.build_index("tracks", titles)
+    build_seconds = time.perf_counter() - start
+
+    # Queries: 1 to 3 words, picked with the same Zipf skew (popular words = long postings)
+    queries = [" ".join(rnd.choices(vocabulary, cum_weights=cum_weights, k=rnd.randint(1, 3))) for _ in range(args.queries)]
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(search_service.tokenize(q), 0, 10)
+        latencies.append(time.perf_counter() - t0)
+    indexed = summarize(latencies, sum(latencies))
+
+    folded = [search_service.fold(doc["title"]) for doc in titles]
+    scan = []
+    for q in queries[:args.scan_queries]:
+        pattern = re.compile("|".join(re.escape(t) for t in search_service.tokenize(q)))
+        t0 = time.perf_counter()
+        sum(1 for title in folded if pattern.search(title))
+        scan.append(time.perf_counter() - t0)
+
+    emit({
+        "tracks": args.tracks,
+        "build_seconds": round(build_seconds, 2),
+        "docs_per_sec": round(args.tracks / build_seconds),
+        "rss_growth_mb": round(rss_mb() - rss_before, 1),
+        "index": index.stats(),
+        "indexed_search": indexed,
+        "regex_scan": summarize(scan, sum(scan)),
+    })
+
+
+if __name__ == "__main__":
+    main()
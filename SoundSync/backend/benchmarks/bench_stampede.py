@@ -0,0 +1,99 @@
+# benchmarks/bench_stampede.py
+"""
+Cache stampede: MongoDB operations per expiry burst with and without single-flight.
+
+Each burst moves the collection to a new cache generation (same effect as the TTL running out
+or a write), then fires `--burst` concurrent identical list requests. MongoDB work is read from
+serverStatus opcounters (query + command + getmore) around the burst.
+
+`--servers N` runs N uvicorn servers in this process, each with its own event loop, so the
+in-process coalescing is per server and only the Redis lease coordinates them (like N workers).
+
+Usage (from SoundSync/backend, with mongod and redis-server reachable through MONGO_URI / REDIS_URL):
+    python -m benchmarks.bench_stampede --burst 200 --bursts 10 --servers 2
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.v1 import collections_api
+from app.core import events
+from app.db import cache
+from app.db.mongo import get_mongo_client
+from benchmarks._common import BackgroundServer, emit, quiet_logs, summarize
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(collections_api.router, prefix="/crud")
+    return app
+
+
+def mongo_ops() -> int:
+    counters = get_mongo_client().admin.command("serverStatus")["opcounters"]
+    return counters["query"] + counters["command"] + counters["getmore"]
+
+
+async def run_bursts(urls, args) -> dict:
+    limits = httpx.Limits(max_connections=args.burst, max_keepalive_connections=args.burst)
+    latencies, errors, per_burst = [], 0, []
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        async def call(i: int):
+            nonlocal errors
+            url = f"{urls[i % len(urls)]}/crud/{args.collection}?limit={args.limit}&count={args.count}"
+            start = time.perf_counter()
+            res = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            if res.status_code != 200:
+                errors += 1
+
+        await asyncio.gather(*(call(i) for i in range(len(urls) * 4)))  # warm connections
+        latencies.clear()
+        start = time.perf_counter()
+        for _ in range(args.bursts):
+            await cache.ainvalidate_collection(args.collection)
+            before = mongo_ops()
+            await asyncio.gather(*(call(i) for i in range(args.burst)))
+            per_burst.append(mongo_ops() - before - 1)  # minus the serverStatus itself
+        elapsed = time.perf_counter() - start
+
+    result = summarize(latencies, elapsed, errors)
+    result["mongo_ops_per_burst"] = {
+        "min": min(per_burst), "max": max(per_burst), "mean": round(sum(per_burst) / len(per_burst), 1),
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="tracks")
+    parser.add_argument("--burst", type=int, default=200, help="concurrent requests per expiry")
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--servers", type=int, default=2)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--count", default="exact")
+    args = parser.parse_args()
+
+    events.connect_to_services()
+    quiet_logs()
+    results = {"burst": args.burst, "bursts": args.bursts, "servers": args.servers}
+    servers = [BackgroundServer(build_app()) for _ in range(args.servers)]
+    for server in servers:
+        server.__enter__()
+    try:
+        urls = [server.url for server in servers]
+        for label, enabled in (("without_single_flight", False), ("with_single_flight", True)):
+            cache.SINGLE_FLIGHT_ENABLED = enabled
+            results[label] = asyncio.run(run_bursts(urls, args))
+    finally:
+        for server in servers:
+            server.__exit__(None, None, None)
+    results["single_flight_stats"] = cache.cache_stats()["single_flight"]
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_uploads.py
+"""
+Concurrent audio uploads: the previous route (shutil.copyfileobj on the event loop, UUID names)
+against the content-addressed one (hash + copy in a worker thread, deduplicated).
+While the uploads run, a probe coroutine pings a trivial route to measure how long the event
+loop stalls. A second pass re-uploads the same files to show deduplication.
+
+The server runs in its own process; files go to a temporary directory, not static/audio.
+No MongoDB / Redis needed.
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.bench_uploads --concurrency 16 --files 64 --size-mb 8
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, File, UploadFile
+
+from app.api.v1 import uploads_api
+from app.services import audio_analysis_service, audio_service
+from benchmarks._common import ServerProcess, emit, quiet_logs, run_load, summarize
+
+
+def build_app(directory: Path) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/old/upload/audio")
+    async def old_upload_audio(file: UploadFile = File(...)):
+        dest = directory / f"{uuid.uuid4().hex}.mp3"
+        with dest.open("wb") as out_file:
+            shutil.copyfileobj(file.file, out_file)
+        await file.close()
+        return {"filename": dest.name}
+
+    @app.get("/ping")
+    async def ping():
+        return {}
+
+    app.include_router(uploads_api.router)
+    return app
+
+
+async def bench(base_url: str, url: str, payloads, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency + 1, max_keepalive_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        done = asyncio.Event()
+        probes = []
+
+        async def probe():
+            while not done.is_set():
+                t0 = time.perf_counter()
+                await client.get("/ping")
+                probes.append(time.perf_counter() - t0)
+                await asyncio.sleep(0.01)
+
+        async def call(i: int):
+            res = await client.post(url, files={"file": (f"f{i}.mp3", payloads[i % len(payloads)], "audio/mpeg")})
+            return res.status_code == 200
+
+        prober = asyncio.create_task(probe())
+        result = await run_load(call, args.files, args.concurrency)
+        done.set()
+        await prober
+    result["mb_per_s"] = round(args.files * args.size_mb / result["seconds"], 1)
+    result["probe_during_uploads"] = summarize(probes, sum(probes))
+    return result
+
+
+def serving_app(directory: Path, max_bytes: int) -> FastAPI:
+    """ Runs in the server process (no metadata analysis: it needs MongoDB, see bench_audio_analysis). """
+    audio_service.STATIC_AUDIO_DIR = directory
+    audio_analysis_service.WORKERS = 0
+    audio_service.MAX_UPLOAD_BYTES = max_bytes
+    return build_app(directory)
+
+
+def disk_usage(directory: Path) -> float:
+    return round(sum(p.stat().st_size for p in directory.iterdir()) / 1024 / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--size-mb", type=float, default=8)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="bench_uploads_"))
+    payloads = [os.urandom(int(args.size_mb * 1024 * 1024)) for _ in range(args.files)]
+    quiet_logs()
+    results = {"concurrency": args.concurrency, "files": args.files, "size_mb": args.size_mb}
+    max_bytes = int(args.size_mb * 1024 * 1024) + 1
+    try:
+        with ServerProcess(lambda: serving_app(directory, max_bytes), ready_path="/ping") as server:
+            results["old_copy_on_loop"] = asyncio.run(bench(server.url, "/old/upload/audio", payloads, args))
+            results["old_disk_mb"] = disk_usage(directory)
+            for path in directory.iterdir():
+                path.unlink()
+            results["hashed_threaded"] = asyncio.run(bench(server.url, "/upload/audio", payloads, args))
+            results["hashed_reupload"] = asyncio.run(bench(server.url, "/upload/audio", payloads, args))
+            results["hashed_disk_mb_after_two_passes"] = disk_usage(directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    emit(results)
+
+
+if __name__ == "__main__":
+    main()
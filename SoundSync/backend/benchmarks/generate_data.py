@@ -0,0 +1,69 @@
+# benchmarks/generate_data.py
+"""
+Synthetic data for load tests (app/db/synthetic.py): artists, albums, tracks, concerts, genres,
+users, playlists, likes, comments and subscriptions with the seed files' schema and references,
+Zipf-like popularity and activity. --likes sets the scale, the other sizes follow unless given.
+
+Written as it is generated, in flat memory, either
+  --out DIR   JSON array files in the app/data layout (DIR/Artists/tracks.json, DIR/Users/likes.json...),
+              loadable with crud.init_database("ALL", data_dir=DIR), POST /jobs/init_db
+              {"data_dir": DIR}, or --load here
+  --mongo     straight into MONGO_URI's database in batches (replacing the collections), then
+              indexes and counters reconciled and the cached entries retired
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.generate_data --likes 10000000 --out /tmp/soundsync_10m
+    python -m benchmarks.generate_data --likes 1000000 --users 50000 --mongo
+"""
+import argparse
+import time
+
+from app.db import synthetic
+from benchmarks._common import emit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="directory for the JSON files")
+    target.add_argument("--mongo", action="store_true", help="insert into MongoDB directly")
+    parser.add_argument("--likes", type=int, default=100000)
+    for name in ("artists", "tracks", "concerts", "users", "playlists", "comments"):
+        parser.add_argument(f"--{name}", type=int, help="default: scaled on --likes")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--skew", type=float, default=synthetic.SKEW, help="Zipf exponent of popularity")
+    parser.add_argument("--activity-skew", type=float, default=synthetic.ACTIVITY_SKEW,
+                        help="Zipf exponent of user activity")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--load", action="store_true", help="with --out: load the files with init_database")
+    args = parser.parse_args()
+
+    sizes = synthetic.scaled_sizes(args.likes)
+    sizes.update({name: value for name, value in vars(args).items() if name in sizes and value is not None})
+    writer = synthetic.mongo_writers(args.batch_size) if args.mongo else synthetic.file_writers(args.out)
+
+    start = time.perf_counter()
+    try:
+        counts = synthetic.generate(writer, sizes, seed=args.seed, skew=args.skew, activity_skew=args.activity_skew)
+    except ValueError as e:
+        parser.error(str(e))
+    result = {"sizes": sizes, "documents": counts, "generate_seconds": round(time.perf_counter() - start, 3)}
+
+    if args.mongo or args.load:
+        from app.db import cache, crud
+        from app.db.counters import reconcile_counters
+        from app.db.indexes import reconcile_indexes
+        start = time.perf_counter()
+        if args.load:
+            result["loaded"] = crud.init_database("ALL", batch_size=args.batch_size, data_dir=args.out)
+        else:
+            reconcile_indexes(force=True)
+            reconcile_counters()
+        for name in synthetic.COLLECTIONS:
+            cache.invalidate_collection(name)
+        result["load_seconds"] = round(time.perf_counter() - start, 3)
+    emit(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# benchmarks/macro.py
+"""
+Macro load test: the whole FastAPI app (app.main, startup hooks included) under uvicorn in a
+child process, driven over HTTP by `concurrency` closed-loop clients issuing a weighted mix of
+    read_list  GET  /crud/tracks?filter={"genre": ..}&skip=..   (cached pages, misses after writes)
+    read_one   GET  /crud/tracks/by/_id/{id}                    (popular ids more often)
+    write      PUT  /crud/tracks/by/{id}, one in five a POST of a new track
+    upload     POST /upload/audio                               (--upload-kb of MPEG frames)
+Part of the benchmark suite (see suite.py), which picks the backend and seeds the catalog
+before the server process is forked (it inherits the data of the memory backend).
+"""
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks._backends import GENRES
+from benchmarks._common import ServerProcess, run_load, summarize
+
+OPERATIONS = ("read_list", "read_one", "write", "upload")
+DEFAULT_MIX = "read_list=50,read_one=35,write=10,upload=5"
+FRAME = b"\xff\xfb\x90\x64" + bytes(413)  # one MPEG-1 layer III frame, 128 kbps 44.1 kHz
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """ "read_list=50,write=10" -> normalized weights. """
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{name}' in mix, expected {', '.join(OPERATIONS)}")
+        weights[name.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items() if weight > 0}
+
+
+def serving_app(audio_dir: Path):
+    """ Runs in the server process: the real app, uploads kept out of static/audio. """
+    from app.services import audio_service
+    audio_service.STATIC_AUDIO_DIR = audio_dir
+    from app.main import app
+    return app
+
+
+async def drive(base_url: str, ids: Dict[str, List[str]], args) -> Dict[str, Dict[str, Any]]:
+    mix = parse_mix(args.mix)
+    rnd = random.Random(args.seed)
+    tracks = ids["tracks"]
+    names, weights = list(mix), list(mix.values())
+    plan = rnd.choices(names, weights, k=args.requests)
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+    upload_body = FRAME * max(1, args.upload_kb * 1024 // len(FRAME))
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def request(op: str, i: int) -> httpx.Response:
+            if op == "read_list":
+                genre = json.dumps({"genre": GENRES[i % len(GENRES)]})
+                return await client.get("/crud/tracks", params={"filter": genre, "skip": (i % 10) * 50, "limit": 50})
+            if op == "read_one":
+                track = tracks[min(int(len(tracks) * rnd.random() ** 3), len(tracks) - 1)]
+                return await client.get(f"/crud/tracks/by/_id/{track}")
+            if op == "write":
+                if i % 5 == 0:
+                    return await client.post("/crud/tracks", json={"_id": f"bench_new_{uuid.uuid4().hex}",
+                                                                   "title": f"New {i}", "genre": "Jazz"})
+                return await client.put(f"/crud/tracks/by/{tracks[i % len(tracks)]}", json={"popularity": i % 100})
+            body = upload_body + os.urandom(16)  # new content: stored, not deduplicated
+            return await client.post("/upload/audio", files={"file": (f"bench{i}.mp3", body, "audio/mpeg")})
+
+        async def call(i: int):
+            op = plan[i]
+            start = time.perf_counter()
+            try:
+                ok = (await request(op, i)).status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[op].append(time.perf_counter() - start)
+            errors[op] += not ok
+            return ok
+
+        await run_load(call, min(args.warmup, args.requests), args.concurrency)
+        for name in names:
+            latencies[name].clear()
+            errors[name] = 0
+        total = await run_load(call, args.requests, args.concurrency)
+
+    results = {"macro.total": total}
+    for name in names:
+        results[f"macro.{name}"] = summarize(latencies[name], total["seconds"], errors[name])
+    return results
+
+
+def run(ids: Dict[str, List[str]], args) -> Dict[str, Dict[str, Any]]:
+    audio_dir = Path(tempfile.mkdtemp(prefix="bench_macro_audio_"))
+    try:
+        with ServerProcess(lambda: serving_app(audio_dir), ready_path="/") as server:
+            return asyncio.run(drive(server.url, ids, args))
+    finally:
+        shutil.rmtree(audio_dir, ignore_errors=True)
@@ -0,0 +1,87 @@
+# benchmarks/micro.py
+"""
+Microbenchmarks of the sync data layer, called directly (no HTTP): app.db.crud reads / writes
+and the Redis cache helpers. Every case runs `iterations` timed calls after a short warm-up;
+part of the benchmark suite (see suite.py), which picks the backend and seeds the catalog.
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks._common import summarize
+
+WARMUP = 20
+PATTERN_KEYS = 100  # keys matched by each delete_cache call
+
+
+def timed(fn: Callable[[int], Any], iterations: int, setup: Optional[Callable[[int], Any]] = None) -> Dict[str, Any]:
+    """ Latency of fn(i) over `iterations` calls; setup(i), when given, runs untimed before each. """
+    for i in range(WARMUP):
+        if setup:
+            setup(i)
+        fn(i)
+    latencies: List[float] = []
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, sum(latencies))
+
+
+def crud_cases(ids: Dict[str, List[str]]) -> Dict[str, Callable[[int], Any]]:
+    from app.db import crud
+    tracks = ids["tracks"]
+    cursor = {"after": crud.get_all("tracks", sort=[("popularity", -1)], after="", limit=50, count="none")["next_after"]}
+
+    def keyset_next(i):
+        page = crud.get_all("tracks", sort=[("popularity", -1)], after=cursor["after"] or "", limit=50, count="none")
+        cursor["after"] = page["next_after"]  # walks the whole catalog, restarting at the end
+
+    return {
+        "crud.get_all.first_page": lambda i: crud.get_all("tracks", limit=50),
+        "crud.get_all.filter_sort": lambda i: crud.get_all("tracks", filter={"genre": "Jazz"},
+                                                           sort=[("popularity", -1)], limit=50),
+        "crud.get_all.deep_skip": lambda i: crud.get_all("tracks", skip=len(tracks) // 2, limit=50, count="none"),
+        "crud.get_all.keyset": keyset_next,
+        "crud.get_all.count_estimated": lambda i: crud.get_all("tracks", limit=50, count="estimated"),
+        "crud.get_one_by_field": lambda i: crud.get_one_by_field("tracks", "_id", tracks[i % len(tracks)]),
+        "crud.get_many_by_ids": lambda i: crud.get_many_by_ids("tracks", tracks[i % len(tracks):][:50]),
+        "crud.update_one": lambda i: crud.update_one("tracks", tracks[i % len(tracks)], {"popularity": i % 100}),
+    }
+
+
+def run(ids: Dict[str, List[str]], iterations: int, only: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    from app.db import cache, crud
+    page = crud.get_all("tracks", limit=50)
+    results = {}
+
+    def case(name: str, fn, setup=None, n: int = iterations):
+        if only and only not in name:
+            return
+        results[f"micro.{name}"] = timed(fn, n, setup)
+
+    for name, fn in crud_cases(ids).items():
+        case(name, fn)
+
+    cache.set_cache("bench:hit", page, ttl=600)
+    case("cache.set_cache", lambda i: cache.set_cache(f"bench:set:{i % 1000}", page, ttl=60))
+    case("cache.get_cache.hit", lambda i: cache.get_cache("bench:hit"))
+    case("cache.get_cache.miss", lambda i: cache.get_cache(f"bench:absent:{i}"))
+    case("cache.collection_key", lambda i: cache.collection_key("tracks", "list", i))
+    case("cache.invalidate_collection", lambda i: cache.invalidate_collection("bench_invalidate"))
+
+    def fill(i):
+        pipe = cache.REDIS.pipeline(transaction=False)
+        for k in range(PATTERN_KEYS):
+            pipe.setex(f"bench:pattern:{i}:{k}", 60, b"x")
+        pipe.execute()
+
+    # SCAN over the whole keyspace: its cost grows with the number of keys in Redis
+    case("cache.delete_cache", lambda i: cache.delete_cache(f"bench:pattern:{i}:*"), setup=fill,
+         n=max(1, iterations // 10))
+    stored = cache.encode_value(page)
+    case("cache.encode_value", lambda i: cache.encode_value(page))
+    case("cache.decode_value", lambda i: cache.decode_value(stored))
+    cache.delete_cache("bench:set:*")
+    return results
@@ -0,0 +1,142 @@
+# benchmarks/suite.py
+"""
+Benchmark suite: regressions in the data layer and in the served app, as JSON.
+  micro   app.db.crud reads / writes and the cache helpers, called directly (see micro.py)
+  macro   the whole app over HTTP, concurrent clients on a read / write / upload mix (see macro.py)
+against a synthetic catalog of --tracks bench_* tracks, on one of two backends:
+  local   the mongod / redis-server of MONGO_URI / REDIS_URL (bench_* documents removed afterwards)
+  memory  mongomock + fakeredis in process (pip install -r benchmarks/requirements.txt)
+
+Each result reports requests, errors, rps and mean / p50 / p95 / p99 in ms. With --baseline, every
+result is compared with the same key of a previous run: rps lower, or p50 / p95 higher, by more
+than --tolerance counts as a regression (--fail-on-regression then exits with status 1).
+Numbers only compare between runs on the same machine and backend.
+
+Usage (from SoundSync/backend):
+    python -m benchmarks.suite --backend memory --save-baseline baseline.json
+    python -m benchmarks.suite --backend memory --baseline baseline.json --fail-on-regression
+    python -m benchmarks.suite --layers macro --concurrency 32 --mix read_one=90,write=10
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks._backends import BACKENDS, drop_catalog, seed_catalog, use_backend
+from benchmarks._common import emit, quiet_logs
+
+LAYERS = ("micro", "macro")
+HIGHER_IS_WORSE = ("p50_ms", "p95_ms")
+LOWER_IS_WORSE = ("rps",)
+NOISE_FLOOR_MS = 0.05  # latencies below this are timer noise, not comparable in relative terms
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> Dict[str, Any]:
+    """ Relative change of each metric against the baseline; the ones past `tolerance` are regressions. """
+    changes, regressions = {}, []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        delta = {}
+        for metric in LOWER_IS_WORSE + HIGHER_IS_WORSE:
+            old, new = before.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            delta[metric] = round((new - old) / old, 3)
+            if metric in LOWER_IS_WORSE:
+                worse = delta[metric] < -tolerance
+            else:
+                worse = delta[metric] > tolerance and new - old > NOISE_FLOOR_MS
+            if worse:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({delta[metric]:+.0%})")
+        if current.get("errors", 0) > before.get("errors", 0):
+            regressions.append(f"{name}.errors: {before.get('errors', 0)} -> {current['errors']}")
+        changes[name] = delta
+    return {
+        "tolerance": tolerance,
+        "missing": sorted(set(baseline) - set(results)),
+        "changes": changes,
+        "regressions": regressions,
+    }
+
+
+def main():
+    from benchmarks.macro import DEFAULT_MIX
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=BACKENDS, default="local")
+    parser.add_argument("--layers", nargs="+", choices=LAYERS, default=list(LAYERS))
+    parser.add_argument("--only", help="micro: run only the cases whose name contains this")
+    parser.add_argument("--tracks", type=int, default=5000, help="size of the synthetic catalog")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--iterations", type=int, default=500, help="micro: timed calls per case")
+    parser.add_argument("--requests", type=int, default=2000, help="macro: requests in the measured run")
+    parser.add_argument("--warmup", type=int, default=200, help="macro: requests before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="macro: concurrent clients")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="macro: operation weights")
+    parser.add_argument("--upload-kb", type=int, default=256, help="macro: size of each upload")
+    parser.add_argument("--out", help="write the JSON report to this file (stdout otherwise)")
+    parser.add_argument("--baseline", help="report of a previous run to compare with")
+    parser.add_argument("--save-baseline", help="also write the results to this file, as the next baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    use_backend(args.backend)
+    from benchmarks import macro, micro
+    macro.parse_mix(args.mix)  # fail before seeding
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    quiet_logs()
+    ids = seed_catalog(args.tracks, args.seed)
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        if "micro" in args.layers:
+            results.update(micro.run(ids, args.iterations, args.only))
+        if "macro" in args.layers:
+            results.update(macro.run(ids, args))
+    finally:
+        drop_catalog()
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "backend": args.backend,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "save_baseline")},
+        },
+        "results": results,
+    }
+    if baseline is not None:
+        report["comparison"] = compare(results, baseline, args.tolerance)
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    if not args.out:
+        emit(report)
+
+    regressions: List[str] = report.get("comparison", {}).get("regressions", [])
+    for line in regressions:
+        sys.__stderr__.write(f"[bench] regression {line}\n")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -100,7 +100,7 @@ export default function AlbumsManage() {
             for (const track of albumTracks) {
             if (track.audio_url) {
                 try {
-                await deleteAudioByUrl(track.audio_url);
+                await deleteAudioByUrl(track.audio_url, track._id);
                 } catch (e) {
                 console.warn("Audio file delete failed for", track.title, e);
                 }
@@ -182,7 +182,7 @@ export default function AlbumsManage() {
             );
             if (ok) {
             try {
-                await deleteAudioByUrl(track.audio_url);
+                await deleteAudioByUrl(track.audio_url, track._id);
                 // Clear URL locally and in DB to avoid dangling link if edit is cancelled
                 updateTrackField(index, "audio_url", "");
                 await updateDocument("tracks", track._id, { audio_url: "" });
@@ -211,7 +211,7 @@ export default function AlbumsManage() {
                 const tr = (tracks[editingAlbum] || []).find((t) => t._id === trackId);
                 if (tr?.audio_url) {
                 try {
-                    await deleteAudioByUrl(tr.audio_url);
+                    await deleteAudioByUrl(tr.audio_url, tr._id);
                 } catch (e) {
                     console.warn("Audio file delete failed for", tr?.title, e);
                 }
@@ -471,7 +471,7 @@ export default function AlbumsManage() {
                                             );
                                             if (!ok) return;
                                             try {
-                                            await deleteAudioByUrl(track.audio_url);
+                                            await deleteAudioByUrl(track.audio_url, track._id);
                                             // Clear URL locally and on backend if track exists
                                             updateTrackField(idx, "audio_url", "");
                                             if (track._id) {
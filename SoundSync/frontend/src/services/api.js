@@ -138,17 +138,19 @@ export function extractAudioFilenameFromUrl(url) {
   }
 }
 
-export async function deleteAudioByFilename(filename) {
-  const url = `${API_BASE}/upload/audio/delete/${encodeURIComponent(filename)}`;
+// trackId: the saved track giving the file up (the file is kept while another track uses it)
+export async function deleteAudioByFilename(filename, trackId) {
+  let url = `${API_BASE}/upload/audio/delete/${encodeURIComponent(filename)}`;
+  if (trackId) url += `?track_id=${encodeURIComponent(trackId)}`;
   const res = await fetch(url, { method: "DELETE" });
   if (!res.ok) throw new Error(`Delete failed (${res.status})`);
   return await res.json(); // { deleted, filename }
 }
 
-export async function deleteAudioByUrl(url) {
+export async function deleteAudioByUrl(url, trackId) {
   const name = extractAudioFilenameFromUrl(url);
   if (!name) throw new Error("Invalid audio URL");
-  return await deleteAudioByFilename(name);
+  return await deleteAudioByFilename(name, trackId);
 }
 
 